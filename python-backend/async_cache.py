@@ -0,0 +1,94 @@
+"""
+Async Result Cache - LRU + TTL cache with single-flight computation
+
+Shared by both APIs: main.py caches finished predictions in it and the replay
+API's commentary engine caches generated sentences. Concurrent requests for the
+same key share one computation, which runs as its own task so one disconnecting
+client can't cancel it for the others; results a caller marks as failures
+(should_cache) aren't kept.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+class AsyncCache:
+    """Async LRU cache with TTL, single-flight computation and hit/miss/eviction counters"""
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared = 0  # requests that joined an in-flight computation
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: tuple, compute: Callable[[], Awaitable],
+                             should_cache: Callable[[object], bool] = lambda v: True):
+        """Return the cached value for key, or run compute() once for all concurrent callers"""
+        if self.maxsize <= 0:
+            return await compute()
+
+        value = self._get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.misses += 1
+            # The computation runs as its own task so a disconnecting client
+            # can't cancel it for everyone else waiting on the same key
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, should_cache))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task: asyncio.Future, should_cache):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if should_cache(value):
+            self._put(key, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared": self.shared,
+        }
@@ -0,0 +1,172 @@
+"""
+F1 Model Backtesting - score a model on every race of a season range
+
+Runs the same models and ranking code as /predict/{model_type}, but loads every
+grid in the range with one query and scores a batch of races per model call
+(see main.run_backtest). Each race's prediction is compared with the actual
+result:
+
+- winner hit: the predicted winner won
+- podium accuracy: share of the predicted top 3 that finished on the podium
+- Spearman: rank correlation of predicted and actual finishing order
+- calibration: predicted win probability vs how often those drivers won, in
+  10% bins, plus the Brier score
+
+The same results stream from GET /backtest/{model_type}?start_year=&end_year=.
+
+Run from the python-backend folder:
+python backtest.py historical 2018 2024
+python backtest.py hybrid 2023 --out backtest_hybrid.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import numpy as np
+
+CALIBRATION_BINS = 10
+PODIUM = 3
+
+def ordinal_rank(values: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(values, kind='stable'), kind='stable')
+
+def spearman(predicted: np.ndarray, actual: np.ndarray) -> Optional[float]:
+    """Spearman rank correlation of two orderings (ties broken by input order)"""
+    if len(predicted) < 2:
+        return None
+    rho = np.corrcoef(ordinal_rank(predicted), ordinal_rank(actual))[0, 1]
+    return None if np.isnan(rho) else float(rho)
+
+def race_metrics(response) -> dict:
+    """Per-race comparison of a PredictionResponse with the actual result"""
+    row = {
+        "year": response.year,
+        "circuit": response.circuit,
+        "success": response.success,
+        "ai_winner": response.ai_winner,
+        "actual_winner": response.actual_winner,
+    }
+    if not response.success:
+        return {**row, "error": response.error}
+    # Drivers without a classified result (actual_position 0) are left out of the order
+    finished = [p for p in response.predictions if p.actual_position > 0]
+    predicted_top = {p.driver for p in response.predictions[:PODIUM]}
+    actual_top = {p.driver for p in finished if p.actual_position <= PODIUM}
+    return {
+        **row,
+        "winner_hit": response.ai_winner == response.actual_winner,
+        "podium_accuracy": round(len(predicted_top & actual_top) / PODIUM, 4),
+        "spearman": spearman(
+            np.array([p.predicted_position for p in finished]),
+            np.array([p.actual_position for p in finished])
+        ),
+    }
+
+class BacktestMetrics:
+    """Running aggregate over a backtest's races"""
+
+    def __init__(self, model_type: str, start_year: int, end_year: int):
+        self.model_type = model_type
+        self.start_year = start_year
+        self.end_year = end_year
+        self.started = time.perf_counter()
+        self.rows: List[dict] = []
+        self.probabilities: List[np.ndarray] = []
+        self.won: List[np.ndarray] = []
+
+    def add(self, response) -> dict:
+        """Record a race; returns its per-race metrics"""
+        row = race_metrics(response)
+        self.rows.append(row)
+        if response.success and response.predictions:
+            self.probabilities.append(np.array([p.win_probability for p in response.predictions]) / 100)
+            self.won.append(np.array([p.actual_position == 1 for p in response.predictions]))
+        return row
+
+    def calibration(self) -> dict:
+        if not self.probabilities:
+            return {"brier": None, "bins": []}
+        p = np.clip(np.concatenate(self.probabilities), 0, 1)
+        won = np.concatenate(self.won).astype(float)
+        which = np.minimum((p * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+        bins = []
+        for b in range(CALIBRATION_BINS):
+            in_bin = which == b
+            if in_bin.any():
+                bins.append({
+                    "range": [b / CALIBRATION_BINS, (b + 1) / CALIBRATION_BINS],
+                    "drivers": int(in_bin.sum()),
+                    "predicted": round(float(p[in_bin].mean()), 4),
+                    "observed": round(float(won[in_bin].mean()), 4),
+                })
+        return {"brier": round(float(np.mean((p - won) ** 2)), 5), "bins": bins}
+
+    def summary(self) -> dict:
+        scored = [r for r in self.rows if r["success"]]
+        rhos = [r["spearman"] for r in scored if r["spearman"] is not None]
+        mean = lambda xs: round(float(np.mean(xs)), 4) if xs else None
+        return {
+            "model_type": self.model_type,
+            "start_year": self.start_year,
+            "end_year": self.end_year,
+            "races": len(self.rows),
+            "scored": len(scored),
+            "winner_hit_rate": mean([r["winner_hit"] for r in scored]),
+            "podium_accuracy": mean([r["podium_accuracy"] for r in scored]),
+            "spearman": mean(rhos),
+            "calibration": self.calibration(),
+            "seconds": round(time.perf_counter() - self.started, 2),
+        }
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+async def run_cli(model_type: str, start_year: int, end_year: int, batch_races: int) -> dict:
+    import main
+    main.MODEL_LOADING = "lazy"
+    await main.startup_event()
+    try:
+        if not await main.ensure_model(model_type):
+            raise SystemExit(f"❌ {model_type} model not available")
+        metrics = BacktestMetrics(model_type, start_year, end_year)
+        async for response in main.run_backtest(model_type, start_year, end_year, batch_races):
+            row = metrics.add(response)
+            if row["success"]:
+                mark = "✅" if row["winner_hit"] else "➖"
+                rho = "-" if row["spearman"] is None else f"{row['spearman']:.2f}"
+                print(f"{mark} {row['year']} {row['circuit']}: {row['ai_winner']} (won: {row['actual_winner']}), "
+                      f"podium {row['podium_accuracy']:.2f}, rho {rho}")
+            else:
+                print(f"❌ {row['year']} {row['circuit']}: {row['error']}")
+        return {"summary": metrics.summary(), "races": metrics.rows}
+    finally:
+        await main.shutdown_event()
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model_type", choices=("historical", "telemetry", "hybrid"))
+    parser.add_argument("start_year", type=int)
+    parser.add_argument("end_year", type=int, nargs="?")
+    parser.add_argument("--batch", type=int, default=None, help="Races per model call")
+    parser.add_argument("--out", help="Write the summary and per-race results as JSON")
+    args = parser.parse_args()
+
+    import main
+    start_year = max(args.start_year, main.MODEL_MIN_YEAR.get(args.model_type, args.start_year))
+    end_year = args.end_year if args.end_year is not None else start_year
+    result = asyncio.run(run_cli(args.model_type, start_year, end_year,
+                                 args.batch or main.BACKTEST_BATCH_RACES))
+    summary = result["summary"]
+    print(f"🏁 {summary['scored']}/{summary['races']} races in {summary['seconds']}s: "
+          f"winner {summary['winner_hit_rate']}, podium {summary['podium_accuracy']}, "
+          f"Spearman {summary['spearman']}, Brier {summary['calibration']['brier']}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,80 @@
+"""
+Historical model latency benchmark - per-driver predict vs batched grid predict
+
+Run from the python-backend folder (needs f1_data.db, f1_hybrid_model.npz
+and advanced_scalers.pkl next to main.py):
+python benchmarks/bench_historical.py --year 2024 --circuit Bahrain --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+
+# ==========================================
+# 📏 MEASUREMENT HELPERS
+# ==========================================
+def percentiles(samples):
+    arr = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(arr, 50)), 2),
+            "p95_ms": round(float(np.percentile(arr, 95)), 2),
+            "mean_ms": round(float(arr.mean()), 2)}
+
+def load_grid(year, circuit):
+    """Fetch the grid and every driver's history window the same way the API does"""
+    with main.db.connection() as conn:
+        round_num, drivers = main.load_race_grid(conn, year, circuit)
+        history, slices = main.load_grid_history(
+            conn, drivers['driver_code'].tolist(), year, round_num, main.SEQ_LENGTH
+        )
+    return drivers, history, slices
+
+# ==========================================
+# ⏱️ BENCHMARK
+# ==========================================
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--circuit", default="Bahrain")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if not main.load_historical_model():
+        sys.exit("❌ Historical model could not be loaded")
+    m = main.models["historical"]
+
+    drivers, history, slices = load_grid(args.year, args.circuit)
+    X_h, X_c, idx = main.build_historical_batch(m, drivers, history, slices)
+    print(f"Feature store: {'on' if m.get('store') is not None else 'off'}")
+    print(f"Grid: {len(drivers)} drivers, {len(idx)} with full history")
+
+    # Warm up the model so the first call doesn't skew either side
+    m['model'].predict([X_h, X_c], verbose=0)
+
+    per_driver, batched, end_to_end = [], [], []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        for i in range(len(idx)):
+            m['model'].predict([X_h[i:i + 1], X_c[i:i + 1]], verbose=0)
+        per_driver.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        m['model'].predict([X_h, X_c], verbose=0)
+        batched.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        asyncio.run(main.run_historical_prediction(args.year, args.circuit))
+        end_to_end.append(time.perf_counter() - t0)
+
+    print(f"Model predict, one call per driver : {percentiles(per_driver)}")
+    print(f"Model predict, one batched call     : {percentiles(batched)}")
+    print(f"run_historical_prediction end-to-end: {percentiles(end_to_end)}")
+
+if __name__ == "__main__":
+    main_cli()
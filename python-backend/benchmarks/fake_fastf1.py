@@ -0,0 +1,124 @@
+"""
+Fake FastF1 session - FastF1-shaped race telemetry without network or cache
+
+Implements the slice of the fastf1 Session/Laps API that process_race_data
+uses (laps.pick_driver/pick_fastest/get_telemetry, get_driver, event), with
+cars lapping an elliptical track at slightly different paces, one pit stop
+per car and 4 Hz telemetry in FastF1's units (X/Y in 1/10 m, Time as
+Timedelta).
+
+Used by run_benchmarks.py:
+import fake_fastf1; fake_fastf1.install(race_visualization_api.fastf1, duration=1800)
+and, in worker processes, as a pool initializer (tests/test_replay_warmup.py):
+warm(races, workers, initializer=fake_fastf1.install_worker, initargs=(120,))
+"""
+
+import numpy as np
+import pandas as pd
+
+TRACK_RADII = (5000.0, 3000.0)     # 1/10 m, roughly a 2.5 km lap
+COMPOUNDS = ("SOFT", "MEDIUM", "HARD")
+
+class FakeLap:
+    def __init__(self, telemetry: pd.DataFrame, compound: str):
+        self.telemetry = telemetry
+        self.compound = compound
+
+    def get_telemetry(self) -> pd.DataFrame:
+        return self.telemetry.copy()
+
+    def __getitem__(self, key):
+        return {"Compound": self.compound}[key]
+
+class _ILoc:
+    def __init__(self, lap: FakeLap):
+        self.lap = lap
+
+    def __getitem__(self, i):
+        return self.lap
+
+class FakeLaps:
+    """One driver's laps (everything process_race_data asks of pick_driver's result)"""
+
+    def __init__(self, lap: FakeLap):
+        self.lap = lap
+        self.empty = lap.telemetry.empty
+        self.iloc = _ILoc(lap)
+
+    def get_telemetry(self) -> pd.DataFrame:
+        return self.lap.get_telemetry()
+
+class FakeSessionLaps:
+    def __init__(self, laps: dict, fastest: FakeLap, duration: float):
+        self.laps = laps
+        self.fastest = fastest
+        self.duration = duration
+        self.empty = not laps
+        self.iloc = _ILoc(next(iter(laps.values())).lap)
+
+    def pick_driver(self, driver: str) -> FakeLaps:
+        return self.laps[driver]
+
+    def pick_fastest(self) -> FakeLap:
+        return self.fastest
+
+    def __getitem__(self, key):
+        if key != "Time":
+            raise KeyError(key)
+        return pd.Series(pd.to_timedelta([self.duration], unit="s"))
+
+class FakeSession:
+    def __init__(self, year: int = 2024, circuit: str = "Fake", n_drivers: int = 20,
+                 duration: float = 1800.0, hz: float = 4.0, laps: int = 20, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.drivers = [str(i + 1) for i in range(n_drivers)]
+        self.event = {"EventName": f"{circuit} Grand Prix"}
+        t = np.arange(0, duration, 1 / hz)
+        lap_time = duration / laps
+        per_driver, fastest = {}, None
+        for k, drv in enumerate(self.drivers):
+            pace = 1 - 0.003 * k + rng.normal(0, 0.001)
+            # One pit stop: 20 s at pit-lane speed somewhere mid-race
+            pit = rng.uniform(0.3, 0.7) * duration
+            in_pit = (t > pit) & (t < pit + 20)
+            lost = np.clip(t - pit, 0, 20) * 0.7
+            moving = np.clip(t - 5 - lost, 0, None)
+            frac = moving * pace / lap_time
+            angle = 2 * np.pi * frac
+            speed = np.where(t < 5, 0.0, 240 + 40 * np.sin(angle * 3))
+            speed = np.where(in_pit, 70.0, speed)
+            telemetry = pd.DataFrame({
+                "Time": pd.to_timedelta(t, unit="s"),
+                "X": TRACK_RADII[0] * np.cos(angle),
+                "Y": TRACK_RADII[1] * np.sin(angle),
+                "Speed": speed,
+                "Throttle": np.clip(speed / 3, 0, 100),
+                "Brake": speed < 200,
+                "nGear": np.clip(speed // 40, 1, 8).astype(int),
+                "RPM": speed * 45,
+                "DRS": np.zeros(len(t), dtype=int),
+            })
+            compound = COMPOUNDS[k % len(COMPOUNDS)]
+            per_driver[drv] = FakeLaps(FakeLap(telemetry, compound))
+            if fastest is None:
+                # The leader's second lap, timed from its own start like FastF1's lap telemetry
+                lap = telemetry[np.floor(frac) == 1].reset_index(drop=True)
+                lap["Time"] -= lap["Time"].iloc[0]
+                fastest = FakeLap(lap, compound)
+        self.laps = FakeSessionLaps(per_driver, fastest, duration)
+
+    def load(self, **kwargs):
+        pass
+
+    def get_driver(self, driver: str) -> dict:
+        n = int(driver)
+        return {"TeamColor": "3671C6", "Abbreviation": f"D{n:02d}", "TeamName": f"Team {(n - 1) // 2 + 1}"}
+
+def install(fastf1_module, **session_kwargs):
+    """Point fastf1.get_session at FakeSession (same signature as the real one)"""
+    fastf1_module.get_session = lambda year, circuit, kind: FakeSession(year, circuit, **session_kwargs)
+
+def install_worker(duration: float = 1800.0):
+    """Pool initializer: install the fake into a worker process' race_visualization_api"""
+    import race_visualization_api
+    install(race_visualization_api.fastf1, duration=duration)
@@ -0,0 +1,157 @@
+"""
+Synthetic benchmark fixtures - every artifact main.py loads, generated in seconds
+
+- f1_data.db: race_data for a few seasons of a 20-driver grid
+- advanced_scalers.pkl + f1_hybrid_model.npz: scaler/encoders and tiny random
+  LSTM weights in numpy_model's export format (the Keras layer semantics)
+- saved_models/: a small sklearn classifier, its scaler, and a processed_history
+  with one telemetry session per 2023+ race (circuit names match race_data)
+
+Everything is seeded, so two runs produce identical fixtures and benchmark
+results stay comparable between commits.
+
+Run from the python-backend folder:
+python benchmarks/fixtures.py /tmp/f1-bench
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from numpy_model import GRAPH_FORMAT, GRAPH_KEY  # noqa: E402
+from telemetry_index import TELEMETRY_FEATURES  # noqa: E402
+
+DRIVERS = ["VER", "PER", "HAM", "RUS", "LEC", "SAI", "NOR", "PIA", "ALO", "STR",
+           "OCO", "GAS", "ALB", "SAR", "TSU", "RIC", "BOT", "ZHO", "MAG", "HUL"]
+TEAMS = ["Red Bull Racing", "Mercedes", "Ferrari", "McLaren", "Aston Martin",
+         "Alpine", "Williams", "RB", "Kick Sauber", "Haas F1 Team"]
+CIRCUITS = ["Bahrain", "Saudi Arabia", "Australia", "Japan", "China", "Miami",
+            "Emilia Romagna", "Monaco", "Canada", "Spain", "Austria", "Great Britain",
+            "Hungary", "Belgium", "Netherlands", "Italy", "Azerbaijan", "Singapore",
+            "United States", "Mexico", "Brazil", "Las Vegas", "Qatar", "Abu Dhabi"]
+HIST_FEATURES = ["grid_position", "points", "position_gain", "driver_momentum"]
+CURR_FEATURES = ["grid_position", "driver_encoded", "team_encoded"]
+ALL_FEATURES = HIST_FEATURES + ["driver_encoded", "team_encoded"]
+LSTM_UNITS = 16
+
+def make_race_db(path: str, rng, seasons, rounds: int) -> pd.DataFrame:
+    """race_data with a strength-ordered field, so the models have something to find"""
+    rows = []
+    strength = np.linspace(0, 1, len(DRIVERS))
+    for year in seasons:
+        for rnd, circuit in enumerate(CIRCUITS[:rounds], start=1):
+            pace = strength + rng.normal(0, 0.25, len(DRIVERS))
+            grid = np.argsort(np.argsort(pace + rng.normal(0, 0.1, len(DRIVERS)))) + 1
+            final = np.argsort(np.argsort(pace + rng.normal(0, 0.2, len(DRIVERS)))) + 1
+            for i, driver in enumerate(DRIVERS):
+                rows.append({"year": year, "round": rnd, "circuit_name": circuit, "driver_code": driver,
+                             "team_name": TEAMS[i // 2], "grid_position": int(grid[i]),
+                             "final_position": int(final[i])})
+    df = pd.DataFrame(rows)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    df.to_sql("race_data", conn, index=False)
+    conn.close()
+    return df
+
+def make_historical_artifacts(out_dir: str, rng):
+    """advanced_scalers.pkl and random LSTM -> dense weights for NumpyModel"""
+    scaler = StandardScaler().fit(pd.DataFrame(rng.normal(size=(200, len(ALL_FEATURES))) * 5 + 10,
+                                               columns=ALL_FEATURES))
+    joblib.dump({
+        "scaler": scaler,
+        "le_driver": LabelEncoder().fit(DRIVERS),
+        "le_team": LabelEncoder().fit(TEAMS),
+        "hist_features": HIST_FEATURES,
+        "curr_features": CURR_FEATURES,
+        "all_features": ALL_FEATURES,
+    }, os.path.join(out_dir, "advanced_scalers.pkl"))
+
+    w = lambda *shape: (rng.normal(size=shape) * 0.3).astype(np.float32)
+    nh, nc, u = len(HIST_FEATURES), len(CURR_FEATURES), LSTM_UNITS
+    weights = {
+        "lstm:0": w(nh, 4 * u), "lstm:1": w(u, 4 * u), "lstm:2": w(4 * u),
+        "context:0": w(nc, 8), "context:1": w(8),
+        "head:0": w(u + 8, 16), "head:1": w(16),
+        "score:0": w(16, 1), "score:1": w(1),
+    }
+    layer = lambda name, kind, n, inbound, **spec: {"name": name, "type": kind, "weights": n, "inbound": inbound, **spec}
+    graph = {
+        "format": GRAPH_FORMAT,
+        "source": None,
+        "inputs": ["history", "current"],
+        "outputs": ["score"],
+        "layers": [
+            layer("history", "InputLayer", 0, []),
+            layer("current", "InputLayer", 0, []),
+            layer("lstm", "LSTM", 3, ["history"], activation="tanh", recurrent_activation="sigmoid",
+                  use_bias=True, return_sequences=False, go_backwards=False),
+            layer("context", "Dense", 2, ["current"], activation="relu", use_bias=True),
+            layer("merge", "Concatenate", 0, ["lstm", "context"], axis=-1),
+            layer("dropout", "Dropout", 0, ["merge"]),
+            layer("head", "Dense", 2, ["dropout"], activation="relu", use_bias=True),
+            layer("score", "Dense", 2, ["head"], activation="linear", use_bias=True),
+        ],
+    }
+    np.savez(os.path.join(out_dir, "f1_hybrid_model.npz"), **weights, **{GRAPH_KEY: np.array(json.dumps(graph))})
+
+def make_telemetry_artifacts(out_dir: str, rng, races: pd.DataFrame):
+    """saved_models/ with one session per 2023+ race in race_data"""
+    path = os.path.join(out_dir, "saved_models")
+    os.makedirs(path, exist_ok=True)
+    rows = []
+    recent = races[races["year"] >= 2023]
+    for session_key, ((year, rnd), grid) in enumerate(recent.groupby(["year", "round"]), start=9000):
+        for i, r in enumerate(grid.itertuples()):
+            rows.append({
+                "session_key": session_key, "date": f"{year}-{(rnd % 12) + 1:02d}-01T15:00:00",
+                "circuit_name": r.circuit_name, "name_acronym": r.driver_code, "team_name": r.team_name,
+                "grid_position": r.grid_position, "avg_race_pace": 95 + r.final_position * 0.1 + rng.normal(0, 0.3),
+                "pace_consistency": rng.random(), "top_speed": rng.normal(320, 5), "team_encoded": i // 2,
+                "track_temperature": rng.normal(35, 5), "rain_probability": rng.random() * 0.3,
+                "driver_encoded": i, "final_position": r.final_position,
+            })
+    history = pd.DataFrame(rows)
+    scaler = StandardScaler().fit(history[TELEMETRY_FEATURES])
+    model = LogisticRegression(max_iter=500).fit(
+        scaler.transform(history[TELEMETRY_FEATURES]), (history["final_position"] == 1).astype(int)
+    )
+    joblib.dump(model, os.path.join(path, "f1_8feat_model.pkl"))
+    joblib.dump(scaler, os.path.join(path, "scaler_8feat.pkl"))
+    joblib.dump({d: i for i, d in enumerate(DRIVERS)}, os.path.join(path, "driver_map.pkl"))
+    joblib.dump({t: i for i, t in enumerate(TEAMS)}, os.path.join(path, "team_map.pkl"))
+    joblib.dump(history, os.path.join(path, "processed_history.pkl"))
+    return history
+
+def build_fixtures(out_dir: str, seasons=(2021, 2022, 2023, 2024), rounds: int = 22, seed: int = 0) -> dict:
+    """Write every fixture into out_dir; returns a summary for the benchmark report"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    races = make_race_db(os.path.join(out_dir, "f1_data.db"), rng, seasons, rounds)
+    make_historical_artifacts(out_dir, rng)
+    history = make_telemetry_artifacts(out_dir, rng, races)
+    return {
+        "seasons": list(seasons),
+        "rounds": rounds,
+        "race_rows": len(races),
+        "telemetry_rows": len(history),
+        "seed": seed,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--seasons", type=int, nargs="*", default=[2021, 2022, 2023, 2024])
+    parser.add_argument("--rounds", type=int, default=22)
+    args = parser.parse_args()
+    print(f"✅ Fixtures written to {args.out_dir}: {build_fixtures(args.out_dir, args.seasons, args.rounds)}")
@@ -0,0 +1,295 @@
+"""
+Backend benchmark suite - latency, throughput, memory and payload sizes for both APIs
+
+Generates synthetic fixtures (see fixtures.py and fake_fastf1.py) in a scratch
+folder, then drives main.py and race_visualization_api.py in-process through
+an httpx ASGI client, so no server, models, database or FastF1 cache are needed.
+
+Measured:
+- per-endpoint latency percentiles (predictions uncached and cached,
+  backtests, replay metadata/frames/full replays at several levels of detail)
+- process_race_data end to end on a fake FastF1 session
+- throughput at increasing client concurrency
+- peak and current RSS after each group
+- response payload sizes
+
+Results are written as JSON. Compare against a baseline from another commit
+with --compare; --fail-on-regression turns slowdowns beyond --threshold into
+a non-zero exit code.
+
+Run from the python-backend folder:
+python benchmarks/run_benchmarks.py --out bench.json
+python benchmarks/run_benchmarks.py --out new.json --compare bench.json --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+import fake_fastf1  # noqa: E402
+from fixtures import CIRCUITS, build_fixtures  # noqa: E402
+
+# ==========================================
+# 📏 MEASUREMENT HELPERS
+# ==========================================
+def percentiles(samples):
+    arr = np.array(samples) * 1000
+    return {"n": len(arr),
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "p99_ms": round(float(np.percentile(arr, 99)), 3),
+            "mean_ms": round(float(arr.mean()), 3),
+            "max_ms": round(float(arr.max()), 3)}
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        return peak_rss_mb()
+
+def memory() -> dict:
+    return {"peak_rss_mb": peak_rss_mb(), "rss_mb": current_rss_mb()}
+
+async def timed(client, method, url, **kwargs):
+    t0 = time.perf_counter()
+    r = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - t0
+    r.raise_for_status()
+    return elapsed, r
+
+async def latency(client, method, urls, repeat, **kwargs) -> dict:
+    """Sequential requests cycling through urls; latency percentiles and payload size"""
+    samples, sizes = [], []
+    for url in urls:  # warm-up (and fill the caches, where they're on)
+        await client.request(method, url, **kwargs)
+    for i in range(repeat):
+        elapsed, r = await timed(client, method, urls[i % len(urls)], **kwargs)
+        samples.append(elapsed)
+        sizes.append(len(r.content))
+    return {**percentiles(samples), "payload_bytes": int(np.median(sizes))}
+
+async def throughput(client, method, urls, levels, requests_per_level, **kwargs) -> dict:
+    """Requests/second with `level` concurrent clients, for each level"""
+    out = {}
+    for level in levels:
+        limit = asyncio.Semaphore(level)
+        samples = []
+
+        async def one(i):
+            async with limit:
+                elapsed, _ = await timed(client, method, urls[i % len(urls)], **kwargs)
+                samples.append(elapsed)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests_per_level)))
+        wall = time.perf_counter() - t0
+        out[str(level)] = {"rps": round(requests_per_level / wall, 1), **percentiles(samples)}
+    return out
+
+# ==========================================
+# 🔮 PREDICTION API (main.py)
+# ==========================================
+async def bench_prediction_api(args, seasons) -> dict:
+    import main
+    main.MODEL_LOADING = "eager"
+    await main.startup_event()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            last = seasons[-1]
+            races = [(last, c) for c in CIRCUITS[:args.rounds]]
+            predict_urls = lambda model: [f"/predict/{model}?year={y}&circuit={c}" for y, c in races]
+
+            results["years"] = await latency(client, "GET", ["/years/historical"], args.repeat)
+            results["circuits"] = await latency(client, "GET", [f"/circuits/{last}"], args.repeat)
+
+            # Uncached: the result cache is off, every request runs the model
+            main.prediction_cache.maxsize = 0
+            for model in ("historical", "telemetry", "hybrid"):
+                results[f"predict_{model}"] = await latency(client, "POST", predict_urls(model), args.repeat)
+            results["predict_hybrid_throughput"] = await throughput(
+                client, "POST", predict_urls("hybrid"), args.concurrency, args.throughput_requests
+            )
+            main.prediction_cache.maxsize = main.PREDICTION_CACHE_SIZE
+            main.prediction_cache.clear()
+            results["predict_hybrid_cached"] = await latency(client, "POST", predict_urls("hybrid"), args.repeat)
+            results["predict_hybrid_cached_throughput"] = await throughput(
+                client, "POST", predict_urls("hybrid"), args.concurrency, args.throughput_requests
+            )
+
+            results["backtest_hybrid_season"] = await latency(
+                client, "GET", [f"/backtest/hybrid?start_year={last}"], max(3, args.repeat // 10)
+            )
+            results["memory"] = memory()
+    finally:
+        await main.shutdown_event()
+    return results
+
+# ==========================================
+# 🏁 REPLAY API (race_visualization_api.py)
+# ==========================================
+async def bench_replay_api(args) -> dict:
+    import race_visualization_api as api
+    fake_fastf1.install(api.fastf1, duration=args.race_seconds)
+    results = {}
+
+    # Processing runs in-process here (the API hands it to worker processes)
+    samples = []
+    for i in range(args.process_repeat):
+        t0 = time.perf_counter()
+        await asyncio.to_thread(api.process_race_data, 2024, f"Bench {i}")
+        samples.append(time.perf_counter() - t0)
+    results["process_race_data"] = {**percentiles(samples), "race_seconds": args.race_seconds}
+    results["memory_after_processing"] = memory()
+
+    year, circuit = 2024, "Bench 0"
+    # Keep the commentary track out of the measurements (benchmark it against stub_llm.py)
+    api.commentary_tracks[api.replay_key(year, circuit, api.FRAME_INTERVAL, api.REPLAY_PIPELINE_VERSION)] = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        body = {"year": year, "circuit": circuit}
+        binary = {"Accept": "application/x-f1-replay"}
+        results["meta"] = await latency(client, "GET", [f"/race/{year}/{circuit}/meta"], args.repeat)
+        for lod in (0, 1, 2, 3):
+            results[f"load_race_json_lod{lod}"] = await latency(
+                client, "POST", [f"/load_race?wait=true&lod={lod}"], max(5, args.repeat // 5), json=body
+            )
+        results["load_race_binary"] = await latency(
+            client, "POST", ["/load_race?wait=true"], max(5, args.repeat // 5), json=body, headers=binary
+        )
+        frames = [f"/race/{year}/{circuit}/frames?from={t}&to={t + 30}" for t in range(0, int(args.race_seconds) - 30, 60)]
+        results["frames_json"] = await latency(client, "GET", frames, args.repeat)
+        results["frames_binary"] = await latency(client, "GET", frames, args.repeat, headers=binary)
+        results["frames_throughput"] = await throughput(
+            client, "GET", frames, args.concurrency, args.throughput_requests, headers=binary
+        )
+    api.replay_jobs.shutdown()
+    results["memory"] = memory()
+    return results
+
+# ==========================================
+# 📊 COMPARISON
+# ==========================================
+def flatten(results: dict, prefix=""):
+    """(metric path, value) for every latency/throughput number worth comparing"""
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, path + ".")
+        elif key in ("p50_ms", "p95_ms", "rps", "payload_bytes", "peak_rss_mb"):
+            yield path, value
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print metric changes vs a baseline run; returns the regressions beyond threshold"""
+    base = dict(flatten(baseline["results"]))
+    regressions = []
+    print(f"\n📊 vs {baseline['meta'].get('commit', '?')[:10]} (threshold {threshold:.0%})")
+    for path, value in flatten(current["results"]):
+        old = base.get(path)
+        if not old:
+            continue
+        change = (value - old) / old
+        # Higher is better for throughput, lower for everything else
+        worse = -change if path.endswith("rps") else change
+        flag = "❌" if worse > threshold else ("✅" if worse < -threshold else "  ")
+        if worse > threshold:
+            regressions.append(path)
+        print(f"{flag} {path:<60} {old:>12} -> {value:<12} ({change:+.1%})")
+    return regressions
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--workdir", help="Where fixtures are generated (default: a temporary folder)")
+    parser.add_argument("--suite", nargs="*", choices=("predict", "replay"), default=["predict", "replay"])
+    parser.add_argument("--repeat", type=int, default=50, help="Requests per latency measurement")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 8, 32])
+    parser.add_argument("--throughput-requests", type=int, default=200)
+    parser.add_argument("--seasons", type=int, nargs="*", default=[2021, 2022, 2023, 2024])
+    parser.add_argument("--rounds", type=int, default=22)
+    parser.add_argument("--race-seconds", type=float, default=1800.0, help="Length of the fake FastF1 race")
+    parser.add_argument("--process-repeat", type=int, default=3)
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="f1-bench-"))
+    out_path = os.path.abspath(args.out)
+    fixtures = build_fixtures(workdir, args.seasons, args.rounds)
+    # Both apps resolve their artifacts relative to the working directory
+    os.chdir(workdir)
+    print(f"🏗️ Fixtures in {workdir}: {fixtures}")
+
+    results = {}
+    started = time.perf_counter()
+    if "predict" in args.suite:
+        print("🔮 Prediction API...")
+        results["prediction_api"] = asyncio.run(bench_prediction_api(args, args.seasons))
+    if "replay" in args.suite:
+        print("🏁 Replay API...")
+        results["replay_api"] = asyncio.run(bench_replay_api(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seconds": round(time.perf_counter() - started, 1),
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "workdir")},
+            "fixtures": fixtures,
+        },
+        "results": results,
+    }
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {out_path}")
+
+    for group, entries in results.items():
+        for name, r in entries.items():
+            if "p50_ms" in r:
+                print(f"  {group}.{name:<32} p50 {r['p50_ms']:>9.3f} ms  p95 {r['p95_ms']:>9.3f} ms"
+                      f"  {r.get('payload_bytes', 0):>10} B")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(f"❌ {len(regressions)} regressions")
+
+if __name__ == "__main__":
+    main_cli()
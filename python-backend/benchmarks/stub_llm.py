@@ -0,0 +1,61 @@
+"""
+Stub Ollama server - a stand-in LLM for exercising commentary without a model
+
+Implements the /api/chat endpoint the ollama client calls, answering with a
+canned sentence after a configurable delay, and counts requests so caching and
+concurrency limits can be checked from the outside (GET /stats).
+
+Run from the python-backend folder:
+python benchmarks/stub_llm.py --port 11435 --delay 0.5
+OLLAMA_HOST=http://127.0.0.1:11435 uvicorn race_visualization_api:app --port 8001
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Stub LLM")
+app.state.delay = 0.0
+app.state.fail = False
+
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(app.state.delay)
+        if app.state.fail:
+            return JSONResponse({"error": "stub failure"}, status_code=500)
+        prompt = body["messages"][-1]["content"]
+        leader = next((line.split(":", 1)[1].split("(")[0].strip()
+                       for line in prompt.splitlines() if "Leader:" in line), "The leader")
+        return {
+            "model": body.get("model", "stub"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": f"{leader} is absolutely flying out front!"},
+            "done": True,
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds per generation")
+    parser.add_argument("--fail", action="store_true", help="Answer every request with an error")
+    args = parser.parse_args()
+    app.state.delay = args.delay
+    app.state.fail = args.fail
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
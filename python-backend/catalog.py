@@ -0,0 +1,144 @@
+"""
+F1 Race Catalog - in-memory years/circuits metadata for the selector endpoints
+
+Built once from race_data and served from memory. It is rebuilt when f1_data.db
+changes on disk (file or WAL mtime) or SQLite's PRAGMA data_version moves,
+checked at most every CATALOG_CHECK_SECONDS off the event loop, and every list
+carries a content ETag so browsers can revalidate cheaply.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from database import Database, read_sql
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+# Earliest season each model supports (models not listed use every year)
+MODEL_MIN_YEAR = {"telemetry": 2023}
+CACHE_MAX_AGE = 300  # seconds browsers may reuse a list before revalidating
+CATALOG_CHECK_SECONDS = 2.0  # how stale the catalog may get before the DB is checked again
+
+CATALOG_QUERY = """
+    SELECT year, circuit_name, MIN(round) AS round
+    FROM race_data
+    GROUP BY year, circuit_name
+    ORDER BY year DESC, round
+"""
+
+def make_etag(payload) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header lists this entity tag (weak comparison, "*" matches anything)"""
+    tags = [t.strip() for t in (if_none_match or "").split(",")]
+    if "*" in tags:
+        return True
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
+
+# ==========================================
+# 📚 CATALOG
+# ==========================================
+class RaceCatalog:
+    """Year -> ordered circuits map, refreshed when the database changes"""
+
+    def __init__(self, db_name: str, min_years: Dict[str, int] = MODEL_MIN_YEAR,
+                 check_interval: float = CATALOG_CHECK_SECONDS):
+        self.db_name = db_name
+        self.min_years = min_years
+        self.check_interval = check_interval
+        self.circuits_by_year: Dict[int, List[str]] = {}
+        self.years: List[int] = []
+        self._etags: Dict[Tuple[str, object], str] = {}
+        self._signature = None
+        self._checked_at: Optional[float] = None
+        self._watch: Optional[sqlite3.Connection] = None
+
+    def _file_signature(self):
+        sig = []
+        for path in (self.db_name, f"{self.db_name}-wal"):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return sig
+
+    def _data_version(self):
+        # data_version only moves for commits made by *other* connections,
+        # so it's read on a dedicated connection kept just for this check
+        try:
+            if self._watch is None:
+                uri = f"file:{os.path.abspath(self.db_name)}?mode=ro"
+                self._watch = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return self._watch.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self._watch = None
+            return None
+
+    def signature(self):
+        if not os.path.exists(self.db_name):
+            return None
+        return (tuple(self._file_signature()), self._data_version())
+
+    def _load(self, conn):
+        return read_sql(conn, CATALOG_QUERY)
+
+    def _build(self, rows):
+        circuits: Dict[int, List[str]] = {}
+        for year, circuit in zip(rows['year'].tolist(), rows['circuit_name'].tolist()):
+            circuits.setdefault(int(year), []).append(circuit)
+        self.circuits_by_year = circuits
+        self.years = sorted(circuits, reverse=True)
+        self._etags = {}
+
+    async def refresh(self, db: Database, force: bool = False) -> bool:
+        """
+        Rebuild from race_data if the DB changed since the last build; returns True if rebuilt.
+        Unless forced, the DB is checked at most once per check_interval (stat + PRAGMA on a thread).
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        # Claimed before the await, so concurrent requests don't all check
+        self._checked_at = now
+        sig = await asyncio.to_thread(self.signature)
+        if sig is None:
+            self.circuits_by_year, self.years, self._etags = {}, [], {}
+            self._signature = None
+            return False
+        if not force and sig == self._signature:
+            return False
+        self._build(await db.run(self._load))
+        # Re-read after loading: the first reader of a WAL database creates the -wal file
+        self._signature = await asyncio.to_thread(self.signature)
+        print(f"📚 Race catalog loaded: {len(self.years)} seasons")
+        return True
+
+    def years_for(self, model_type: str) -> List[int]:
+        min_year = self.min_years.get(model_type)
+        if min_year is None:
+            return list(self.years)
+        return [y for y in self.years if y >= min_year]
+
+    def circuits_for(self, year: int) -> List[str]:
+        return list(self.circuits_by_year.get(year, []))
+
+    def etag(self, kind: str, key, payload) -> str:
+        """Content ETag for one list, memoized until the next rebuild"""
+        tag = self._etags.get((kind, key))
+        if tag is None:
+            tag = self._etags[(kind, key)] = make_etag(payload)
+        return tag
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
@@ -0,0 +1,183 @@
+"""
+Race Commentary Engine - non-blocking, rate-limited and cached LLM commentary
+
+Requests are quantized to a coarse race state (leader, team, compound, chaser,
+gap bucket) and the generated sentence is cached on that state, so every
+viewer watching the same situation shares one generation; concurrent
+identical requests join the in-flight one. The race time and leader speed the
+uncached prompt carried are left out on purpose: they change every request,
+so the sentences no longer refer to them. Generations go through
+ollama.AsyncClient behind a semaphore, with a timeout on both the wait for a
+slot and the call, so a slow model never blocks the event loop, piles up
+unbounded work or leaves a request queued forever. Failures aren't cached.
+Race commentary tracks are generated on their own, smaller set of slots and
+wait for them without a deadline, so a batch never takes a live request's slot.
+
+The Ollama server is taken from OLLAMA_HOST (ollama's own setting); point it
+at benchmarks/stub_llm.py to run without a real model.
+"""
+
+import asyncio
+import os
+from typing import Iterable, List, NamedTuple, Optional
+
+import ollama
+
+from async_cache import AsyncCache
+
+COMMENTARY_MODEL = os.getenv("COMMENTARY_MODEL", "llama3.2")
+COMMENTARY_CONCURRENCY = int(os.getenv("COMMENTARY_CONCURRENCY", "2"))
+COMMENTARY_TIMEOUT = float(os.getenv("COMMENTARY_TIMEOUT", "20"))
+# Longest a request waits for a free generation slot before giving up
+COMMENTARY_QUEUE_TIMEOUT = float(os.getenv("COMMENTARY_QUEUE_TIMEOUT", "10"))
+# Generations at a time for background batches (race commentary tracks), on top of the live slots
+COMMENTARY_BATCH_CONCURRENCY = int(os.getenv("COMMENTARY_BATCH_CONCURRENCY", "1"))
+COMMENTARY_CACHE_SIZE = int(os.getenv("COMMENTARY_CACHE_SIZE", "1024"))
+COMMENTARY_CACHE_TTL = float(os.getenv("COMMENTARY_CACHE_TTL", "3600"))
+OFFLINE_MESSAGE = "Commentary system offline..."
+
+# Distance gap (metres) -> how the prompt describes it
+GAP_BUCKETS = ((100, "right on the gearbox"), (500, "close"), (1500, "comfortable"))
+GAP_FAR = "a long way"
+
+class RaceState(NamedTuple):
+    leader_name: str
+    leader_team: str
+    leader_compound: str
+    chaser_name: str
+    gap_status: str
+
+def gap_status(gap: float) -> str:
+    for limit, label in GAP_BUCKETS:
+        if gap < limit:
+            return label
+    return GAP_FAR
+
+def quantize(leader_name: str, leader_team: str, leader_compound: str, chaser_name: str, gap: float) -> RaceState:
+    """The part of a race situation commentary is generated (and cached) for"""
+    return RaceState(leader_name, leader_team, str(leader_compound).upper(), chaser_name, gap_status(gap))
+
+def build_prompt(state: RaceState) -> str:
+    return f"""
+    Act as a professional F1 Commentator (Crofty style).
+    Context:
+    - Leader: {state.leader_name} ({state.leader_team}) on {state.leader_compound} tyres.
+    - P2: {state.chaser_name} is {state.gap_status} behind.
+
+    Task: Write ONE dramatic sentence analyzing the situation.
+    """
+
+# Moment type -> what happened (see race_moments)
+MOMENT_EVENTS = {
+    "start": "Lights out! {driver} leads into the first corner ahead of {other}.",
+    "lead_change": "{driver} takes the lead of the race from {other}.",
+    "closing": "{driver} has closed to within {gap} seconds of leader {other}.",
+    "pit_stop": "{driver} dives into the pit lane.",
+}
+
+def moment_fallback(moment: dict) -> str:
+    """Plain-text line for a moment, used when the model can't be reached"""
+    return MOMENT_EVENTS[moment["type"]].format(**{**moment, "other": moment.get("other") or "the field"})
+
+def build_moment_prompt(moment: dict) -> str:
+    minutes, seconds = divmod(int(moment["time"]), 60)
+    return f"""
+    Act as a professional F1 Commentator (Crofty style).
+    Context:
+    - Race Time: {minutes}:{seconds:02d}
+    - What happened: {moment_fallback(moment)}
+
+    Task: Write ONE dramatic sentence calling this moment.
+    """
+
+class CommentaryEngine:
+    """Async LLM commentary with a concurrency limit, timeout and shared cache"""
+
+    def __init__(self, model: str = COMMENTARY_MODEL, concurrency: int = COMMENTARY_CONCURRENCY,
+                 timeout: float = COMMENTARY_TIMEOUT, cache_size: int = COMMENTARY_CACHE_SIZE,
+                 cache_ttl: float = COMMENTARY_CACHE_TTL, queue_timeout: float = COMMENTARY_QUEUE_TIMEOUT,
+                 batch_concurrency: int = COMMENTARY_BATCH_CONCURRENCY,
+                 client: Optional[ollama.AsyncClient] = None):
+        self.model = model
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.concurrency = concurrency
+        self.batch_concurrency = batch_concurrency
+        self.cache = AsyncCache(cache_size, cache_ttl)
+        self._limit = asyncio.Semaphore(concurrency)
+        self._batch_limit = asyncio.Semaphore(batch_concurrency)
+        self._client = client
+        self.timeouts = 0
+        self.queue_timeouts = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> ollama.AsyncClient:
+        if self._client is None:
+            self._client = ollama.AsyncClient()
+        return self._client
+
+    async def generate(self, prompt: str, batch: bool = False) -> Optional[str]:
+        """
+        One uncached generation; None on failure or timeout. Live requests share the
+        concurrency slots and give up after queue_timeout; batches queue on their own.
+        """
+        limit = self._batch_limit if batch else self._limit
+        if batch:
+            await limit.acquire()
+        else:
+            try:
+                await asyncio.wait_for(limit.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.queue_timeouts += 1
+                return None
+        try:
+            res = await asyncio.wait_for(
+                self.client.chat(model=self.model, messages=[{'role': 'user', 'content': prompt}]),
+                self.timeout
+            )
+            return res['message']['content'].strip()
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Commentary failed: {e}")
+        finally:
+            limit.release()
+        return None
+
+    async def commentate(self, state: RaceState) -> str:
+        text = await self.cache.get_or_compute(
+            ("commentary", self.model) + tuple(state),
+            lambda: self.generate(build_prompt(state)),
+            should_cache=lambda v: v is not None
+        )
+        return text or OFFLINE_MESSAGE
+
+    async def commentate_many(self, states: Iterable[RaceState]) -> List[str]:
+        """Commentary for several states at once; duplicates share a generation"""
+        return list(await asyncio.gather(*(self.commentate(s) for s in states)))
+
+    async def commentate_moments(self, moments: List[dict]) -> List[dict]:
+        """
+        Commentary track for a race's key moments, generated as one batch on the batch slots.
+        Each entry gets "text" and "generated" (False where the fallback line was used);
+        entries of an earlier track that are already generated are kept as they are.
+        """
+        todo = [m for m in moments if not m.get("generated")]
+        texts = await asyncio.gather(*(self.generate(build_moment_prompt(m), batch=True) for m in todo))
+        done = {id(m): {**m, "text": text or moment_fallback(m), "generated": text is not None}
+                for m, text in zip(todo, texts)}
+        return [done.get(id(m), m) for m in moments]
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "model": self.model,
+            "concurrency": self.concurrency,
+            "batch_concurrency": self.batch_concurrency,
+            "timeout": self.timeout,
+            "timeouts": self.timeouts,
+            "queue_timeouts": self.queue_timeouts,
+            "errors": self.errors,
+        }
@@ -0,0 +1,208 @@
+"""
+F1 Data Access - pooled, read-only SQLite access for the prediction API
+
+Keeps a bounded pool of read-only connections to f1_data.db and runs every
+blocking query on a matching thread pool, so async endpoints never stall the
+event loop and never pay connection setup per request.
+"""
+
+import asyncio
+import contextvars
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+POOL_SIZE = 4
+MMAP_SIZE = 256 * 1024 * 1024  # 256 MB - f1_data.db fits comfortably
+STATEMENT_CACHE = 128          # per-connection prepared statement cache
+HISTORY_INDEX = "idx_race_data_driver_year_round"
+
+# ==========================================
+# 📝 QUERIES (all parameterized)
+# ==========================================
+YEARS_QUERY = "SELECT DISTINCT year FROM race_data ORDER BY year DESC"
+CIRCUITS_QUERY = "SELECT DISTINCT circuit_name FROM race_data WHERE year=? ORDER BY round"
+ROUND_QUERY = "SELECT round FROM race_data WHERE year=? AND circuit_name=? LIMIT 1"
+GRID_QUERY = "SELECT * FROM race_data WHERE year=? AND round=?"
+SEASON_GRIDS_QUERY = "SELECT * FROM race_data WHERE year BETWEEN ? AND ? ORDER BY year, round, rowid"
+HISTORY_UNTIL_QUERY = "SELECT * FROM race_data WHERE year <= ? ORDER BY driver_code, year, round"
+
+GRID_HISTORY_QUERY = """
+    SELECT * FROM (
+        SELECT r.*, ROW_NUMBER() OVER (
+            PARTITION BY driver_code ORDER BY year DESC, round DESC
+        ) AS rn
+        FROM race_data r
+        WHERE driver_code IN ({placeholders})
+        AND (year < ? OR (year = ? AND round < ?))
+    )
+    WHERE rn <= ?
+    ORDER BY driver_code, year, round
+"""
+
+# ==========================================
+# 🛠️ ONE-OFF SETUP (writable)
+# ==========================================
+def prepare_database(db_name: str) -> bool:
+    """
+    Switch the database to WAL and create the composite history index if missing.
+    Runs once at startup on a short-lived writable connection; everything else is read-only.
+    """
+    if not os.path.exists(db_name):
+        return False
+    try:
+        conn = sqlite3.connect(db_name)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {HISTORY_INDEX} "
+            "ON race_data(driver_code, year, round)"
+        )
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not prepare {db_name}: {e}")
+        return False
+
+# ==========================================
+# 🏊 CONNECTION POOL
+# ==========================================
+class Database:
+    """Bounded pool of read-only connections plus the thread pool that uses them"""
+
+    def __init__(self, db_name: str, pool_size: int = POOL_SIZE):
+        self.db_name = db_name
+        self.pool_size = pool_size
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        self._executor = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._executor is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.db_name)}?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE
+        )
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def open(self) -> bool:
+        """Open every pooled connection up front; returns False if the DB isn't there"""
+        if self.is_open:
+            return True
+        if not os.path.exists(self.db_name):
+            return False
+        for _ in range(self.pool_size):
+            self._pool.put(self._connect())
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="f1-db")
+        return True
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection (blocks while all of them are in use)"""
+        if not self.is_open and not self.open():
+            raise FileNotFoundError(f"Database not found: {self.db_name}")
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _call(self, fn: Callable, args, kwargs):
+        with self.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(conn, *args, **kwargs) on the thread pool with a pooled connection"""
+        if not self.is_open and not self.open():
+            raise FileNotFoundError(f"Database not found: {self.db_name}")
+        loop = asyncio.get_running_loop()
+        # Like asyncio.to_thread, carry the caller's context (request timings) onto the pool
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, ctx.run, self._call, fn, args, kwargs)
+
+# ==========================================
+# 🔎 QUERY HELPERS
+# ==========================================
+def read_sql(conn, sql: str, params=()) -> pd.DataFrame:
+    return pd.read_sql(sql, conn, params=list(params))
+
+def load_grid_history(conn, driver_codes: List[str], year: int, round_num: int, seq_length: int):
+    """
+    Fetch the last seq_length races before (year, round_num) for every driver in one query.
+    Returns (history, slices): history is ordered by driver then oldest race first, and
+    slices maps driver_code -> slice of rows in history belonging to that driver.
+    """
+    codes = list(dict.fromkeys(driver_codes))
+    if not codes:
+        return pd.DataFrame(), {}
+    q = GRID_HISTORY_QUERY.format(placeholders=",".join("?" * len(codes)))
+    params = codes + [int(year), int(year), int(round_num), int(seq_length)]
+    history = read_sql(conn, q, params).drop(columns='rn')
+
+    codes_col = history['driver_code'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes_col[1:] != codes_col[:-1]]) if len(history) else []
+    bounds = list(starts) + [len(history)]
+    slices = {codes_col[s]: slice(int(s), int(e)) for s, e in zip(bounds[:-1], bounds[1:])}
+    return history, slices
+
+class GridHistory:
+    """
+    Every race up to a season, loaded in one query on first use, answering
+    load_grid_history for any race in memory. Used when scoring many races
+    at once (backtests) instead of one history query per race.
+    """
+
+    def __init__(self, until_year: int):
+        self.until_year = int(until_year)
+        self.history: Optional[pd.DataFrame] = None
+        self._race_order = None
+        self._bounds = {}
+
+    def _load(self, conn):
+        history = read_sql(conn, HISTORY_UNTIL_QUERY, (self.until_year,))
+        codes = history['driver_code'].to_numpy()
+        self._race_order = history['year'].to_numpy(dtype=np.int64) * 1000 + history['round'].to_numpy(dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(history) else []
+        bounds = list(starts) + [len(history)]
+        self._bounds = {codes[s]: (int(s), int(e)) for s, e in zip(bounds[:-1], bounds[1:])}
+        self.history = history
+
+    def window(self, conn, driver_codes: List[str], year: int, round_num: int, seq_length: int):
+        """Same (history, slices) as load_grid_history, without touching the database again"""
+        if self.history is None:
+            self._load(conn)
+        race = int(year) * 1000 + int(round_num)
+        pieces, slices, n = [], {}, 0
+        for code in dict.fromkeys(driver_codes):
+            if code not in self._bounds:
+                continue
+            start, end = self._bounds[code]
+            stop = start + int(np.searchsorted(self._race_order[start:end], race))
+            lo = max(start, stop - seq_length)
+            if stop > lo:
+                pieces.append(np.arange(lo, stop))
+                slices[code] = slice(n, n + stop - lo)
+                n += stop - lo
+        if not pieces:
+            return pd.DataFrame(), {}
+        return self.history.iloc[np.concatenate(pieces)].reset_index(drop=True), slices
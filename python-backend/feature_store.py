@@ -0,0 +1,262 @@
+"""
+Historical Feature Store - precomputed LSTM inputs per (driver, year, round)
+
+Past seasons never change, so the points, position gain, rolling momentum,
+label encodings and scaling the Historical model needs are computed once
+offline and kept as memory-mapped .npy files. A /predict/historical request
+then becomes an index lookup plus one model call.
+
+The store is stamped with a fingerprint of advanced_scalers.pkl and is
+rebuilt automatically by main.py when the scaler changes. Each build is
+written to its own directory and published by swapping the feature_store
+symlink, under a lock, so workers starting together build it once and readers
+never see a partial store.
+
+Build manually (from the python-backend folder):
+python feature_store.py build
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import glob
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are still isolated, just not serialized
+    fcntl = None
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+FEATURE_STORE_DIR = "feature_store"
+STORE_FORMAT = 1
+MOMENTUM_WINDOW = 3
+POINTS_MAP = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
+
+# ==========================================
+# 🧮 SHARED FEATURE HELPERS
+# ==========================================
+def encode_labels(lookup: dict, values) -> np.ndarray:
+    """Label-encode values, mapping anything the encoder never saw to 0"""
+    return np.array([lookup.get(v, 0) for v in values], dtype=np.int64)
+
+def prepare_historical_artifacts(artifacts: dict) -> dict:
+    """Unpack advanced_scalers.pkl and precompute the lookups the batched path uses"""
+    all_features = artifacts['all_features']
+    return {
+        "scaler": artifacts['scaler'],
+        "le_driver": artifacts['le_driver'],
+        "le_team": artifacts['le_team'],
+        "hist_features": artifacts['hist_features'],
+        "curr_features": artifacts['curr_features'],
+        "all_features": all_features,
+        "driver_lookup": {c: i for i, c in enumerate(artifacts['le_driver'].classes_)},
+        "team_lookup": {c: i for i, c in enumerate(artifacts['le_team'].classes_)},
+        "hist_idxs": [all_features.index(f) for f in artifacts['hist_features']],
+        "curr_idxs": [all_features.index(f) for f in artifacts['curr_features']]
+    }
+
+def scaler_fingerprint(scaler_file: str) -> str:
+    """Content hash of the scaler artifact, used as the store's version stamp"""
+    h = hashlib.sha256()
+    with open(scaler_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+# ==========================================
+# 📁 STORE DIRECTORIES
+# ==========================================
+@contextmanager
+def build_lock(out_dir: str):
+    """Serialize builds of one store across processes; re-check the store once it's held"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{out_dir}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def new_build_dir(out_dir: str) -> str:
+    """An empty directory next to out_dir, unique to this build"""
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    return tempfile.mkdtemp(prefix=f"{os.path.basename(out_dir)}.", suffix=".build", dir=parent)
+
+def publish_build(build_dir: str, out_dir: str):
+    """
+    Make a finished build the live store. out_dir is a symlink to the current build
+    and is replaced with one rename, so readers always find a complete store. The
+    build it replaces is kept (a reader may still be opening it); older ones are removed.
+    """
+    keep = {os.path.abspath(build_dir)}
+    if os.path.islink(out_dir):
+        keep.add(os.path.realpath(out_dir))
+    elif os.path.isdir(out_dir):
+        # A store from before builds were versioned: move it aside once
+        aside = new_build_dir(out_dir)
+        os.rmdir(aside)
+        os.replace(out_dir, aside)
+        keep.add(aside)
+    link = f"{out_dir}.{os.getpid()}.link"
+    try:
+        os.symlink(os.path.basename(build_dir), link)
+    except OSError:
+        # No symlinks (e.g. Windows without the privilege): plain rename
+        if os.path.lexists(out_dir):
+            os.unlink(out_dir)
+        os.replace(build_dir, out_dir)
+    else:
+        os.replace(link, out_dir)
+    for old in glob.glob(f"{glob.escape(out_dir)}.*.build"):
+        if os.path.abspath(old) not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+# ==========================================
+# 🏗️ OFFLINE BUILD
+# ==========================================
+def build_feature_store(db_name: str, scaler_file: str, out_dir: str = FEATURE_STORE_DIR) -> dict:
+    """
+    Precompute scaled feature vectors for every row of race_data.
+
+    hist.npy holds MOMENTUM_WINDOW variants per row because the model's momentum
+    is a rolling mean taken *inside* the history window (min_periods=1): the row
+    at window position t uses the mean of its last min(t + 1, MOMENTUM_WINDOW) races.
+    """
+    a = prepare_historical_artifacts(joblib.load(scaler_file))
+    conn = sqlite3.connect(db_name)
+    raw = pd.read_sql("SELECT * FROM race_data ORDER BY driver_code, year, round", conn)
+    conn.close()
+
+    n = len(raw)
+    codes = raw['driver_code'].to_numpy()
+    first = np.r_[True, codes[1:] != codes[:-1]] if n else np.zeros(0, dtype=bool)
+    start = np.maximum.accumulate(np.where(first, np.arange(n), 0)) if n else np.zeros(0, dtype=int)
+
+    feats = raw.copy()
+    feats['points'] = feats['final_position'].map(POINTS_MAP).fillna(0)
+    feats['position_gain'] = feats['grid_position'] - feats['final_position']
+    feats['driver_encoded'] = encode_labels(a['driver_lookup'], feats['driver_code'])
+    feats['team_encoded'] = encode_labels(a['team_lookup'], feats['team_name'])
+    grouped_points = feats.groupby('driver_code', sort=False)['points']
+
+    hist = np.zeros((n, MOMENTUM_WINDOW, len(a['hist_features'])), dtype=np.float32)
+    for k in range(1, MOMENTUM_WINDOW + 1):
+        feats['driver_momentum'] = (
+            grouped_points.rolling(k, min_periods=1).mean().reset_index(level=0, drop=True).fillna(0)
+        )
+        scaled = a['scaler'].transform(feats[a['all_features']])
+        hist[:, k - 1, :] = scaled[:, a['hist_idxs']]
+
+    # Current-race context exactly as the live path builds it: raw row, missing features as 0
+    curr_df = raw.copy()
+    for c in a['all_features']:
+        if c not in curr_df:
+            curr_df[c] = 0
+    curr_df['driver_encoded'] = feats['driver_encoded']
+    curr_df['team_encoded'] = feats['team_encoded']
+    curr = a['scaler'].transform(curr_df[a['all_features']])[:, a['curr_idxs']].astype(np.float32)
+
+    meta = {
+        "format": STORE_FORMAT,
+        "scaler_fingerprint": scaler_fingerprint(scaler_file),
+        "rows": n,
+        "hist_features": list(a['hist_features']),
+        "curr_features": list(a['curr_features']),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+    # Write to a directory of our own and swap it in, so readers never see a half-built store
+    tmp_dir = new_build_dir(out_dir)
+    np.save(os.path.join(tmp_dir, "hist.npy"), hist)
+    np.save(os.path.join(tmp_dir, "curr.npy"), curr)
+    np.save(os.path.join(tmp_dir, "driver_code.npy"), codes.astype(str))
+    np.save(os.path.join(tmp_dir, "year.npy"), raw['year'].to_numpy(dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "round.npy"), raw['round'].to_numpy(dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "start.npy"), start.astype(np.int32))
+    with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+    publish_build(tmp_dir, out_dir)
+    return meta
+
+# ==========================================
+# 📦 RUNTIME STORE
+# ==========================================
+class FeatureStore:
+    """Read-only, memory-mapped view of a built feature store"""
+
+    def __init__(self, out_dir: str, meta: dict):
+        load = lambda name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode='r')
+        self.meta = meta
+        self.hist = load("hist")
+        self.curr = load("curr")
+        self.start = load("start")
+        codes = np.load(os.path.join(out_dir, "driver_code.npy"))
+        years = np.load(os.path.join(out_dir, "year.npy"))
+        rounds = np.load(os.path.join(out_dir, "round.npy"))
+        self.index = {(str(d), int(y), int(r)): i for i, (d, y, r) in enumerate(zip(codes, years, rounds))}
+
+    @classmethod
+    def open(cls, out_dir: str, scaler_file: str) -> Optional["FeatureStore"]:
+        """Open the store, or return None if it's missing or was built for another scaler"""
+        out_dir = os.path.realpath(out_dir)  # pin one build, even if a newer one is published meanwhile
+        meta_path = os.path.join(out_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("format") != STORE_FORMAT:
+            return None
+        if meta.get("scaler_fingerprint") != scaler_fingerprint(scaler_file):
+            return None
+        return cls(out_dir, meta)
+
+    def lookup(self, driver_codes: List[str], year: int, round_num: int, seq_length: int):
+        """
+        Model inputs for a grid, shaped like main.build_historical_batch's output.
+        Returns None if any driver's race isn't in the store (e.g. a race newer than
+        the last build) so the caller can fall back to live feature engineering.
+        """
+        rows = [self.index.get((d, int(year), int(round_num))) for d in driver_codes]
+        if any(r is None for r in rows):
+            return None
+        rows = np.array(rows, dtype=np.int64)
+        full = rows - np.asarray(self.start)[rows] >= seq_length
+        idx = np.flatnonzero(full).tolist()
+
+        # History rows immediately precede the race row; pick the momentum variant by window position
+        ends = rows[full]
+        window_rows = ends[:, None] - seq_length + np.arange(seq_length)[None, :]
+        variant = np.minimum(np.arange(seq_length), MOMENTUM_WINDOW - 1)[None, :]
+        X_h = np.asarray(self.hist[window_rows, variant], dtype=np.float32)
+        X_c = np.asarray(self.curr[ends], dtype=np.float32)
+        return X_h, X_c, idx
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historical model feature store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Rebuild the store from race_data")
+    build.add_argument("--db", default="f1_data.db")
+    build.add_argument("--scaler", default="advanced_scalers.pkl")
+    build.add_argument("--out", default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    meta = build_feature_store(args.db, args.scaler, args.out)
+    print(f"✅ Feature store built: {meta['rows']} rows, scaler {meta['scaler_fingerprint']}")
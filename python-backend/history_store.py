@@ -0,0 +1,171 @@
+"""
+Telemetry History Store - processed_history as compact, memory-mapped columns
+
+processed_history.pkl unpickles into an object-dtype DataFrame (every
+circuit_name, name_acronym, team_name and date a separate Python string,
+every number float64), and every API worker holds its own copy. The store
+keeps the same table on disk as one .npy file per column:
+
+- strings as categorical codes (int8/int16) plus their distinct values
+- whole-number columns as the smallest integer dtype that holds them
+- other numbers as float32
+- the 8 model features, already scaled, as float64 (predictions are unchanged)
+
+Rows are grouped by session, so a race is a contiguous slice. Columns are
+memory-mapped read-only, so every worker process shares one copy through the
+page cache.
+
+The store is stamped with the fingerprint (size and mtime) of
+processed_history.pkl and the scaler, and is rebuilt automatically by main.py
+when either changes. Builds are published like the feature store's (a unique
+build directory swapped in behind a symlink, under a lock).
+
+Build manually (from the python-backend folder):
+python history_store.py build
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from feature_store import new_build_dir, publish_build
+from prediction_cache import artifact_fingerprint
+from telemetry_index import TELEMETRY_FEATURES, session_order
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+HISTORY_STORE_DIR = "history_store"
+HISTORY_FILE = "processed_history.pkl"
+SCALER_FILE = "scaler_8feat.pkl"
+STORE_FORMAT = 1
+SCALED_FILE = "__scaled__"
+
+# ==========================================
+# 🗜️ COMPACT DTYPES
+# ==========================================
+def _smallest_int(lo: int, hi: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+def compact_column(values: pd.Series) -> pd.Series:
+    """Smallest lossless-enough dtype for a column: categorical, small int or float32"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype(bool)
+    if pd.api.types.is_numeric_dtype(values):
+        arr = values.to_numpy(dtype=np.float64)
+        finite = arr[np.isfinite(arr)]
+        if len(finite) == len(arr) and np.array_equal(finite, np.round(finite)):
+            lo, hi = (int(finite.min()), int(finite.max())) if len(finite) else (0, 0)
+            return values.astype(_smallest_int(lo, hi))
+        return values.astype(np.float32)
+    # Strings and anything else: one copy of each distinct value
+    return values.astype(str).where(values.notna()).astype("category")
+
+def compact_history(history: pd.DataFrame) -> pd.DataFrame:
+    """processed_history regrouped by session and with compact dtypes (see compact_column)"""
+    grouped = history.take(session_order(history)).reset_index(drop=True)
+    return pd.DataFrame({c: compact_column(grouped[c]) for c in grouped.columns})
+
+def source_files(model_dir: str):
+    return [os.path.join(model_dir, name) for name in (HISTORY_FILE, SCALER_FILE)]
+
+# ==========================================
+# 🏗️ BUILD
+# ==========================================
+def build_history_store(model_dir: str, out_dir: str = HISTORY_STORE_DIR) -> dict:
+    """Write processed_history and its scaled features as per-column .npy files"""
+    history_file, scaler_file = source_files(model_dir)
+    raw = joblib.load(history_file)
+    order = session_order(raw)
+    # Scaled from the original float64 values, exactly as the live path does
+    scaled = joblib.load(scaler_file).transform(raw[TELEMETRY_FEATURES].take(order))
+    history = compact_history(raw)
+
+    columns = {}
+    tmp_dir = new_build_dir(out_dir)
+    for i, name in enumerate(history.columns):
+        col = history[name]
+        entry = {"name": str(name), "file": f"c{i}.npy"}
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            entry["categories"] = [str(c) for c in col.cat.categories]
+            np.save(os.path.join(tmp_dir, entry["file"]), col.cat.codes.to_numpy())
+        else:
+            np.save(os.path.join(tmp_dir, entry["file"]), col.to_numpy())
+        columns[str(name)] = entry
+    np.save(os.path.join(tmp_dir, f"{SCALED_FILE}.npy"), np.ascontiguousarray(scaled, dtype=np.float64))
+
+    meta = {
+        "format": STORE_FORMAT,
+        "fingerprint": artifact_fingerprint(history_file, scaler_file),
+        "rows": len(history),
+        "columns": list(columns.values()),
+        "source_bytes": int(raw.memory_usage(deep=True).sum()),
+        "compact_bytes": int(history.memory_usage(deep=True).sum()),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+    # Swap in whole, so readers never see a half-built store
+    publish_build(tmp_dir, out_dir)
+    return meta
+
+# ==========================================
+# 📦 RUNTIME STORE
+# ==========================================
+class HistoryStore:
+    """Read-only, memory-mapped processed_history (`history`) and its scaled features (`scaled`)"""
+
+    def __init__(self, out_dir: str, meta: dict):
+        load = lambda name: np.asarray(np.load(os.path.join(out_dir, name), mmap_mode='r'))
+        self.meta = meta
+        data = {}
+        for entry in meta["columns"]:
+            values = load(entry["file"])
+            if "categories" in entry:
+                values = pd.Categorical.from_codes(values, categories=entry["categories"], validate=False)
+            data[entry["name"]] = values
+        # copy=False keeps every column a view of its mapped file
+        self.history = pd.DataFrame(data, copy=False)
+        self.scaled = load(f"{SCALED_FILE}.npy")
+
+    @classmethod
+    def open(cls, out_dir: str, model_dir: str) -> Optional["HistoryStore"]:
+        """Open the store, or return None if it's missing or was built from other artifacts"""
+        out_dir = os.path.realpath(out_dir)  # pin one build (see feature_store.publish_build)
+        meta_path = os.path.join(out_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("format") != STORE_FORMAT:
+            return None
+        if meta.get("fingerprint") != artifact_fingerprint(*source_files(model_dir)):
+            return None
+        return cls(out_dir, meta)
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry history store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Rebuild the store from processed_history.pkl")
+    build.add_argument("--models", default="saved_models")
+    build.add_argument("--out", default=HISTORY_STORE_DIR)
+    args = parser.parse_args()
+
+    meta = build_history_store(args.models, args.out)
+    print(f"✅ History store built: {meta['rows']} rows, "
+          f"{meta['source_bytes'] / 1e6:.1f} MB -> {meta['compact_bytes'] / 1e6:.1f} MB")
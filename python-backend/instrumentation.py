@@ -0,0 +1,351 @@
+"""
+Hot-Path Instrumentation - per-stage timings, Prometheus metrics, request profiles
+
+Code marks the expensive parts of a request with `with stage("sql"): ...`.
+Every stage's duration goes into a histogram, and into the current request's
+timings (a contextvar, so it follows the request into asyncio tasks and
+Database.run's thread pool). InstrumentationMiddleware adds per-route request
+histograms, and can report the request's stages as a Server-Timing header
+(visible in the browser devtools' Timing tab).
+
+- GET /metrics: everything in Prometheus' text format (see metrics_response)
+- METRICS=0: stage() returns a shared no-op and the middleware passes
+  requests straight through
+- PROFILE_DIR: requests sent with `X-Profile: 1` (or ?profile=1) are sampled
+  with a wall-clock stack sampler and written as folded stacks, ready for
+  flamegraph.pl, speedscope or inferno
+
+Durations measured in another process (replay workers) are collected with
+collect_stages() there and folded in with observe_stages()/report_stages().
+"""
+
+import contextlib
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+ENABLED = os.getenv("METRICS", "1") != "0"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_INTERVAL = 0.001  # seconds between stack samples (GIL switches make ~5 ms typical)
+METRIC_PREFIX = "f1_"
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; stages range from sub-millisecond lookups to minute-long FastF1 loads
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Innermost frames of threads that are parked, not working (left out of profiles)
+IDLE_FRAMES = {("selectors.py", "select"), ("thread.py", "_worker"), ("threading.py", "wait")}
+
+# ==========================================
+# 📊 METRICS
+# ==========================================
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [per-bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = _labels(self.label_names, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(round(series[-2], 6))}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}"
+
+class Registry:
+    """The process's metrics plus collectors that read live values (cache sizes, hits) on scrape"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors: Dict[str, Callable[[], dict]] = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(METRIC_PREFIX + name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(METRIC_PREFIX + name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self, prefix: str, stats: Callable[[], dict]):
+        """
+        Export a stats() dict as gauges named `{prefix}_{key}` (numeric values only).
+        Registering the same prefix again replaces the collector.
+        """
+        self.collectors[prefix] = stats
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self.collectors.items():
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"⚠️ Metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = METRIC_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+                lines += [f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("stage_duration_seconds", "Time spent per hot-path stage", ("stage",))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Request time, until the last body byte", ("method", "route", "status")
+)
+REQUESTS = REGISTRY.counter("http_requests_total", "Requests served", ("method", "route", "status"))
+
+# ==========================================
+# ⏱️ STAGES
+# ==========================================
+# Stage name -> seconds for the request being served (None outside requests)
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+_NOOP = contextlib.nullcontext()
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings = {self.name: time.perf_counter() - self.started}
+        observe_stages(timings)
+        report_stages(timings)
+        return False
+
+def stage(name: str):
+    """Time a block as `name` (repeated stages within a request add up)"""
+    return _Stage(name) if ENABLED else _NOOP
+
+def observe_stages(timings: Dict[str, float]):
+    """Add stage durations to the histograms (e.g. ones a worker process measured)"""
+    if ENABLED:
+        for name, seconds in timings.items():
+            STAGE_SECONDS.observe(name, value=seconds)
+
+def report_stages(timings: Dict[str, float]):
+    """Add stage durations to the current request's timings (no-op outside requests)"""
+    current = _request_timings.get() if ENABLED else None
+    if current is not None:
+        for name, seconds in timings.items():
+            current[name] = current.get(name, 0.0) + seconds
+
+@contextlib.contextmanager
+def collect_stages():
+    """Gather the stages of a block into a fresh dict (e.g. in a worker process, to ship back)"""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{re.sub(r'[^a-zA-Z0-9_-]', '_', name)};dur={seconds * 1000:.2f}"
+               for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+# ==========================================
+# 🔥 SAMPLING PROFILER
+# ==========================================
+class StackSampler:
+    """
+    Wall-clock sampler over every thread but its own: a request's work is spread
+    over the event loop, Database.run's pool and asyncio.to_thread, and parked
+    threads are dropped, so the profile shows where this request spent its time.
+    Concurrent requests show up too - profile on a quiet server.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: StackCounter = StackCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="stack-sampler")
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str) -> int:
+        """Folded stacks ("frame;frame;frame count" per line); returns the sample count"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        return sum(self.stacks.values())
+
+def _wants_profile(scope) -> bool:
+    if not PROFILE_DIR:
+        return False
+    if any(k == b"x-profile" and v not in (b"", b"0") for k, v in scope["headers"]):
+        return True
+    return re.search(rb"(^|&)profile=(1|true)(&|$)", scope.get("query_string", b"")) is not None
+
+def profile_path(method: str, path: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", path).strip("-") or "root"
+    return os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{method.lower()}-{slug}.folded")
+
+# ==========================================
+# 🔌 ASGI
+# ==========================================
+def route_template(router, scope) -> str:
+    """The matched route's path template ("/race/{year}/{circuit}/frames"), to keep label counts bounded"""
+    from starlette.routing import Match
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware (streaming responses pass through untouched): request
+    histograms per route, the Server-Timing header and opt-in profiles.
+    Add it last so it wraps the others: app.add_middleware(InstrumentationMiddleware, router=app.router)
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        sampler = StackSampler().start() if _wants_profile(scope) else None
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    header = server_timing(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _request_timings.reset(token)
+            route = route_template(self.router, scope)
+            REQUEST_SECONDS.observe(scope["method"], route, str(status), value=time.perf_counter() - started)
+            REQUESTS.inc(scope["method"], route, str(status))
+            if sampler is not None:
+                sampler.stop()
+                path = profile_path(scope["method"], scope["path"])
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                samples = sampler.write(path)
+                print(f"🔥 Profile of {scope['method']} {scope['path']} ({samples} samples) written to {path}")
+
+def metrics_response():
+    """GET /metrics body; 404 while METRICS=0"""
+    from fastapi import HTTPException
+    from fastapi.responses import PlainTextResponse
+    if not ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS=0)")
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_MEDIA_TYPE)
@@ -3,30 +3,46 @@ F1 AI Prediction API - FastAPI Backend
 Deploy this separately (Railway, Render, Heroku, or your own server)
 
 Install requirements:
-pip install fastapi uvicorn pandas numpy sqlite3 joblib tensorflow scikit-learn
+pip install fastapi uvicorn pandas numpy joblib scikit-learn
 
 Run locally:
 uvicorn main:app --reload --port 8000
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import sqlite3
 import joblib
+import asyncio
+import importlib.util
+import json
 import os
 
-# Try to import TensorFlow (for Historical model)
-try:
-    import tensorflow as tf
-    from tensorflow.keras.models import load_model
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("⚠️ TensorFlow not available - Historical model disabled")
+import database
+import instrumentation
+from backtest import BacktestMetrics
+from catalog import CACHE_MAX_AGE, MODEL_MIN_YEAR, RaceCatalog, etag_matches
+from database import Database, GridHistory, read_sql, load_grid_history
+from history_store import HISTORY_STORE_DIR, HistoryStore, build_history_store
+from prediction_cache import PredictionCache, PredictionStore, artifact_fingerprint
+from ranking import RankingSource, consensus_ranking
+from telemetry_index import TELEMETRY_FEATURES, TelemetryIndex
+
+from numpy_model import NumpyModel, export_keras_model, model_hash
+from instrumentation import InstrumentationMiddleware, stage
+from feature_store import (
+    FEATURE_STORE_DIR, FeatureStore, POINTS_MAP, build_feature_store, build_lock,
+    encode_labels, prepare_historical_artifacts
+)
+
+# The Historical model is served by numpy_model; TensorFlow is only needed to
+# (re-)export its weights from the .keras file
+TF_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
 
 app = FastAPI(
     title="F1 AI Prediction API",
@@ -42,15 +58,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request histograms, per-stage timings and Server-Timing/profiles (see instrumentation)
+app.add_middleware(InstrumentationMiddleware, router=app.router)
 
 # ==========================================
 # ⚙️ CONFIGURATION
 # ==========================================
-DB_NAME = "f1_data.db"
+DB_NAME = os.getenv("F1_DB", "f1_data.db")
 HISTORICAL_MODEL_FILE = "f1_hybrid_model.keras"
+HISTORICAL_WEIGHTS_FILE = "f1_hybrid_model.npz"  # NumPy export of the .keras model (numpy_model.py)
 HISTORICAL_SCALER_FILE = "advanced_scalers.pkl"
 TELEMETRY_MODEL_PATH = "saved_models"
+PREDICTION_STORE_FILE = os.getenv("PREDICTION_STORE", "predictions.db")  # written by precompute.py
+# eager: load everything before serving | background: serve immediately, load concurrently
+# lazy: load each model on its first request
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background")
+# Re-export the LSTM and rebuild the feature/history stores when they're stale. precompute.py
+# prepares them once and turns this off in its workers, which only open them
+BUILD_ARTIFACTS = True
+# Weight of each sub-model's rank in the hybrid consensus
+HYBRID_WEIGHTS = {"historical": 1.0, "telemetry": 1.0}
 SEQ_LENGTH = 5
+DB_POOL_SIZE = 4
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "256"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))  # seconds, 0 = never expire
+BACKTEST_BATCH_RACES = 24  # races scored per model call (about a season) when backtesting
+
+# Shared read-only connection pool; blocking queries run on its thread pool
+db = Database(DB_NAME, pool_size=DB_POOL_SIZE)
+# Years/circuits served from memory, rebuilt when f1_data.db changes
+catalog = RaceCatalog(DB_NAME)
+# Finished predictions keyed on (model, year, circuit, artifact fingerprint)
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+prediction_store = PredictionStore(PREDICTION_STORE_FILE)
+instrumentation.REGISTRY.collect("prediction_cache", prediction_cache.stats)
 
 # ==========================================
 # 📥 LOAD MODELS AT STARTUP
@@ -61,22 +102,23 @@ models = {
     "hybrid": {"loaded": False}
 }
 
+# Per-model readiness: pending -> loading -> ready | failed
+model_status = {"historical": "pending", "telemetry": "pending"}
+_load_tasks: Dict[str, asyncio.Task] = {}
+
 def load_historical_model():
     """Load the Historical LSTM model"""
-    if not TF_AVAILABLE:
-        return False
     try:
-        model = load_model(HISTORICAL_MODEL_FILE, compile=False)
+        model = load_numpy_model()
+        if model is None:
+            return False
         artifacts = joblib.load(HISTORICAL_SCALER_FILE)
         models["historical"] = {
             "loaded": True,
+            "fingerprint": artifact_fingerprint(HISTORICAL_WEIGHTS_FILE, HISTORICAL_SCALER_FILE),
             "model": model,
-            "scaler": artifacts['scaler'],
-            "le_driver": artifacts['le_driver'],
-            "le_team": artifacts['le_team'],
-            "hist_features": artifacts['hist_features'],
-            "curr_features": artifacts['curr_features'],
-            "all_features": artifacts['all_features']
+            **prepare_historical_artifacts(artifacts),
+            "store": load_feature_store()
         }
         print("✅ Historical model loaded")
         return True
@@ -84,6 +126,64 @@ def load_historical_model():
         print(f"❌ Failed to load Historical model: {e}")
         return False
 
+def export_numpy_model():
+    """Re-export the LSTM's weights if the .keras file changed and TensorFlow is installed"""
+    if os.path.exists(HISTORICAL_MODEL_FILE):
+        if NumpyModel.source_hash(HISTORICAL_WEIGHTS_FILE) != model_hash(HISTORICAL_MODEL_FILE):
+            if TF_AVAILABLE:
+                print("🔄 Historical weights missing or stale - exporting from Keras")
+                export_keras_model(HISTORICAL_MODEL_FILE, HISTORICAL_WEIGHTS_FILE, FEATURE_STORE_DIR)
+            elif os.path.exists(HISTORICAL_WEIGHTS_FILE):
+                print(f"⚠️ {HISTORICAL_WEIGHTS_FILE} was exported from a different {HISTORICAL_MODEL_FILE}; "
+                      "re-export it with numpy_model.py export (needs TensorFlow)")
+
+def load_numpy_model():
+    """The LSTM's NumPy export, re-exported first if it's stale (see export_numpy_model)"""
+    if BUILD_ARTIFACTS:
+        export_numpy_model()
+    if not os.path.exists(HISTORICAL_WEIGHTS_FILE):
+        print(f"❌ Historical model not found: {HISTORICAL_WEIGHTS_FILE} "
+              f"(export it from {HISTORICAL_MODEL_FILE} with: python numpy_model.py export)")
+        return None
+    return NumpyModel.load(HISTORICAL_WEIGHTS_FILE)
+
+def load_feature_store():
+    """Open the precomputed feature store, rebuilding it if it's missing or the scaler changed"""
+    try:
+        store = FeatureStore.open(FEATURE_STORE_DIR, HISTORICAL_SCALER_FILE)
+        if store is None and BUILD_ARTIFACTS and os.path.exists(DB_NAME):
+            with build_lock(FEATURE_STORE_DIR):
+                # Another worker may have built it while we waited for the lock
+                store = FeatureStore.open(FEATURE_STORE_DIR, HISTORICAL_SCALER_FILE)
+                if store is None:
+                    print("🔄 Feature store missing or stale - rebuilding")
+                    build_feature_store(DB_NAME, HISTORICAL_SCALER_FILE, FEATURE_STORE_DIR)
+                    store = FeatureStore.open(FEATURE_STORE_DIR, HISTORICAL_SCALER_FILE)
+        if store is not None:
+            print(f"✅ Feature store ready ({store.meta['rows']} rows)")
+        return store
+    except Exception as e:
+        print(f"⚠️ Feature store unavailable, using live features: {e}")
+        return None
+
+def load_history_store():
+    """Open the compact telemetry history store, rebuilding it if processed_history or the scaler changed"""
+    try:
+        store = HistoryStore.open(HISTORY_STORE_DIR, TELEMETRY_MODEL_PATH)
+        if store is None and BUILD_ARTIFACTS:
+            with build_lock(HISTORY_STORE_DIR):
+                store = HistoryStore.open(HISTORY_STORE_DIR, TELEMETRY_MODEL_PATH)
+                if store is None:
+                    print("🔄 History store missing or stale - rebuilding")
+                    build_history_store(TELEMETRY_MODEL_PATH, HISTORY_STORE_DIR)
+                    store = HistoryStore.open(HISTORY_STORE_DIR, TELEMETRY_MODEL_PATH)
+        if store is not None:
+            print(f"✅ History store ready ({store.meta['rows']} rows)")
+        return store
+    except Exception as e:
+        print(f"⚠️ History store unavailable, loading {TELEMETRY_MODEL_PATH}/processed_history.pkl: {e}")
+        return None
+
 def load_telemetry_model():
     """Load the Telemetry probability model"""
     try:
@@ -93,13 +193,28 @@ def load_telemetry_model():
              print(f"❌ Telemetry model path not found: {path}")
              return False
 
+        # Load the artifacts concurrently; the history is memory-mapped from the compact
+        # store (shared by every worker process), the pickle is only the fallback
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            jobs = {
+                "model": pool.submit(joblib.load, f'{path}/f1_8feat_model.pkl'),
+                "scaler": pool.submit(joblib.load, f'{path}/scaler_8feat.pkl'),
+                "driver_map": pool.submit(joblib.load, f'{path}/driver_map.pkl'),
+                "team_map": pool.submit(joblib.load, f'{path}/team_map.pkl'),
+                "store": pool.submit(load_history_store)
+            }
+            artifacts = {name: job.result() for name, job in jobs.items()}
+        store = artifacts.pop("store")
+        if store is not None:
+            history, scaled = store.history, store.scaled
+        else:
+            history, scaled = joblib.load(f'{path}/processed_history.pkl', mmap_mode='r'), None
         models["telemetry"] = {
             "loaded": True,
-            "model": joblib.load(f'{path}/f1_8feat_model.pkl'),
-            "scaler": joblib.load(f'{path}/scaler_8feat.pkl'),
-            "driver_map": joblib.load(f'{path}/driver_map.pkl'),
-            "team_map": joblib.load(f'{path}/team_map.pkl'),
-            "history": joblib.load(f'{path}/processed_history.pkl')
+            "fingerprint": artifact_fingerprint(path),
+            **artifacts,
+            "history": history,
+            "index": TelemetryIndex(history, artifacts["scaler"], scaled)
         }
         print("✅ Telemetry model loaded")
         return True
@@ -108,18 +223,72 @@ def load_telemetry_model():
         return False
 
 def load_hybrid_model():
-    """Load both models for hybrid predictions"""
-    historical_ok = models["historical"]["loaded"] or load_historical_model()
-    telemetry_ok = models["telemetry"]["loaded"] or load_telemetry_model()
-    models["hybrid"]["loaded"] = historical_ok or telemetry_ok
+    """Hybrid is available once either of its component models is"""
+    models["hybrid"]["loaded"] = models["historical"]["loaded"] or models["telemetry"]["loaded"]
     return models["hybrid"]["loaded"]
 
+def prepare_artifacts():
+    """Export the LSTM and build the feature and history stores if they're stale, without loading models"""
+    export_numpy_model()
+    load_feature_store()
+    if os.path.exists(TELEMETRY_MODEL_PATH):
+        load_history_store()
+
+LOADERS = {"historical": load_historical_model, "telemetry": load_telemetry_model}
+
+def start_loading(name: str) -> asyncio.Task:
+    """Start loading a model on a worker thread (once); returns the task to await"""
+    task = _load_tasks.get(name)
+    if task is None:
+        model_status[name] = "loading"
+
+        async def run():
+            ok = await asyncio.to_thread(LOADERS[name])
+            model_status[name] = "ready" if ok else "failed"
+            load_hybrid_model()
+            return ok
+
+        task = _load_tasks[name] = asyncio.create_task(run())
+    return task
+
+async def ensure_model(model_type: str) -> bool:
+    """Wait for a model (hybrid: both components) to finish loading, starting it if needed"""
+    names = ["historical", "telemetry"] if model_type == "hybrid" else [model_type]
+    await asyncio.gather(*(start_loading(n) for n in names))
+    return models[model_type]["loaded"]
+
+def get_model_status() -> dict:
+    status = dict(model_status)
+    parts = [model_status["historical"], model_status["telemetry"]]
+    if "loading" in parts:
+        status["hybrid"] = "loading"
+    elif "ready" in parts:
+        status["hybrid"] = "ready"
+    elif parts == ["failed", "failed"]:
+        status["hybrid"] = "failed"
+    else:
+        status["hybrid"] = "pending"
+    return status
+
 @app.on_event("startup")
 async def startup_event():
-    """Load all models on startup"""
-    load_historical_model()
-    load_telemetry_model()
-    load_hybrid_model()
+    """Open the database and load models (blocking, in the background or lazily - see MODEL_LOADING)"""
+    database.prepare_database(DB_NAME)
+    db.open()
+    await catalog.refresh(db)
+    if prediction_store.load():
+        print(f"✅ Precomputed predictions loaded ({len(prediction_store)})")
+    if MODEL_LOADING == "eager":
+        await asyncio.gather(*(start_loading(name) for name in LOADERS))
+    elif MODEL_LOADING == "background":
+        for name in LOADERS:
+            start_loading(name)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled DB connections"""
+    catalog.close()
+    db.close()
 
 # ==========================================
 # 📋 API MODELS
@@ -192,175 +361,255 @@ async def root():
             "historical": models["historical"]["loaded"],
             "telemetry": models["telemetry"]["loaded"],
             "hybrid": models["hybrid"]["loaded"]
-        }
+        },
+        "status": get_model_status(),
+        "cache": prediction_cache.stats(),
+        "precomputed": len(prediction_store)
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request and per-stage histograms, prediction cache counters"""
+    return instrumentation.metrics_response()
+
+def cached_json(request: Request, payload: dict, etag: str):
+    """JSON response with ETag/Cache-Control, or a bare 304 if the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
 @app.get("/years/{model_type}", response_model=YearsResponse)
-async def get_years(model_type: str):
+async def get_years(model_type: str, request: Request):
     """Get available years for a model type"""
     try:
-        if not os.path.exists(DB_NAME):
-             return {"years": []}
-             
-        conn = sqlite3.connect(DB_NAME)
-        years = pd.read_sql(
-            "SELECT DISTINCT year FROM race_data ORDER BY year DESC", 
-            conn
-        )['year'].tolist()
-        conn.close()
-        
-        # Filter years based on model type
-        if model_type == "telemetry":
-            years = [y for y in years if y >= 2023]
-        # historical and hybrid use all years (2018-2025)
-        
-        return {"years": years}
+        await catalog.refresh(db)
+        # Filter years based on model type (historical and hybrid use all years)
+        payload = {"years": catalog.years_for(model_type)}
+        return cached_json(request, payload, catalog.etag("years", model_type, payload))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/circuits/{year}", response_model=CircuitsResponse)
-async def get_circuits(year: int):
+async def get_circuits(year: int, request: Request):
     """Get circuits for a specific year"""
     try:
-        if not os.path.exists(DB_NAME):
-             return {"circuits": []}
-
-        conn = sqlite3.connect(DB_NAME)
-        circuits = pd.read_sql(
-            f"SELECT DISTINCT circuit_name FROM race_data WHERE year={year} ORDER BY round",
-            conn
-        )['circuit_name'].tolist()
-        conn.close()
-        return {"circuits": circuits}
+        await catalog.refresh(db)
+        payload = {"circuits": catalog.circuits_for(year)}
+        return cached_json(request, payload, catalog.etag("circuits", year, payload))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def model_fingerprint(model_type: str) -> str:
+    """Identifies the artifacts a prediction depends on, so reloaded models never hit stale entries"""
+    if model_type == "hybrid":
+        # Hybrid blends whichever of the two models are loaded
+        return "+".join(
+            models[name].get("fingerprint", "off") if models[name]["loaded"] else "off"
+            for name in ("historical", "telemetry")
+        )
+    return models[model_type].get("fingerprint", "")
+
+async def cached_prediction(model_type: str, year: int, circuit: str, runner) -> Response:
+    """Serve a prediction from the result cache, then the precomputed store, then live inference"""
+    key = (model_type, year, circuit, model_fingerprint(model_type))
+
+    async def compute():
+        with stage("store"):
+            payload = prediction_store.get(key)
+            if payload is not None:
+                return PredictionResponse.model_validate_json(payload)
+        return await runner(year, circuit)
+
+    result = await prediction_cache.get_or_compute(key, compute, should_cache=lambda r: r.success)
+    # Serialized here rather than by FastAPI, so it shows up as its own stage
+    with stage("serialize"):
+        return Response(result.model_dump_json(), media_type="application/json")
+
 @app.post("/predict/historical", response_model=PredictionResponse)
 async def predict_historical(year: int, circuit: str):
     """Historical LSTM model prediction (2018-2025)"""
-    if not models["historical"]["loaded"]:
+    if not await ensure_model("historical"):
         raise HTTPException(status_code=503, detail="Historical model not available")
     
-    return await run_historical_prediction(year, circuit)
+    return await cached_prediction("historical", year, circuit, run_historical_prediction)
 
 @app.post("/predict/telemetry", response_model=PredictionResponse)
 async def predict_telemetry(year: int, circuit: str):
     """Telemetry probability model (2023-2025)"""
-    if not models["telemetry"]["loaded"]:
+    if not await ensure_model("telemetry"):
         raise HTTPException(status_code=503, detail="Telemetry model not available")
     
     if year < 2023:
         raise HTTPException(status_code=400, detail="Telemetry model only supports 2023-2025")
     
-    return await run_telemetry_prediction(year, circuit)
+    return await cached_prediction("telemetry", year, circuit, run_telemetry_prediction)
 
 @app.post("/predict/hybrid", response_model=PredictionResponse)
 async def predict_hybrid(year: int, circuit: str):
     """Hybrid model combining LSTM + Telemetry (2018-2025)"""
-    if not models["hybrid"]["loaded"]:
+    if not await ensure_model("hybrid"):
         raise HTTPException(status_code=503, detail="Hybrid model not available")
     
-    return await run_hybrid_prediction(year, circuit)
+    return await cached_prediction("hybrid", year, circuit, run_hybrid_prediction)
+
+@app.get("/backtest/{model_type}")
+async def backtest(model_type: str, start_year: int, end_year: Optional[int] = None,
+                   details: bool = Query(False, description="Include every race's full predictions")):
+    """
+    Score a model on every race from start_year to end_year (default: start_year).
+    Streams NDJSON: one {"type": "race"} line per race as its batch finishes,
+    then a {"type": "summary"} line with the aggregate metrics (see backtest.py).
+    """
+    if model_type not in models:
+        raise HTTPException(status_code=404, detail=f"Unknown model type: {model_type}")
+    if not await ensure_model(model_type):
+        raise HTTPException(status_code=503, detail=f"{model_type.capitalize()} model not available")
+    end_year = start_year if end_year is None else end_year
+    start_year = max(start_year, MODEL_MIN_YEAR.get(model_type, start_year))
+    if end_year < start_year:
+        raise HTTPException(status_code=400, detail="end_year must not be before start_year")
+
+    async def lines():
+        metrics = BacktestMetrics(model_type, start_year, end_year)
+        async for response in run_backtest(model_type, start_year, end_year):
+            row = metrics.add(response)
+            if details:
+                row["predictions"] = [p.model_dump() for p in response.predictions]
+            yield json.dumps({"type": "race", **row}) + "\n"
+        yield json.dumps({"type": "summary", **metrics.summary()}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 # ==========================================
 # 🧠 PREDICTION LOGIC
 # ==========================================
 
+def build_historical_batch(m: dict, drivers: pd.DataFrame, history: pd.DataFrame, slices: dict):
+    """
+    Stack every driver's history window and current context into model-ready arrays.
+    `history`/`slices` come from load_grid_history. Returns (X_h, X_c, idx) where idx
+    holds the positions in `drivers` that have a full SEQ_LENGTH history; everyone
+    else keeps the grid-position fallback.
+    """
+    windows = [slices.get(d) for d in drivers['driver_code']]
+    idx = [i for i, w in enumerate(windows) if w is not None and w.stop - w.start >= SEQ_LENGTH]
+    n_hist = len(m['hist_features'])
+    n_curr = len(m['curr_features'])
+    if not idx:
+        return np.empty((0, SEQ_LENGTH, n_hist)), np.empty((0, n_curr)), idx
+
+    with stage("features"):
+        # History windows, oldest race first, concatenated driver by driver
+        rows = np.concatenate([np.arange(windows[i].start, windows[i].stop) for i in idx])
+        hist = history.iloc[rows].reset_index(drop=True)
+        final_pos = hist['final_position'].to_numpy()
+        points = hist['final_position'].map(POINTS_MAP).fillna(0).to_numpy(dtype=float)
+        hist['points'] = points
+        hist['position_gain'] = hist['grid_position'].to_numpy() - final_pos
+
+        # Rolling-3 momentum inside each driver's window (min_periods=1)
+        pts = points.reshape(len(idx), SEQ_LENGTH)
+        csum = np.concatenate([np.zeros((len(idx), 1)), np.cumsum(pts, axis=1)], axis=1)
+        t = np.arange(SEQ_LENGTH)
+        lo = np.maximum(0, t - 2)
+        hist['driver_momentum'] = ((csum[:, t + 1] - csum[:, lo]) / (t + 1 - lo)).ravel()
+
+        hist['driver_encoded'] = encode_labels(m['driver_lookup'], hist['driver_code'])
+        hist['team_encoded'] = encode_labels(m['team_lookup'], hist['team_name'])
+
+        # Current-race context for the same drivers
+        curr = drivers.iloc[idx].copy()
+        for c in m['all_features']:
+            if c not in curr:
+                curr[c] = 0
+        curr['driver_encoded'] = encode_labels(m['driver_lookup'], curr['driver_code'])
+        curr['team_encoded'] = encode_labels(m['team_lookup'], curr['team_name'])
+
+    with stage("scale"):
+        hist_scaled = m['scaler'].transform(hist[m['all_features']])
+        curr_scaled = m['scaler'].transform(curr[m['all_features']])
+    X_h = hist_scaled[:, m['hist_idxs']].reshape(len(idx), SEQ_LENGTH, n_hist)
+    X_c = curr_scaled[:, m['curr_idxs']].reshape(len(idx), n_curr)
+
+    return X_h, X_c, idx
+
+def historical_inputs(m: dict, conn, drivers: pd.DataFrame, year: int, round_num: int,
+                      grid_history: Optional[GridHistory] = None):
+    """
+    Model inputs for the grid: feature-store lookup first, live SQL + feature engineering
+    otherwise (from grid_history's bulk-loaded rows when scoring many races)
+    """
+    store = m.get('store')
+    if store is not None:
+        with stage("feature_store"):
+            batch = store.lookup(drivers['driver_code'].tolist(), year, round_num, SEQ_LENGTH)
+        if batch is not None:
+            return batch
+    codes = drivers['driver_code'].tolist()
+    with stage("sql"):
+        if grid_history is not None:
+            history, slices = grid_history.window(conn, codes, year, round_num, SEQ_LENGTH)
+        else:
+            history, slices = load_grid_history(conn, codes, year, round_num, SEQ_LENGTH)
+    return build_historical_batch(m, drivers, history, slices)
+
+def score_historical_grid(m: dict, drivers: pd.DataFrame, conn, year: int, round_num: int) -> np.ndarray:
+    """Score the whole grid with one LSTM forward pass (grid position as fallback)"""
+    scores = drivers['grid_position'].to_numpy(dtype=float).copy()
+    try:
+        X_h, X_c, idx = historical_inputs(m, conn, drivers, year, round_num)
+        if idx:
+            with stage("predict"):
+                scores[idx] = m['model'].predict([X_h, X_c], verbose=0)[:, 0]
+    except Exception as e:
+        print(f"⚠️ Historical batch scoring failed, using grid positions: {e}")
+    return scores
+
 async def run_historical_prediction(year: int, circuit: str) -> PredictionResponse:
     """Run the Historical LSTM model prediction"""
-    conn = sqlite3.connect(DB_NAME)
-    
     try:
-        # Get round number
-        q = f"SELECT round FROM race_data WHERE year={year} AND circuit_name='{circuit}' LIMIT 1"
-        round_num = pd.read_sql(q, conn)['round'].iloc[0]
-        
-        # Get drivers
-        drivers = pd.read_sql(
-            f"SELECT * FROM race_data WHERE year={year} AND round={round_num}", 
-            conn
+        return await db.run(historical_prediction, year, circuit)
+    except Exception as e:
+        return PredictionResponse(
+            success=False, year=year, circuit=circuit, model_type="historical",
+            predictions=[], ai_winner="", actual_winner="", error=str(e)
         )
+
+def load_race_grid(conn, year: int, circuit: str):
+    """Round number and grid rows for a race"""
+    with stage("sql"):
+        round_num = int(read_sql(conn, database.ROUND_QUERY, (year, circuit))['round'].iloc[0])
+        drivers = read_sql(conn, database.GRID_QUERY, (year, round_num))
+    return round_num, drivers
+
+def historical_prediction(conn, year: int, circuit: str) -> PredictionResponse:
+    """Blocking body of run_historical_prediction; runs on the DB thread pool"""
+    try:
+        round_num, drivers = load_race_grid(conn, year, circuit)
     except Exception as e:
-        conn.close()
         return PredictionResponse(
             success=False, year=year, circuit=circuit, model_type="historical",
             predictions=[], ai_winner="", actual_winner="", error=str(e)
         )
     
-    m = models["historical"]
+    scores = score_historical_grid(models["historical"], drivers, conn, year, round_num)
+    with stage("rank"):
+        return historical_response(year, circuit, drivers, scores)
+
+def historical_response(year: int, circuit: str, drivers: pd.DataFrame, scores: np.ndarray) -> PredictionResponse:
+    """Rank a grid by LSTM score (lower is better)"""
     predictions = []
-    
-    for _, row in drivers.iterrows():
-        driver = row['driver_code']
-        
-        # Fetch history
-        h_q = f"""
-            SELECT * FROM race_data WHERE driver_code='{driver}' 
-            AND (year < {year} OR (year = {year} AND round < {round_num}))
-            ORDER BY year DESC, round DESC LIMIT {SEQ_LENGTH}
-        """
-        hist_df = pd.read_sql(h_q, conn).sort_values(['year', 'round'])
-        
-        if len(hist_df) < SEQ_LENGTH:
-            # Not enough history, use grid position as fallback
-            score = row['grid_position']
-        else:
-            # Feature engineering
-            points_map = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
-            hist_df['points'] = hist_df['final_position'].map(points_map).fillna(0)
-            hist_df['position_gain'] = hist_df['grid_position'] - hist_df['final_position']
-            hist_df['driver_momentum'] = hist_df['points'].rolling(3, min_periods=1).mean().fillna(0)
-            
-            # Encode
-            try:
-                hist_df['driver_encoded'] = m['le_driver'].transform(hist_df['driver_code'])
-            except:
-                hist_df['driver_encoded'] = 0
-            try:
-                hist_df['team_encoded'] = m['le_team'].transform(hist_df['team_name'])
-            except:
-                hist_df['team_encoded'] = 0
-            
-            # Prepare inputs
-            try:
-                hist_scaled = m['scaler'].transform(hist_df[m['all_features']])
-                h_idxs = [m['all_features'].index(f) for f in m['hist_features']]
-                X_h = hist_scaled[:, h_idxs].reshape(1, SEQ_LENGTH, len(m['hist_features']))
-                
-                # Current context
-                curr_row = pd.DataFrame([row])
-                for c in m['all_features']:
-                    if c not in curr_row:
-                        curr_row[c] = 0
-                
-                try:
-                    curr_row['driver_encoded'] = m['le_driver'].transform([row['driver_code']])
-                except:
-                    curr_row['driver_encoded'] = 0
-                try:
-                    curr_row['team_encoded'] = m['le_team'].transform([row['team_name']])
-                except:
-                    curr_row['team_encoded'] = 0
-                
-                curr_scaled = m['scaler'].transform(curr_row[m['all_features']])
-                c_idxs = [m['all_features'].index(f) for f in m['curr_features']]
-                X_c = curr_scaled[:, c_idxs].reshape(1, len(m['curr_features']))
-                
-                score = float(m['model'].predict([X_h, X_c], verbose=0)[0][0])
-            except Exception as e:
-                score = row['grid_position']
-        
+    for (_, row), score in zip(drivers.iterrows(), scores):
         predictions.append({
-            'driver': driver,
+            'driver': row['driver_code'],
             'team': row['team_name'],
             'grid_position': int(row['grid_position']),
             'actual_position': int(row['final_position']),
-            'score': score,
+            'score': float(score),
             'team_color': get_team_color(row['team_name'])
         })
     
-    conn.close()
-    
     # Sort by score and assign predictions
     predictions.sort(key=lambda x: x['score'])
     results = []
@@ -386,172 +635,158 @@ async def run_historical_prediction(year: int, circuit: str) -> PredictionRespon
 async def run_telemetry_prediction(year: int, circuit: str) -> PredictionResponse:
     """Run the Telemetry model prediction"""
     m = models["telemetry"]
-    history = m["history"]
     
-    # Find the race in history
-    race_data = history[
-        (history['date'].astype(str).str.contains(str(year))) &
-        (history['circuit_name'].str.contains(circuit, case=False, na=False))
-    ]
+    # Find the race in history (first session for the year/circuit)
+    with stage("telemetry_lookup"):
+        found = m["index"].lookup(year, circuit)
     
-    if race_data.empty:
+    if found is None:
         return PredictionResponse(
             success=False, year=year, circuit=circuit, model_type="telemetry",
             predictions=[], ai_winner="", actual_winner="",
             error="Race not found in telemetry data"
         )
     
-    # Use first session
-    session_id = race_data['session_key'].iloc[0]
-    race_data = race_data[race_data['session_key'] == session_id].copy()
-    
-    features = [
-        'grid_position', 'avg_race_pace', 'pace_consistency', 'top_speed',
-        'team_encoded', 'track_temperature', 'rain_probability', 'driver_encoded'
-    ]
+    race_data, X_scaled = found
     
     try:
-        X_input = race_data[features]
-        X_scaled = m['scaler'].transform(X_input)
-        
-        # FIX: Sharper temperature to differentiate probabilities (was 2.5)
-        temperature = 0.5
-        raw_probs = m['model'].predict_proba(X_scaled)[:, 1]
-        exp_probs = np.exp(raw_probs / temperature)
-        probs = exp_probs / np.sum(exp_probs)
-        
-        race_data['win_prob'] = probs * 100
-        race_data = race_data.sort_values('win_prob', ascending=False).reset_index(drop=True)
-        
-        results = []
-        for i, (_, row) in enumerate(race_data.iterrows()):
-            team_name = row.get('team_name', 'Unknown')
-            results.append(PredictionResult(
-                grid_position=int(row['grid_position']),
-                driver=row['name_acronym'],
-                team=team_name,
-                predicted_position=i + 1,
-                actual_position=int(row.get('final_position', 0)),
-                win_probability=float(row['win_prob']),
-                team_color=get_team_color(team_name)
-            ))
-        
-        ai_winner = results[0].driver if results else ""
-        actual_winner = next((r.driver for r in results if r.actual_position == 1), "Unknown")
-        
-        return PredictionResponse(
-            success=True, year=year, circuit=circuit, model_type="telemetry",
-            predictions=results, ai_winner=ai_winner, actual_winner=actual_winner
-        )
+        if X_scaled is None:
+            with stage("scale"):
+                X_scaled = m['scaler'].transform(race_data[TELEMETRY_FEATURES])
+        with stage("predict"):
+            raw_probs = m['model'].predict_proba(X_scaled)[:, 1]
+        with stage("rank"):
+            return telemetry_response(year, circuit, race_data, raw_probs)
     except Exception as e:
         return PredictionResponse(
             success=False, year=year, circuit=circuit, model_type="telemetry",
             predictions=[], ai_winner="", actual_winner="", error=str(e)
         )
 
+def sharpen_probabilities(raw_probs: np.ndarray) -> np.ndarray:
+    """Softmax the classifier's per-driver win probabilities into a race-wide distribution"""
+    # FIX: Sharper temperature to differentiate probabilities (was 2.5)
+    temperature = 0.5
+    exp_probs = np.exp(raw_probs / temperature)
+    return exp_probs / np.sum(exp_probs)
+
+def telemetry_response(year: int, circuit: str, race_data: pd.DataFrame, raw_probs: np.ndarray) -> PredictionResponse:
+    """Rank a telemetry session by win probability"""
+    race_data = race_data.copy()
+    race_data['win_prob'] = sharpen_probabilities(raw_probs) * 100
+    race_data = race_data.sort_values('win_prob', ascending=False).reset_index(drop=True)
+    
+    # Column-wise rather than iterrows (which boxes every row, and every categorical value)
+    n = len(race_data)
+    teams = race_data['team_name'].tolist() if 'team_name' in race_data else ['Unknown'] * n
+    actual = race_data['final_position'].tolist() if 'final_position' in race_data else [0] * n
+    results = [
+        PredictionResult(
+            grid_position=int(grid),
+            driver=driver,
+            team=team_name,
+            predicted_position=i + 1,
+            actual_position=int(pos),
+            win_probability=float(prob),
+            team_color=get_team_color(team_name)
+        )
+        for i, (grid, driver, team_name, pos, prob) in enumerate(zip(
+            race_data['grid_position'].tolist(), race_data['name_acronym'].tolist(),
+            teams, actual, race_data['win_prob'].tolist()
+        ))
+    ]
+    
+    ai_winner = results[0].driver if results else ""
+    actual_winner = next((r.driver for r in results if r.actual_position == 1), "Unknown")
+    
+    return PredictionResponse(
+        success=True, year=year, circuit=circuit, model_type="telemetry",
+        predictions=results, ai_winner=ai_winner, actual_winner=actual_winner
+    )
+
 async def run_hybrid_prediction(year: int, circuit: str) -> PredictionResponse:
     """Run the Hybrid model combining LSTM + Telemetry"""
-    conn = sqlite3.connect(DB_NAME)
-    
     try:
-        q = f"SELECT round FROM race_data WHERE year={year} AND circuit_name='{circuit}' LIMIT 1"
-        round_num = pd.read_sql(q, conn)['round'].iloc[0]
-        drivers = pd.read_sql(
-            f"SELECT * FROM race_data WHERE year={year} AND round={round_num}",
-            conn
+        return await db.run(hybrid_prediction, year, circuit)
+    except Exception as e:
+        return PredictionResponse(
+            success=False, year=year, circuit=circuit, model_type="hybrid",
+            predictions=[], ai_winner="", actual_winner="", error=str(e)
         )
+
+def hybrid_prediction(conn, year: int, circuit: str) -> PredictionResponse:
+    """Blocking body of run_hybrid_prediction; runs on the DB thread pool"""
+    try:
+        _, drivers = load_race_grid(conn, year, circuit)
     except Exception as e:
-        conn.close()
         return PredictionResponse(
             success=False, year=year, circuit=circuit, model_type="hybrid",
             predictions=[], ai_winner="", actual_winner="", error=str(e)
         )
     
-    predictions_data = []
+    # Source A: Historical placeholder - grid position (the LSTM isn't blended in yet)
+    score_a = drivers['grid_position'].to_numpy(dtype=float)
     
-    # Get Historical model scores
-    for _, row in drivers.iterrows():
-        score_a = row['grid_position']  # Fallback
-        
-        if models["historical"]["loaded"]:
-            # Would run historical prediction here
-            # Using simplified version for this example
-            pass
-        
-        predictions_data.append({
-            'driver': row['driver_code'],
-            'team': row['team_name'],
-            'grid_position': int(row['grid_position']),
-            'actual_position': int(row['final_position']),
-            'score_a': score_a,
-            'prob_b': 0.0,
-            'team_color': get_team_color(row['team_name'])
-        })
-    
-    conn.close()
-    df = pd.DataFrame(predictions_data)
-    
-    # Get Telemetry probabilities if available (2023+)
+    # Source B: Telemetry win probabilities if available (2023+)
+    telemetry = None
     if models["telemetry"]["loaded"] and year >= 2023:
         m = models["telemetry"]
-        history = m["history"]
+        with stage("telemetry_lookup"):
+            found = m["index"].lookup(year, circuit)
         
-        race_b = history[
-            (history['date'].astype(str).str.contains(str(year))) &
-            (history['circuit_name'].str.contains(circuit, case=False, na=False))
-        ]
-        
-        if not race_b.empty:
-            sid = race_b['session_key'].iloc[0]
-            race_b_sess = race_b[race_b['session_key'] == sid].copy()
-            
-            features = [
-                'grid_position', 'avg_race_pace', 'pace_consistency', 'top_speed',
-                'team_encoded', 'track_temperature', 'rain_probability', 'driver_encoded'
-            ]
+        if found is not None:
+            race_b_sess, X_b = found
             
             try:
-                X_b = m['scaler'].transform(race_b_sess[features])
-                raw_probs = m['model'].predict_proba(X_b)[:, 1]
-                # FIX: Match lower temperature here too
-                temperature = 0.5 
-                exp_probs = np.exp(raw_probs / temperature)
-                probs = exp_probs / np.sum(exp_probs)
-                
-                prob_map = dict(zip(race_b_sess['name_acronym'], probs))
-                df['prob_b'] = df['driver'].map(prob_map).fillna(0.0)
+                if X_b is None:
+                    with stage("scale"):
+                        X_b = m['scaler'].transform(race_b_sess[TELEMETRY_FEATURES])
+                with stage("predict"):
+                    telemetry = (race_b_sess, m['model'].predict_proba(X_b)[:, 1])
             except:
                 pass
     
-    # Hybrid ranking logic
-    df['rank_a'] = df['score_a'].rank(method='min')
-    df['rank_b'] = df['prob_b'].rank(ascending=False, method='min')
+    with stage("rank"):
+        return hybrid_response(year, circuit, drivers, score_a, telemetry)
+
+def hybrid_response(year: int, circuit: str, drivers: pd.DataFrame, score_a: np.ndarray,
+                    telemetry=None) -> PredictionResponse:
+    """
+    Blend LSTM scores with telemetry win probabilities into one ranking.
+    `telemetry` is (session rows, raw predict_proba) for the race, or None.
+    """
+    codes = drivers['driver_code'].to_numpy()
+    sources = [RankingSource("historical", score_a, weight=HYBRID_WEIGHTS["historical"])]
     
-    def get_consensus(row):
-        if row['prob_b'] > 0:
-            return (row['rank_a'] + row['rank_b']) / 2
-        return row['rank_a']
+    if telemetry is not None:
+        race_b_sess, raw_probs = telemetry
+        # FIX: Match lower temperature here too
+        probs = sharpen_probabilities(raw_probs)
+        prob_map = dict(zip(race_b_sess['name_acronym'], probs))
+        prob_b = np.array([prob_map.get(d, 0.0) for d in codes], dtype=float)
+        sources.append(RankingSource(
+            "telemetry", prob_b, higher_is_better=True,
+            weight=HYBRID_WEIGHTS["telemetry"], mask=prob_b > 0, probabilities=prob_b
+        ))
     
-    df['consensus'] = df.apply(get_consensus, axis=1)
-    df = df.sort_values('consensus').reset_index(drop=True)
+    # Hybrid ranking logic: weighted consensus of every source's rank
+    ranking = consensus_ranking(sources)
     
-    results = []
-    for i, row in df.iterrows():
-        # FIX: Ensure probability is never 0 by adding a fallback estimation
-        if row['prob_b'] > 0:
-            final_prob = float(row['prob_b'] * 100)
-        else:
-            final_prob = max(0, 100 - (i * 5)) # Fallback estimation based on rank
-            
-        results.append(PredictionResult(
-            grid_position=row['grid_position'],
-            driver=row['driver'],
-            team=row['team'],
+    teams = drivers['team_name'].to_numpy()
+    grid = drivers['grid_position'].to_numpy(dtype=int)
+    actual = drivers['final_position'].to_numpy(dtype=int)
+    results = [
+        PredictionResult(
+            grid_position=int(grid[j]),
+            driver=codes[j],
+            team=teams[j],
             predicted_position=i + 1,
-            actual_position=row['actual_position'],
-            win_probability=final_prob,
-            team_color=row['team_color']
-        ))
+            actual_position=int(actual[j]),
+            win_probability=float(ranking.win_probability[i]),
+            team_color=get_team_color(teams[j])
+        )
+        for i, j in enumerate(ranking.order)
+    ]
     
     ai_winner = results[0].driver if results else ""
     actual_winner = next((r.driver for r in results if r.actual_position == 1), "Unknown")
@@ -561,6 +796,113 @@ async def run_hybrid_prediction(year: int, circuit: str) -> PredictionResponse:
         predictions=results, ai_winner=ai_winner, actual_winner=actual_winner
     )
 
+# ==========================================
+# 📈 BACKTESTING (many races per model call)
+# ==========================================
+class BacktestRace(NamedTuple):
+    year: int
+    round: int
+    circuit: str
+    drivers: pd.DataFrame
+
+def load_backtest_races(conn, first_year: int, last_year: int) -> List[BacktestRace]:
+    """Every race's grid in a year range, from one query"""
+    with stage("sql"):
+        grids = read_sql(conn, database.SEASON_GRIDS_QUERY, (first_year, last_year))
+    return [
+        BacktestRace(int(year), int(round_num), str(rows['circuit_name'].iloc[0]), rows.reset_index(drop=True))
+        for (year, round_num), rows in grids.groupby(['year', 'round'], sort=True)
+    ]
+
+def score_historical_grids(m: dict, races: List[BacktestRace], conn, grid_history: GridHistory) -> List[np.ndarray]:
+    """score_historical_grid for many races with a single LSTM forward pass"""
+    scores = [race.drivers['grid_position'].to_numpy(dtype=float).copy() for race in races]
+    batches = []
+    for k, race in enumerate(races):
+        try:
+            X_h, X_c, idx = historical_inputs(m, conn, race.drivers, race.year, race.round, grid_history)
+        except Exception as e:
+            print(f"⚠️ Historical inputs failed for {race.year} {race.circuit}, using grid positions: {e}")
+            continue
+        if idx:
+            batches.append((k, X_h, X_c, idx))
+    if not batches:
+        return scores
+    try:
+        with stage("predict"):
+            out = m['model'].predict(
+                [np.concatenate([b[1] for b in batches]), np.concatenate([b[2] for b in batches])], verbose=0
+            )[:, 0]
+    except Exception as e:
+        print(f"⚠️ Historical batch scoring failed, using grid positions: {e}")
+        return scores
+    offset = 0
+    for k, _, _, idx in batches:
+        scores[k][idx] = out[offset:offset + len(idx)]
+        offset += len(idx)
+    return scores
+
+def telemetry_probabilities(m: dict, races: List[BacktestRace]) -> list:
+    """(session rows, raw predict_proba) per race, or None where it isn't in the telemetry history"""
+    found = [m["index"].lookup(race.year, race.circuit) if race.year >= 2023 else None for race in races]
+    inputs = []
+    for k, f in enumerate(found):
+        if f is None:
+            continue
+        rows, X = f
+        try:
+            inputs.append((k, X if X is not None else m['scaler'].transform(rows[TELEMETRY_FEATURES])))
+        except Exception as e:
+            print(f"⚠️ Telemetry features failed for {races[k].year} {races[k].circuit}: {e}")
+    out = [None] * len(races)
+    if inputs:
+        try:
+            with stage("predict"):
+                raw = m['model'].predict_proba(np.concatenate([X for _, X in inputs]))[:, 1]
+        except Exception as e:
+            print(f"⚠️ Telemetry batch scoring failed: {e}")
+            return out
+        offset = 0
+        for k, X in inputs:
+            out[k] = (found[k][0], raw[offset:offset + len(X)])
+            offset += len(X)
+    return out
+
+def backtest_batch(conn, model_type: str, races: List[BacktestRace], grid_history: GridHistory) -> List[PredictionResponse]:
+    """PredictionResponses for a batch of races, each model run once over all of their grids"""
+    historical = models["historical"]["loaded"] and model_type == "historical"
+    telemetry = models["telemetry"]["loaded"] and model_type in ("telemetry", "hybrid")
+    scores = score_historical_grids(models["historical"], races, conn, grid_history) if historical else None
+    probs = telemetry_probabilities(models["telemetry"], races) if telemetry else [None] * len(races)
+
+    responses = []
+    for k, race in enumerate(races):
+        if model_type == "historical":
+            responses.append(historical_response(race.year, race.circuit, race.drivers, scores[k]))
+        elif model_type == "telemetry":
+            if probs[k] is None:
+                responses.append(PredictionResponse(
+                    success=False, year=race.year, circuit=race.circuit, model_type="telemetry",
+                    predictions=[], ai_winner="", actual_winner="",
+                    error="Race not found in telemetry data"
+                ))
+            else:
+                responses.append(telemetry_response(race.year, race.circuit, *probs[k]))
+        else:
+            score_a = race.drivers['grid_position'].to_numpy(dtype=float)
+            responses.append(hybrid_response(race.year, race.circuit, race.drivers, score_a, probs[k]))
+    return responses
+
+async def run_backtest(model_type: str, first_year: int, last_year: int, batch_races: int = BACKTEST_BATCH_RACES):
+    """Yield a PredictionResponse per race in the range, batch_races races per model call"""
+    first_year = max(first_year, MODEL_MIN_YEAR.get(model_type, first_year))
+    races = await db.run(load_backtest_races, first_year, last_year)
+    # Live-feature fallback for races the feature store doesn't cover: one history query for the whole run
+    grid_history = GridHistory(last_year)
+    for i in range(0, len(races), batch_races):
+        for response in await db.run(backtest_batch, model_type, races[i:i + batch_races], grid_history):
+            yield response
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
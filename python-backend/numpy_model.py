@@ -0,0 +1,304 @@
+"""
+NumPy Model Engine - serve the Historical LSTM without TensorFlow
+
+The Historical model is a small two-input Keras network (LSTM over the history
+window, dense layers over the current-race context). Its weights and layer
+graph are exported once to f1_hybrid_model.npz, and NumpyModel runs the same
+forward pass in vectorized NumPy: every layer processes the whole batch at
+once, and the LSTM projects all timesteps' inputs in one matmul, leaving only
+the recurrent matmul inside the (SEQ_LENGTH-step) loop.
+
+Export refuses to write weights that don't reproduce Keras' predictions within
+PARITY_TOLERANCE. The export is stamped with a content hash of the .keras file,
+and main.py re-exports automatically when TensorFlow is installed and the model
+changed.
+
+Run from the python-backend folder (export and check need TensorFlow):
+python numpy_model.py export
+python numpy_model.py check --samples 2048
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# ==========================================
+# ⚙️ CONFIGURATION
+# ==========================================
+GRAPH_FORMAT = 1
+GRAPH_KEY = "__graph__"
+PARITY_TOLERANCE = 1e-4   # max abs difference from Keras' output
+PARITY_SAMPLES = 512
+
+def model_hash(model_file: str) -> str:
+    """Content hash of the .keras file the weights were exported from"""
+    h = hashlib.sha256()
+    with open(model_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+# ==========================================
+# 🧮 LAYERS
+# ==========================================
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+def _elu(x):
+    return np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+    "softplus": lambda x: np.logaddexp(x, 0),
+    "elu": _elu,
+    "selu": lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0))),
+    "swish": lambda x: x * _sigmoid(x),
+    "silu": lambda x: x * _sigmoid(x),
+}
+
+def _dense(spec, w, x):
+    y = x @ w[0]
+    if spec["use_bias"]:
+        y = y + w[1]
+    return ACTIVATIONS[spec["activation"]](y)
+
+def _lstm(spec, w, x):
+    """Keras LSTM (gate order i, f, c, o) over a (batch, time, features) input"""
+    kernel, recurrent = w[0], w[1]
+    units = recurrent.shape[0]
+    act = ACTIVATIONS[spec["activation"]]
+    rec_act = ACTIVATIONS[spec["recurrent_activation"]]
+    if spec["go_backwards"]:
+        x = x[:, ::-1]
+    # Input projections for every timestep in one matmul
+    z_in = x @ kernel
+    if spec["use_bias"]:
+        z_in = z_in + w[2]
+    batch, steps = x.shape[0], x.shape[1]
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros((batch, units), dtype=x.dtype)
+    outputs = []
+    for t in range(steps):
+        z = z_in[:, t] + h @ recurrent
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = rec_act(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * act(c)
+        if spec["return_sequences"]:
+            outputs.append(h)
+    return np.stack(outputs, axis=1) if spec["return_sequences"] else h
+
+def _normalize(x, mean, var, gamma, beta, epsilon):
+    y = (x - mean) / np.sqrt(var + epsilon)
+    if gamma is not None:
+        y = y * gamma
+    if beta is not None:
+        y = y + beta
+    return y
+
+def _batch_norm(spec, w, x):
+    w = list(w)
+    gamma = w.pop(0) if spec["scale"] else None
+    beta = w.pop(0) if spec["center"] else None
+    return _normalize(x, w[0], w[1], gamma, beta, spec["epsilon"])
+
+def _layer_norm(spec, w, x):
+    w = list(w)
+    gamma = w.pop(0) if spec["scale"] else None
+    beta = w.pop(0) if spec["center"] else None
+    return _normalize(x, x.mean(axis=-1, keepdims=True), x.var(axis=-1, keepdims=True), gamma, beta, spec["epsilon"])
+
+# Layer type -> forward(spec, weights, *inputs); dropout/noise layers are identities at inference
+LAYERS = {
+    "Dense": _dense,
+    "LSTM": _lstm,
+    "Activation": lambda spec, w, x: ACTIVATIONS[spec["activation"]](x),
+    "BatchNormalization": _batch_norm,
+    "LayerNormalization": _layer_norm,
+    "Concatenate": lambda spec, w, *xs: np.concatenate(xs, axis=spec["axis"]),
+    "Add": lambda spec, w, *xs: sum(xs[1:], xs[0]),
+    "Flatten": lambda spec, w, x: x.reshape(len(x), -1),
+    "Dropout": lambda spec, w, x: x,
+    "SpatialDropout1D": lambda spec, w, x: x,
+    "GaussianNoise": lambda spec, w, x: x,
+    "GaussianDropout": lambda spec, w, x: x,
+}
+
+# ==========================================
+# 🏎️ RUNTIME MODEL
+# ==========================================
+class NumpyModel:
+    """An exported Keras functional model, runnable with NumPy only"""
+
+    def __init__(self, graph: dict, weights: Dict[str, np.ndarray]):
+        self.graph = graph
+        self.layers = graph["layers"]
+        self.weights = {
+            layer["name"]: [np.asarray(weights[f"{layer['name']}:{i}"], dtype=np.float32)
+                            for i in range(layer["weights"])]
+            for layer in self.layers
+        }
+
+    @classmethod
+    def load(cls, weights_file: str) -> "NumpyModel":
+        with np.load(weights_file) as data:
+            graph = json.loads(str(data[GRAPH_KEY]))
+            weights = {k: data[k] for k in data.files if k != GRAPH_KEY}
+        return cls(graph, weights)
+
+    @staticmethod
+    def source_hash(weights_file: str) -> Optional[str]:
+        """Hash of the .keras file an export came from, or None if there's no readable export"""
+        try:
+            with np.load(weights_file) as data:
+                return json.loads(str(data[GRAPH_KEY])).get("source")
+        except Exception:
+            return None
+
+    def predict(self, inputs: List[np.ndarray], verbose: int = 0) -> np.ndarray:
+        """Same call and output as keras Model.predict for this model's inputs"""
+        values = {name: np.asarray(x, dtype=np.float32) for name, x in zip(self.graph["inputs"], inputs)}
+        for layer in self.layers:
+            if layer["type"] == "InputLayer":
+                continue
+            args = [values[name] for name in layer["inbound"]]
+            values[layer["name"]] = LAYERS[layer["type"]](layer, self.weights[layer["name"]], *args)
+        outputs = [values[name] for name in self.graph["outputs"]]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+# ==========================================
+# 📤 EXPORT (needs TensorFlow)
+# ==========================================
+def _layer_spec(layer) -> dict:
+    """Everything the forward pass needs to know about a Keras layer"""
+    kind = type(layer).__name__
+    if kind not in LAYERS and kind != "InputLayer":
+        raise ValueError(f"Layer {layer.name} ({kind}) isn't supported by the NumPy engine")
+    config = layer.get_config()
+    spec = {"name": layer.name, "type": kind, "weights": len(layer.get_weights()), "inbound": []}
+    if kind != "InputLayer":
+        inputs = layer.input if isinstance(layer.input, (list, tuple)) else [layer.input]
+        spec["inbound"] = [t._keras_history[0].name for t in inputs]
+    if kind == "Dense":
+        spec.update(activation=config["activation"], use_bias=config["use_bias"])
+    elif kind == "LSTM":
+        if config.get("stateful") or config.get("return_state"):
+            raise ValueError(f"Layer {layer.name}: stateful LSTMs aren't supported by the NumPy engine")
+        spec.update(activation=config["activation"], recurrent_activation=config["recurrent_activation"],
+                    use_bias=config["use_bias"], return_sequences=config["return_sequences"],
+                    go_backwards=config.get("go_backwards", False))
+    elif kind == "Activation":
+        spec.update(activation=config["activation"])
+    elif kind in ("BatchNormalization", "LayerNormalization"):
+        # The forward pass normalizes over the feature (last) axis only
+        axes = config["axis"] if isinstance(config["axis"], (list, tuple)) else [config["axis"]]
+        rank = len(layer.input.shape)
+        if [axis % rank for axis in axes] != [rank - 1]:
+            raise ValueError(f"Layer {layer.name}: normalization over axis {config['axis']} isn't supported "
+                             "by the NumPy engine (only the last axis)")
+        spec.update(epsilon=config["epsilon"], center=config["center"], scale=config["scale"])
+    elif kind == "Concatenate":
+        spec.update(axis=config["axis"])
+    for key in ("activation", "recurrent_activation"):
+        if key in spec and spec[key] not in ACTIVATIONS:
+            raise ValueError(f"Layer {layer.name}: activation '{spec[key]}' isn't supported by the NumPy engine")
+    return spec
+
+def load_keras_model(model_file: str):
+    from tensorflow.keras.models import load_model
+    return load_model(model_file, compile=False)
+
+def parity_inputs(model, samples: int = PARITY_SAMPLES, feature_store_dir: Optional[str] = None) -> List[np.ndarray]:
+    """
+    Inputs to compare Keras and NumPy on: real (history, context) rows from the
+    feature store when one matches the model's shapes, plus standard-normal
+    inputs (the features are standard-scaled).
+    """
+    rng = np.random.default_rng(0)
+    shapes = [tuple(int(d) for d in t.shape[1:]) for t in model.inputs]
+    inputs = [rng.standard_normal((samples,) + shape).astype(np.float32) for shape in shapes]
+    if feature_store_dir and os.path.exists(os.path.join(feature_store_dir, "hist.npy")):
+        hist = np.load(os.path.join(feature_store_dir, "hist.npy"), mmap_mode='r')
+        curr = np.load(os.path.join(feature_store_dir, "curr.npy"), mmap_mode='r')
+        seq_length = shapes[0][0]
+        rows = rng.integers(seq_length, len(curr), size=samples) if len(curr) > seq_length else []
+        if len(rows) and shapes == [(seq_length, hist.shape[2]), (curr.shape[1],)]:
+            # Windows end at each sampled row, last momentum variant (as FeatureStore.lookup mostly picks)
+            windows = rows[:, None] - seq_length + np.arange(seq_length)[None, :]
+            real = [np.asarray(hist[windows, -1], dtype=np.float32), np.asarray(curr[rows], dtype=np.float32)]
+            inputs = [np.concatenate([r, x]) for r, x in zip(real, inputs)]
+    return inputs
+
+def parity_error(model, numpy_model: NumpyModel, inputs: List[np.ndarray]) -> float:
+    expected = np.asarray(model.predict(inputs, verbose=0))
+    actual = np.asarray(numpy_model.predict(inputs))
+    return float(np.abs(expected - actual).max())
+
+def export_keras_model(model_file: str, weights_file: str, feature_store_dir: Optional[str] = None) -> dict:
+    """Export a .keras model's graph and weights for NumpyModel, after checking parity"""
+    model = load_keras_model(model_file)
+    specs = [_layer_spec(layer) for layer in model.layers]
+    graph = {
+        "format": GRAPH_FORMAT,
+        "source": model_hash(model_file),
+        "inputs": [t._keras_history[0].name for t in model.inputs],
+        "outputs": [t._keras_history[0].name for t in model.outputs],
+        "layers": specs,
+    }
+    weights = {
+        f"{layer.name}:{i}": np.asarray(w, dtype=np.float32)
+        for layer in model.layers for i, w in enumerate(layer.get_weights())
+    }
+    error = parity_error(model, NumpyModel(graph, weights), parity_inputs(model, feature_store_dir=feature_store_dir))
+    if error > PARITY_TOLERANCE:
+        raise ValueError(f"NumPy forward pass differs from Keras by {error:.2e} (tolerance {PARITY_TOLERANCE:.0e})")
+    graph["parity_error"] = error
+
+    # Write next to the target and swap in, so a running server never reads half a file
+    tmp = f"{weights_file}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(tmp, **weights, **{GRAPH_KEY: np.array(json.dumps(graph))})
+    os.replace(tmp, weights_file)
+    return graph
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("export", "Export the .keras model for NumPy serving"),
+                            ("check", "Compare an existing export with Keras")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--model", default="f1_hybrid_model.keras")
+        cmd.add_argument("--out", default="f1_hybrid_model.npz")
+        cmd.add_argument("--feature-store", default="feature_store")
+    sub.choices["check"].add_argument("--samples", type=int, default=PARITY_SAMPLES)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        graph = export_keras_model(args.model, args.out, args.feature_store)
+        print(f"✅ Exported {len(graph['layers'])} layers to {args.out} (max error vs Keras {graph['parity_error']:.2e})")
+    else:
+        model = load_keras_model(args.model)
+        numpy_model = NumpyModel.load(args.out)
+        error = parity_error(model, numpy_model, parity_inputs(model, args.samples, args.feature_store))
+        stale = NumpyModel.source_hash(args.out) != model_hash(args.model)
+        print(f"{'✅' if error <= PARITY_TOLERANCE else '❌'} Max error vs Keras: {error:.2e}"
+              f"{' (export is from a different .keras file)' if stale else ''}")
+        raise SystemExit(0 if error <= PARITY_TOLERANCE else 1)
@@ -0,0 +1,131 @@
+"""
+F1 Prediction Precompute - warm every season's predictions into predictions.db
+
+Walks every (year, circuit) in race_data, runs the Historical, Telemetry and
+Hybrid models across a process pool, and stores each PredictionResponse so the
+API can serve completed races without any model compute. Races missing from
+the store (or stored for older model artifacts) fall through to live inference.
+
+--db and --out are handed to main.py as F1_DB and PREDICTION_STORE, so the
+workers predict from the database whose races are listed, and a server started
+with the same PREDICTION_STORE serves what was written.
+
+Run from the python-backend folder:
+python precompute.py                      # every race, every model
+python precompute.py --years 2024 2025 --models historical hybrid --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from catalog import CATALOG_QUERY, MODEL_MIN_YEAR
+from prediction_cache import PredictionStore
+
+MODEL_TYPES = ("historical", "telemetry", "hybrid")
+DB_NAME = os.getenv("F1_DB", "f1_data.db")
+PREDICTION_STORE_FILE = os.getenv("PREDICTION_STORE", "predictions.db")
+
+def use_paths(db_name: str, store_file: str):
+    """Point main.py at this run's database and prediction store (before it's imported)"""
+    os.environ["F1_DB"] = db_name
+    os.environ["PREDICTION_STORE"] = store_file
+
+# ==========================================
+# 👷 WORKER PROCESS
+# ==========================================
+_existing = set()
+
+def _init_worker(existing: set, db_name: str, store_file: str):
+    """Load every model once per worker process, from the artifacts the parent prepared"""
+    global _existing
+    _existing = existing
+    use_paths(db_name, store_file)
+    import main
+    main.MODEL_LOADING = "eager"
+    main.BUILD_ARTIFACTS = False
+    asyncio.run(main.startup_event())
+
+def _predict_race(year: int, circuit: str, model_types) -> list:
+    """Run the requested models for one race; returns store rows for the successful ones"""
+    import main
+    runners = {
+        "historical": main.run_historical_prediction,
+        "telemetry": main.run_telemetry_prediction,
+        "hybrid": main.run_hybrid_prediction,
+    }
+
+    async def run_all():
+        rows = []
+        for model_type in model_types:
+            if not main.models[model_type]["loaded"]:
+                continue
+            if year < MODEL_MIN_YEAR.get(model_type, 0):
+                continue
+            key = (model_type, year, circuit, main.model_fingerprint(model_type))
+            if key in _existing:
+                continue
+            response = await runners[model_type](year, circuit)
+            if response.success:
+                rows.append(key + (response.model_dump_json().encode(),))
+        return rows
+
+    return asyncio.run(run_all())
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+def list_races(db_name: str, years=None):
+    conn = sqlite3.connect(db_name)
+    races = [(int(y), c) for y, c, _ in conn.execute(CATALOG_QUERY)]
+    conn.close()
+    if years:
+        wanted = set(years)
+        races = [r for r in races if r[0] in wanted]
+    return races
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--out", default=PREDICTION_STORE_FILE)
+    parser.add_argument("--years", type=int, nargs="*")
+    parser.add_argument("--models", nargs="*", choices=MODEL_TYPES, default=list(MODEL_TYPES))
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--force", action="store_true", help="Recompute races already in the store")
+    args = parser.parse_args()
+
+    races = list_races(args.db, args.years)
+    existing = set() if args.force else PredictionStore.existing_keys(args.out)
+    print(f"🏁 Precomputing {len(races)} races x {len(args.models)} models on {args.workers} workers")
+
+    # Export and build stale artifacts once, here, so the workers don't all rebuild them at once
+    use_paths(args.db, args.out)
+    import main
+    main.prepare_artifacts()
+
+    started = time.perf_counter()
+    written = 0
+    # spawn, not fork: TensorFlow doesn't survive being forked after import
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(args.workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(existing, args.db, args.out)) as pool:
+        futures = {pool.submit(_predict_race, y, c, args.models): (y, c) for y, c in races}
+        for future in as_completed(futures):
+            year, circuit = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"❌ {year} {circuit}: {e}")
+                continue
+            if rows:
+                written += PredictionStore.write(args.out, rows)
+            print(f"✅ {year} {circuit}: {len(rows)} new predictions")
+
+    print(f"💾 {written} predictions written to {args.out} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main_cli()
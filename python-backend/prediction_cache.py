@@ -0,0 +1,111 @@
+"""
+Prediction Result Cache - LRU + TTL cache in front of the prediction runners
+
+Predictions for a completed race are deterministic for a given set of model
+artifacts, so results are keyed on (model type, year, circuit, artifact
+fingerprint) in an AsyncCache (see async_cache), where concurrent requests for
+the same key share one computation.
+Whole seasons can also be precomputed to disk (see precompute.py) and served
+from PredictionStore without touching the models.
+"""
+
+import hashlib
+import os
+import sqlite3
+import zlib
+from typing import Dict, Optional
+
+from async_cache import AsyncCache
+
+def _artifact_files(path: str):
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    else:
+        yield path
+
+def artifact_fingerprint(*paths: str) -> str:
+    """Cheap fingerprint of model artifacts (files or folders) from their size and mtime"""
+    h = hashlib.sha1()
+    for path in paths:
+        for full in _artifact_files(path):
+            try:
+                st = os.stat(full)
+                h.update(f"{full}:{st.st_size}:{st.st_mtime_ns}".encode())
+            except FileNotFoundError:
+                h.update(f"{full}:missing".encode())
+    return h.hexdigest()[:12]
+
+# Predictions use the generic async cache; the name is kept for main.py and the benchmarks
+PredictionCache = AsyncCache
+
+# ==========================================
+# 💾 ON-DISK PRECOMPUTED STORE
+# ==========================================
+STORE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS predictions (
+        model_type TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        circuit TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        payload BLOB NOT NULL,
+        PRIMARY KEY (model_type, year, circuit, fingerprint)
+    )
+"""
+
+class PredictionStore:
+    """
+    Precomputed PredictionResponse payloads (zlib-compressed JSON in SQLite),
+    written by precompute.py and held in memory by the API for instant lookups.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._blobs: Dict[tuple, bytes] = {}
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def load(self) -> int:
+        """Read every stored payload into memory; returns how many were loaded"""
+        self._blobs = {}
+        if not os.path.exists(self.path):
+            return 0
+        conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT model_type, year, circuit, fingerprint, payload FROM predictions"
+            ).fetchall()
+        finally:
+            conn.close()
+        self._blobs = {(m, y, c, f): p for m, y, c, f, p in rows}
+        return len(self._blobs)
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        """Decompressed JSON payload for (model_type, year, circuit, fingerprint), or None"""
+        blob = self._blobs.get(key)
+        return zlib.decompress(blob) if blob is not None else None
+
+    @staticmethod
+    def existing_keys(path: str) -> set:
+        if not os.path.exists(path):
+            return set()
+        conn = sqlite3.connect(path)
+        conn.execute(STORE_SCHEMA)
+        keys = set(conn.execute("SELECT model_type, year, circuit, fingerprint FROM predictions"))
+        conn.close()
+        return keys
+
+    @staticmethod
+    def write(path: str, rows) -> int:
+        """Upsert (model_type, year, circuit, fingerprint, json_bytes) rows"""
+        conn = sqlite3.connect(path)
+        conn.execute(STORE_SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                [(m, y, c, f, zlib.compress(p, 9)) for m, y, c, f, p in rows]
+            )
+        conn.close()
+        return len(rows)
@@ -0,0 +1,119 @@
+"""
+Race Moment Detection - key events found in a processed replay's arrays
+
+Scans the per-frame classification (position, interval) and speed channels
+for the moments worth commentating: the start, lead changes, a chaser closing
+to within striking distance of the leader, and pit stops. Detection is
+vectorized over the (drivers, frames) arrays; Python only touches the
+handful of candidate events.
+"""
+
+from typing import List
+
+import numpy as np
+
+LEAD_HOLD_SECONDS = 5.0      # a new leader must stay ahead this long to count
+CLOSE_GAP_SECONDS = 1.0      # P2 within this of the leader is "closing"
+CLOSE_COOLDOWN_SECONDS = 120.0
+PIT_SPEED_KMH = 90           # pit lane limits are 60-80 km/h
+PIT_MIN_SECONDS = 8.0        # slow corners last a few seconds, stops longer
+PIT_MAX_SECONDS = 120.0
+PIT_IGNORE_START_SECONDS = 60.0
+NEUTRALISED_FRACTION = 0.5   # half the field slow at once: safety car / red flag, not a stop
+MAX_MOMENTS = 80
+
+def _runs(mask: np.ndarray):
+    """(row, start, end) of every run of True along axis 1 (end exclusive)"""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+def _moment(kind: str, frame: int, timeline: np.ndarray, driver: str, other: str = None, gap: float = None) -> dict:
+    return {
+        "time": round(float(timeline[frame]), 1),
+        "frame": int(frame),
+        "type": kind,
+        "driver": driver,
+        "other": other,
+        "gap": None if gap is None or np.isnan(gap) else round(float(gap), 2),
+    }
+
+def detect_moments(replay: dict) -> List[dict]:
+    """Key moments of a replay, in race-time order (see module docstring)"""
+    timeline = np.asarray(replay["timeline"], dtype=np.float64)
+    drivers = list(replay["drivers"].values())
+    if len(timeline) < 2 or not drivers:
+        return []
+    names = [d["name"] for d in drivers]
+    interval = float(timeline[1] - timeline[0])
+    moments = []
+
+    if all("position" in d for d in drivers):
+        position = np.stack([np.asarray(d["position"]) for d in drivers])
+        gaps = np.stack([np.asarray(d["interval"], dtype=np.float64) for d in drivers])
+        classified = (position == 1).any(axis=0)
+        leader = np.where(classified, (position == 1).argmax(axis=0), -1)
+        chaser = (position == 2).argmax(axis=0)
+        has_chaser = (position == 2).any(axis=0)
+
+        # Start: the first classified frame
+        if classified.any():
+            f = int(classified.argmax())
+            moments.append(_moment("start", f, timeline, names[leader[f]],
+                                   names[chaser[f]] if has_chaser[f] else None))
+
+        # Lead changes: leader runs long enough to count, compared with the previous such run
+        hold = max(1, int(round(LEAD_HOLD_SECONDS / interval)))
+        change = np.flatnonzero(np.diff(leader) != 0) + 1
+        run_start = np.concatenate(([0], change))
+        run_end = np.concatenate((change, [len(leader)]))
+        keep = (run_end - run_start >= hold) & (leader[run_start] >= 0)
+        previous = -1
+        lead_changes = []
+        for s in run_start[keep]:
+            if previous >= 0 and leader[s] != previous:
+                moments.append(_moment("lead_change", s, timeline, names[leader[s]], names[previous]))
+                lead_changes.append(s)
+            previous = leader[s]
+        lead_changes = np.array(lead_changes)
+
+        # Closing: P2's interval drops under the threshold (with a cooldown between calls);
+        # the car just passed for the lead is trivially close, so skip those
+        p2_gap = np.where(has_chaser, gaps[chaser, np.arange(len(timeline))], np.nan)
+        close = p2_gap < CLOSE_GAP_SECONDS
+        entering = np.flatnonzero(close[1:] & ~close[:-1]) + 1
+        last = -np.inf
+        for f in entering:
+            if len(lead_changes) and np.abs(lead_changes - f).min() <= hold:
+                continue
+            if timeline[f] - last >= CLOSE_COOLDOWN_SECONDS:
+                moments.append(_moment("closing", f, timeline, names[chaser[f]], names[leader[f]], p2_gap[f]))
+                last = timeline[f]
+
+    # Pit stops: sustained slow running on track data, outside neutralised periods
+    x = np.stack([np.asarray(d["x"], dtype=np.float64) for d in drivers])
+    speed = np.stack([np.asarray(d["speed"]) for d in drivers])
+    slow = ~np.isnan(x) & (speed < PIT_SPEED_KMH)
+    field_slow = slow.mean(axis=0)
+    rows, starts, ends = _runs(slow)
+    duration = (ends - starts) * interval
+    candidate = (
+        (duration >= PIT_MIN_SECONDS) & (duration <= PIT_MAX_SECONDS)
+        & (timeline[starts] >= timeline[0] + PIT_IGNORE_START_SECONDS)
+        & (ends < len(timeline))
+    )
+    cum = np.concatenate(([0.0], np.cumsum(field_slow)))
+    neutralised = (cum[ends] - cum[starts]) / np.maximum(ends - starts, 1) >= NEUTRALISED_FRACTION
+    for r, s in zip(rows[candidate & ~neutralised], starts[candidate & ~neutralised]):
+        moments.append(_moment("pit_stop", s, timeline, names[r]))
+
+    moments.sort(key=lambda m: (m["frame"], m["type"]))
+    if len(moments) > MAX_MOMENTS:
+        # Keep every start/lead change, then the earliest of the rest
+        major = [m for m in moments if m["type"] in ("start", "lead_change")]
+        minor = [m for m in moments if m["type"] not in ("start", "lead_change")]
+        moments = sorted(major + minor[:max(0, MAX_MOMENTS - len(major))], key=lambda m: m["frame"])
+    return moments
@@ -0,0 +1,129 @@
+"""
+Race Order Engine - per-frame classification from replay positions
+
+Every (driver, frame) position is projected onto the track_map centerline
+(the fastest lap's polyline, treated as a closed loop starting at the line)
+through a KD-tree over its vertices, refined onto the two adjacent segments.
+Unwrapping that lap position over time gives cumulative race distance, which
+orders the field each frame. Gaps are time-based, like timing screens: how
+long ago the leader was at the distance this car has reached now.
+All of it is vectorized over the (drivers, frames) arrays.
+"""
+
+from typing import Dict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+class TrackProjector:
+    """Nearest-point projection onto a closed track polyline"""
+
+    def __init__(self, track_x: np.ndarray, track_y: np.ndarray):
+        points = np.column_stack([track_x, track_y]).astype(np.float64)
+        points = points[~np.isnan(points).any(axis=1)]
+        if len(points) < 3:
+            raise ValueError("Track map has too few points to project onto")
+        self.points = points
+        self.seg = np.roll(points, -1, axis=0) - points       # segment k: point k -> k+1 (wrapping)
+        self.seg_len2 = np.einsum('ij,ij->i', self.seg, self.seg)
+        seg_len = np.sqrt(self.seg_len2)
+        self.start = np.concatenate(([0.0], np.cumsum(seg_len)[:-1]))
+        self.lap_length = float(seg_len.sum())
+        self.tree = cKDTree(points)
+
+    def _onto_segment(self, p: np.ndarray, k: np.ndarray):
+        """Distance along the track and squared miss distance of p projected onto segments k"""
+        d = p - self.points[k]
+        t = np.einsum('ij,ij->i', d, self.seg[k]) / np.where(self.seg_len2[k] > 0, self.seg_len2[k], 1.0)
+        t = np.clip(t, 0.0, 1.0)
+        miss = d - t[:, None] * self.seg[k]
+        return self.start[k] + t * np.sqrt(self.seg_len2[k]), np.einsum('ij,ij->i', miss, miss)
+
+    def project(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Lap position in track units [0, lap_length) for every point; NaN where x/y is NaN"""
+        shape = np.shape(x)
+        p = np.column_stack([np.ravel(x), np.ravel(y)]).astype(np.float64)
+        out = np.full(len(p), np.nan)
+        valid = ~np.isnan(p).any(axis=1)
+        if valid.any():
+            q = p[valid]
+            _, nearest = self.tree.query(q)
+            s_next, e_next = self._onto_segment(q, nearest)
+            s_prev, e_prev = self._onto_segment(q, (nearest - 1) % len(self.points))
+            out[valid] = np.where(e_prev < e_next, s_prev, s_next) % self.lap_length
+        return out.reshape(shape)
+
+def _forward_fill_index(valid: np.ndarray) -> np.ndarray:
+    """Per row, index of the latest valid column at or before each column (0 before the first)"""
+    idx = np.where(valid, np.arange(valid.shape[1]), 0)
+    return np.maximum.accumulate(idx, axis=1)
+
+def race_order(
+    x: np.ndarray,
+    y: np.ndarray,
+    timeline: np.ndarray,
+    track_x: np.ndarray,
+    track_y: np.ndarray,
+    units_per_metre: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Classification arrays for (drivers, frames) positions, NaN where off track:
+      distance  - cumulative race distance in metres (held after a car stops reporting)
+      position  - 1-based race position, 0 while a car has no distance yet
+      gap       - seconds behind the leader
+      interval  - seconds behind the car ahead
+    plus "lap_length" (metres). Positions are in track units (FastF1: 1/10 m).
+    """
+    projector = TrackProjector(track_x, track_y)
+    lap = projector.lap_length
+    n, m = x.shape
+    rows = np.arange(n)[:, None]
+
+    lap_pos = projector.project(x, y)
+    valid = ~np.isnan(lap_pos)
+    fill = _forward_fill_index(valid)
+    held = lap_pos[rows, fill]                                # NaN only before a car's first sample
+
+    # Unwrap: a big backwards jump is a line crossing, a big forwards jump a glitch back over it
+    step = np.diff(held, axis=1)
+    crossings = np.nan_to_num((step < -lap / 2).astype(float) - (step > lap / 2).astype(float))
+    laps = np.concatenate([np.zeros((n, 1)), np.cumsum(crossings, axis=1)], axis=1)
+    # Cars that first appear behind the line (on the grid) haven't started lap 1 yet
+    first = held[np.arange(n), valid.argmax(axis=1)]
+    laps -= (first > lap / 2)[:, None]
+    distance = (held + laps * lap) / units_per_metre
+
+    # Order each frame by distance; cars without one go last
+    key = np.where(np.isnan(distance), np.inf, -distance)
+    order = np.argsort(key, axis=0, kind='stable')            # order[k, f] = driver in P(k+1)
+    position = np.empty((n, m), dtype=np.uint8)
+    np.put_along_axis(position, order, np.arange(1, n + 1, dtype=np.uint8)[:, None], axis=0)
+    position[np.isnan(distance)] = 0
+
+    # Gap: time since the leading distance reached this car's distance
+    timeline = np.asarray(timeline, dtype=np.float64)
+    lead = np.maximum.accumulate(np.where(valid, distance, -np.inf).max(axis=0))
+    reached = np.isfinite(lead)
+    gap = np.full((n, m), np.nan)
+    if reached.any():
+        lead_t, lead_d = timeline[reached], lead[reached]
+        at = np.interp(distance[valid], lead_d, lead_t)
+        gap[valid] = np.maximum(timeline[np.nonzero(valid)[1]] - at, 0.0)
+    gap[position == 1] = 0.0
+    gap = gap[rows, _forward_fill_index(valid | (position == 1))]
+    gap[np.isnan(distance)] = np.nan
+
+    # Interval: gap difference to the car one position ahead
+    by_position = np.take_along_axis(gap, order, axis=0)
+    interval_sorted = np.diff(by_position, axis=0, prepend=np.zeros((1, m)))
+    interval = np.empty_like(gap)
+    np.put_along_axis(interval, order, interval_sorted, axis=0)
+    interval[position == 1] = 0.0
+
+    return {
+        "distance": distance.astype(np.float32),
+        "position": position,
+        "gap": gap.astype(np.float32),
+        "interval": interval.astype(np.float32),
+        "lap_length": lap / units_per_metre,
+    }
@@ -3,7 +3,7 @@ F1 Race Visualization API - FastF1 Backend
 Provides real-time race simulation data with telemetry
 
 Install requirements:
-pip install fastapi uvicorn fastf1 ollama pandas numpy
+pip install fastapi uvicorn fastf1 ollama pandas numpy scipy
 
 Run locally:
 uvicorn race_visualization_api:app --reload --port 8001
@@ -12,19 +12,43 @@ uvicorn race_visualization_api:app --reload --port 8001
 import pandas as pd
 import numpy as np
 import fastf1
-import ollama
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+
+import asyncio
+import json
+import struct
+import time
+
+import instrumentation
+from instrumentation import InstrumentationMiddleware, collect_stages, stage
+from replay_format import (
+    REPLAY_MEDIA_TYPE, encode_columns, encode_replay, frame_window, frames_to_json,
+    replay_metadata, replay_to_json, wants_binary
+)
+from replay_jobs import ReplayJob, ReplayJobManager, report_progress
+from replay_lod import LOD_TOLERANCES, LodPlan, apply_lod, lod_tolerance, plan_lod
+from commentary import CommentaryEngine, RaceState, quantize
+from race_moments import detect_moments
+from race_order import race_order
+from replay_store import ReplayCache, ReplayStore, replay_key
+from replay_warmup import ACCESS_STATS_FILE, ACCESS_STATS_FLUSH_SECONDS, AccessStats, parse_policy
+from telemetry_resample import resample_drivers, split_rows
 
 # --- CONFIGURATION ---
-CACHE_DIR = 'cache'
+CACHE_DIR = os.getenv("FASTF1_CACHE_DIR", "cache")
 if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
 fastf1.Cache.enable_cache(CACHE_DIR)
 
+# Default window size for streamed replays (seconds of race time per chunk)
+FRAME_CHUNK_SECONDS = 30.0
+REPLAY_STREAM_MEDIA_TYPE = "application/x-f1-replay-stream"
+
 app = FastAPI(title="F1 Pro Max API", version="1.0")
 
 # Enable CORS for frontend communication
@@ -35,10 +59,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request histograms, per-stage timings and Server-Timing/profiles (see instrumentation)
+app.add_middleware(InstrumentationMiddleware, router=app.router)
+
+# --- REPLAY CACHE ---
+# Processed replays are written to disk once and memory-mapped by every worker;
+# a byte-budgeted LRU keeps the hot ones open in this process.
+FRAME_INTERVAL = float(os.getenv("REPLAY_FRAME_INTERVAL", "0.5"))  # seconds between replay frames
+REPLAY_PIPELINE_VERSION = 4     # bump whenever process_race_data's output changes
+FASTF1_UNITS_PER_METRE = 10     # FastF1 X/Y positions are in 1/10 m
+REPLAY_STORE_DIR = 'replay_store'
+REPLAY_CACHE_BYTES = int(os.getenv("REPLAY_CACHE_BYTES", str(512 * 1024 * 1024)))
+race_cache = ReplayCache(REPLAY_CACHE_BYTES)
+replay_store = ReplayStore(REPLAY_STORE_DIR)
+instrumentation.REGISTRY.collect("replay_cache", race_cache.stats)
 
-# --- IN-MEMORY STORE ---
-# In a production app, use Redis. For now, a global dict suffices.
-race_cache = {}
+# --- REPLAY JOBS ---
+# Race processing runs in worker processes; the API only hands out job ids.
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", "2"))
+JOB_POLL_INTERVAL = 0.25        # seconds between progress events on /jobs/{id}/events
+
+# --- WARM-UP ---
+# Requests per race feed `python replay_warmup.py --top K`. REPLAY_WARMUP (e.g.
+# "season:2024,top:10", see replay_warmup) also processes races on startup,
+# at most REPLAY_WARMUP_CONCURRENCY at a time so user loads keep pool capacity.
+REPLAY_WARMUP = os.getenv("REPLAY_WARMUP", "")
+REPLAY_WARMUP_CONCURRENCY = int(os.getenv("REPLAY_WARMUP_CONCURRENCY", "1"))
+access_stats = AccessStats(os.path.join(REPLAY_STORE_DIR, ACCESS_STATS_FILE))
+
+# --- COMMENTARY ---
+commentary_engine = CommentaryEngine()
+# Per-race commentary tracks (key moments, generated once) by replay key
+commentary_tracks: Dict[str, list] = {}
+commentary_tasks: Dict[str, asyncio.Task] = {}
+# Tracks with fallback lines (model offline or too slow) and when they were built, by replay key.
+# They're served as they are and rebuilt, missing lines only, every COMMENTARY_RETRY_SECONDS
+commentary_partial: Dict[str, Tuple[float, list]] = {}
+COMMENTARY_RETRY_SECONDS = float(os.getenv("COMMENTARY_RETRY_SECONDS", "60"))
+# Tasks waiting for a loading race to finish before building its track, by replay key
+commentary_waiters: Dict[str, asyncio.Task] = {}
 
 # --- PYDANTIC MODELS (Data Contracts) ---
 class RaceRequest(BaseModel):
@@ -46,32 +105,50 @@ class RaceRequest(BaseModel):
     circuit: str
 
 class CommentaryRequest(BaseModel):
-    time_val: float
     leader_name: str
     leader_team: str
     leader_compound: str
-    leader_speed: int
     chaser_name: str
     gap: float # Distance gap
 
 class RaceResponse(BaseModel):
     event_name: str
+    lap_length: Optional[float] = None # metres along the track map
     track_map: Dict[str, List[float]] # {'x': [], 'y': []}
     timeline: List[float]
     drivers: Dict[str, Any] # Dictionary of driver data
 
 # --- HELPER FUNCTIONS ---
-def process_race_data(year, circuit):
+def lookup_replay(year, circuit):
+    """Already-processed replay from memory or the shared store, or None"""
+    cache_key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+    cached = race_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    with stage("store_load"):
+        stored = replay_store.load(cache_key)
+    if stored is not None:
+        race_cache.put(cache_key, stored)
+    return stored
+
+def process_race_data(year, circuit, progress=None):
     """
-    Loads data from FastF1, interpolates it, and prepares it for JSON response.
+    Loads data from FastF1 and interpolates it onto a shared timeline.
+    Returns the replay with NumPy arrays per channel (see replay_format).
+    `progress(stage, fraction)` is called as the work advances.
     """
-    cache_key = f"{year}_{circuit}"
-    if cache_key in race_cache:
-        return race_cache[cache_key]
+    cached = lookup_replay(year, circuit)
+    if cached is not None:
+        return cached
+    cache_key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+    report = progress or (lambda stage, fraction: None)
 
     try:
-        session = fastf1.get_session(year, circuit, 'R')
-        session.load(telemetry=True, weather=False, messages=False)
+        report("loading session", 0.05)
+        with stage("session_load"):
+            session = fastf1.get_session(year, circuit, 'R')
+            session.load(telemetry=True, weather=False, messages=False)
+        report("session loaded", 0.4)
         
         if session.laps.empty:
             raise ValueError("No lap data found.")
@@ -93,37 +170,25 @@ def process_race_data(year, circuit):
         # Timeline Creation
         max_duration = session.laps['Time'].max().total_seconds()
         duration = max_duration - start_time
-        # Reduced frequency to 0.5s to keep JSON payload manageable for HTTP
-        time_grid = np.arange(0, duration, 0.5) 
-        
-        processed_drivers = {}
+        time_grid = np.arange(0, duration, FRAME_INTERVAL)
         
-        for drv in session.drivers:
+        # Collect each driver's telemetry, then resample every channel of every driver at once
+        telemetry, driver_info = [], {}
+        for i, drv in enumerate(session.drivers):
+            report("loading telemetry", 0.4 + 0.4 * i / max(1, len(session.drivers)))
             try:
-                laps = session.laps.pick_driver(drv)
-                tel = laps.get_telemetry()
+                with stage("telemetry"):
+                    laps = session.laps.pick_driver(drv)
+                    tel = laps.get_telemetry()
                 if tel.empty: continue
                 
-                tel['Seconds'] = tel['Time'].dt.total_seconds() - start_time
-                
-                # Interpolate (Convert to list immediately for JSON serialization)
-                # We replace NaN with None because JSON standard doesn't support NaN
-                x = np.interp(time_grid, tel['Seconds'], tel['X'], left=np.nan, right=np.nan)
-                y = np.interp(time_grid, tel['Seconds'], tel['Y'], left=np.nan, right=np.nan)
-                speed = np.interp(time_grid, tel['Seconds'], tel['Speed'], left=0, right=0)
-                
                 d_info = session.get_driver(drv)
                 team_color = f"#{d_info['TeamColor']}" if d_info['TeamColor'] else "#888888"
                 try: compound = str(laps.iloc[0]['Compound'])
                 except: compound = "UNKNOWN"
-                
-                # Sanitize Data for JSON (Handle NaNs)
-                x = [None if np.isnan(v) else v for v in x]
-                y = [None if np.isnan(v) else v for v in y]
-                speed = [int(v) for v in speed]
 
-                processed_drivers[drv] = {
-                    'x': x, 'y': y, 'speed': speed,
+                telemetry.append(tel)
+                driver_info[drv] = {
                     'color': team_color, 
                     'name': d_info['Abbreviation'],
                     'team': d_info['TeamName'], 
@@ -132,73 +197,405 @@ def process_race_data(year, circuit):
             except Exception as e:
                 continue
 
+        # NaN positions mark frames where the car isn't on track
+        report("interpolating", 0.85)
+        with stage("interpolate"):
+            stacked = resample_drivers(telemetry, time_grid, start_time)
+
         # Track Map
         try:
             fastest_tel = session.laps.pick_fastest().get_telemetry()
-            track_x = fastest_tel['X'].to_list()
-            track_y = fastest_tel['Y'].to_list()
+            track_x = fastest_tel['X'].to_numpy(dtype=np.float32)
+            track_y = fastest_tel['Y'].to_numpy(dtype=np.float32)
         except:
-            first_drv = list(processed_drivers.values())[0]
-            track_x = first_drv['x']
-            track_y = first_drv['y']
+            track_x = stacked['x'][0]
+            track_y = stacked['y'][0]
+
+        # Race order, distance and gaps per frame
+        report("classifying", 0.9)
+        lap_length = None
+        try:
+            with stage("classify"):
+                classification = race_order(stacked['x'], stacked['y'], time_grid, track_x, track_y,
+                                            units_per_metre=FASTF1_UNITS_PER_METRE)
+            lap_length = round(classification.pop("lap_length"), 1)
+            stacked.update(classification)
+        except Exception as e:
+            print(f"⚠️ Could not classify {cache_key}: {e}")
+
+        channels = split_rows(stacked, list(driver_info))
+        processed_drivers = {drv: {**channels[drv], **info} for drv, info in driver_info.items()}
 
         result = {
             "event_name": str(session.event['EventName']),
+            "lap_length": lap_length,
             "track_map": {"x": track_x, "y": track_y},
-            "timeline": time_grid.tolist(),
+            "timeline": time_grid.astype(np.float32),
             "drivers": processed_drivers
         }
         
-        # Save to memory cache
-        race_cache[cache_key] = result
+        # Persist, then serve the mapped copy so this worker shares pages with the others
+        report("saving", 0.95)
+        try:
+            with stage("save"):
+                replay_store.save(cache_key, result)
+            result = replay_store.load(cache_key) or result
+        except Exception as e:
+            print(f"⚠️ Could not persist replay {cache_key}: {e}")
+        race_cache.put(cache_key, result)
         return result
 
     except Exception as e:
         print(f"Error processing data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def process_race_job(job_id, year, circuit):
+    """
+    Worker-process entry point. Returns (None, stage timings) once the replay is in
+    the shared store (the API maps it from there), or the replay itself in place of
+    None if it couldn't be saved.
+    """
+    try:
+        with collect_stages() as timings:
+            result = process_race_data(
+                year, circuit, progress=lambda name, fraction: report_progress(job_id, name, fraction)
+            )
+    except HTTPException as e:
+        # HTTPException doesn't pickle cleanly across the process boundary
+        raise RuntimeError(e.detail) from None
+    key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+    return (None if os.path.exists(replay_store.path(key)) else result), timings
+
+replay_jobs = ReplayJobManager(process_race_job, REPLAY_WORKERS)
+instrumentation.REGISTRY.collect("replay_jobs", replay_jobs.stats)
+
+def start_replay_job(year, circuit) -> ReplayJob:
+    """Job for a race: already done if it's processed, otherwise queued (deduplicated per race)"""
+    key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+    if key not in replay_jobs.active and lookup_replay(year, circuit) is not None:
+        return replay_jobs.completed(year, circuit, key)
+    return replay_jobs.submit(year, circuit, key)
+
+def job_replay(job: ReplayJob):
+    """The processed replay of a finished job"""
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    replay = lookup_replay(job.year, job.circuit)
+    if replay is None and job.result is not None:
+        race_cache.put(job.key, job.result)
+        replay = job.result
+    if replay is None:
+        raise HTTPException(status_code=410, detail="Replay is no longer available, load the race again")
+    return replay
+
+async def wait_for_job(job: ReplayJob) -> ReplayJob:
+    """Wait for a job; its worker-side stages count towards the waiting request's timings"""
+    with stage("job_wait"):
+        await replay_jobs.wait(job)
+    instrumentation.report_stages(job.timings)
+    return job
+
+async def get_replay(year, circuit):
+    """Process (or join the processing of) a race without blocking the event loop"""
+    job = await wait_for_job(start_replay_job(year, circuit))
+    return job_replay(job)
+
+async def build_commentary_track(job: ReplayJob):
+    """Detect a race's key moments and commentate them in one background batch"""
+    partial = commentary_partial.get(job.key)
+    if partial is not None:
+        moments = partial[1]
+    else:
+        moments = await asyncio.to_thread(detect_moments, job_replay(job))
+    track = await commentary_engine.commentate_moments(moments)
+    # Only complete tracks are kept for good (and persisted), so an offline model gets retried
+    if all(entry["generated"] for entry in track):
+        commentary_tracks[job.key] = track
+        commentary_partial.pop(job.key, None)
+        replay_store.save_json(job.key, "commentary", track)
+    else:
+        commentary_partial[job.key] = (time.monotonic(), track)
+    generated = sum(entry["generated"] for entry in track)
+    print(f"🎙️ Commentary track for {job.key}: {generated}/{len(track)} moments generated")
+
+def commentary_track(job: ReplayJob) -> Optional[list]:
+    """
+    A finished race's commentary track, or None while it's generated in the background.
+    A track with fallback lines is returned as it is and rebuilt once it's old enough.
+    """
+    track = commentary_tracks.get(job.key)
+    if track is None:
+        track = replay_store.load_json(job.key, "commentary")
+        if track is not None:
+            commentary_tracks[job.key] = track
+    if track is not None:
+        return track
+    built_at, partial = commentary_partial.get(job.key, (None, None))
+    stale = built_at is None or time.monotonic() - built_at >= COMMENTARY_RETRY_SECONDS
+    if stale and job.key not in commentary_tasks:
+        track_task(commentary_tasks, job.key, build_commentary_track(job))
+    return partial
+
+async def commentate_when_loaded(job: ReplayJob):
+    await replay_jobs.wait(job)
+    if job.status == "done":
+        commentary_track(job)
+
+def track_task(tasks: Dict[str, asyncio.Task], key: str, coro) -> asyncio.Task:
+    """Run a background task, keeping a reference until it's done and logging how it failed"""
+    task = tasks[key] = asyncio.create_task(coro)
+
+    def done(t: asyncio.Task):
+        tasks.pop(key, None)
+        if not t.cancelled() and t.exception() is not None:
+            print(f"⚠️ Background commentary for {key} failed: {t.exception()!r}")
+
+    task.add_done_callback(done)
+    return task
+
+def get_job(job_id: str) -> ReplayJob:
+    job = replay_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
 # --- API ENDPOINTS ---
 
 @app.get("/")
 def health_check():
-    return {"status": "F1 Pro Max API Online"}
+    return {"status": "F1 Pro Max API Online", "commentary": commentary_engine.stats()}
 
-@app.post("/load_race", response_model=RaceResponse)
-async def load_race(req: RaceRequest):
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics: request and per-stage histograms, replay cache and job gauges"""
+    return instrumentation.metrics_response()
+
+def lod_replay(replay: dict, key: str, lod: int, tolerance: Optional[float]) -> dict:
+    """Replay at a level of detail (cached next to the full one); the replay itself at lod 0"""
+    tol = lod_tolerance(lod, tolerance)
+    if tol <= 0:
+        return replay
+    lod_key = f"{key}@lod{tol:g}m"
+    cached = race_cache.get(lod_key)
+    if cached is None:
+        with stage("lod"):
+            plan = plan_lod(replay, lod, tolerance, FASTF1_UNITS_PER_METRE)
+            cached = apply_lod(replay, plan, tol * FASTF1_UNITS_PER_METRE)
+        race_cache.put(lod_key, cached)
+    return cached
+
+LOD_QUERY = Query(0, ge=0, le=max(LOD_TOLERANCES),
+                  description="Level of detail: 0 = full, higher = smaller payload (see replay_lod)")
+TOLERANCE_QUERY = Query(None, gt=0, description="Max visual position error in metres (overrides the lod preset)")
+
+def replay_response(replay: dict, request: Request):
+    """JSON by default; columnar binary when the client sends Accept: application/x-f1-replay"""
+    with stage("serialize"):
+        if wants_binary(request.headers.get("accept", "")):
+            length, chunks = encode_replay(replay)
+            return StreamingResponse(
+                chunks, media_type=REPLAY_MEDIA_TYPE,
+                headers={"Content-Length": str(length), "Vary": "Accept"}
+            )
+        return JSONResponse(replay_to_json(replay), headers={"Vary": "Accept"})
+
+async def warm_up(policy: str):
+    """Process the races a warm-up policy names through the job pool, a few at a time"""
+    try:
+        races = await asyncio.to_thread(parse_policy, policy, access_stats)
+    except Exception as e:
+        print(f"❌ Warm-up policy '{policy}' failed: {e}")
+        return
+    limit = asyncio.Semaphore(REPLAY_WARMUP_CONCURRENCY)
+
+    async def warm(year, circuit):
+        async with limit:
+            job = await replay_jobs.wait(start_replay_job(year, circuit))
+            if job.status == "failed":
+                print(f"❌ Warm-up {year} {circuit}: {job.error}")
+
+    await asyncio.gather(*(warm(y, c) for y, c in races))
+    print(f"🔥 Warm-up done: {len(races)} races")
+
+async def flush_access_stats():
+    """Write counted /load_race requests out every few seconds, off the event loop"""
+    while True:
+        await asyncio.sleep(ACCESS_STATS_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(access_stats.flush)
+        except Exception as e:
+            print(f"⚠️ Couldn't save race access stats: {e}")
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.access_stats_flush = asyncio.create_task(flush_access_stats())
+    if REPLAY_WARMUP:
+        app.state.warmup = asyncio.create_task(warm_up(REPLAY_WARMUP))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    replay_jobs.shutdown()
+    app.state.access_stats_flush.cancel()
+    access_stats.close()
+
+@app.post("/load_race", status_code=202, responses={
+    200: {"model": RaceResponse, "content": {REPLAY_MEDIA_TYPE: {}},
+          "description": "With ?wait=true: JSON, or the binary replay format on request"}
+})
+async def load_race(req: RaceRequest, request: Request, wait: bool = Query(False),
+                    lod: int = LOD_QUERY, tolerance: Optional[float] = TOLERANCE_QUERY):
     """
-    Triggers FastF1 data loading. This is a heavy operation.
-    Returns the full simulation dataset.
+    Starts loading a race in the background and returns its job.
+    Poll /jobs/{job_id} (or subscribe to /jobs/{job_id}/events), then fetch
+    /jobs/{job_id}/result. Requests for a race already loading join that job.
+    With ?wait=true the replay is returned directly once it's ready (at ?lod=).
     """
     print(f"Loading race: {req.year} {req.circuit}")
-    data = process_race_data(req.year, req.circuit)
-    return data
+    access_stats.record(req.year, req.circuit)
+    job = start_replay_job(req.year, req.circuit)
+    if job.key not in commentary_tracks and job.key not in commentary_waiters:
+        track_task(commentary_waiters, job.key, commentate_when_loaded(job))
+    if wait:
+        await wait_for_job(job)
+        return replay_response(lod_replay(job_replay(job), job.key, lod, tolerance), request)
+    return JSONResponse(job.to_dict(), status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return get_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events with the job's state whenever it changes, until it finishes"""
+    job = get_job(job_id)
+
+    async def events():
+        last = None
+        while True:
+            state = job.to_dict()
+            if state != last:
+                yield f"data: {json.dumps(state)}\n\n"
+                last = state
+            if job.done.is_set():
+                return
+            try:
+                await asyncio.wait_for(job.done.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/result", response_model=RaceResponse, responses={
+    200: {"content": {REPLAY_MEDIA_TYPE: {}}, "description": "JSON, or the binary replay format on request"}
+})
+async def job_result(job_id: str, request: Request,
+                     lod: int = LOD_QUERY, tolerance: Optional[float] = TOLERANCE_QUERY):
+    """The processed replay once the job is done (409 while it's still running)"""
+    job = get_job(job_id)
+    if not job.done.is_set():
+        return JSONResponse(job.to_dict(), status_code=409)
+    return replay_response(lod_replay(job_replay(job), job.key, lod, tolerance), request)
+
+@app.get("/race/{year}/{circuit}/meta")
+async def race_meta(year: int, circuit: str,
+                    lod: int = LOD_QUERY, tolerance: Optional[float] = TOLERANCE_QUERY):
+    """Static part of a replay: event, track map, drivers and timeline shape (no frames)"""
+    replay = await get_replay(year, circuit)
+    key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+    return replay_metadata(lod_replay(replay, key, lod, tolerance))
+
+def frame_chunks(replay: dict, lo: int, hi: int, step: int, binary: bool, plan: Optional[LodPlan] = None):
+    """Yield [lo, hi) in windows of `step` frames; NDJSON lines or length-prefixed binary blocks"""
+    for start in range(lo, hi, step):
+        with stage("frames_window"):
+            window = apply_lod(frame_window(replay, start, min(start + step, hi)), plan)
+        if binary:
+            length, chunks = encode_columns(window)  # already coalesced
+            # The length prefix rides on the window's first (header) chunk: one write per window
+            yield struct.pack("<I", length) + bytes(next(chunks, b""))
+            yield from chunks
+        else:
+            with stage("serialize"):
+                line = (json.dumps(frames_to_json(window), separators=(",", ":")) + "\n").encode()
+            yield line
+
+@app.get("/race/{year}/{circuit}/frames")
+async def race_frames(
+    year: int,
+    circuit: str,
+    request: Request,
+    start: float = Query(0.0, alias="from", ge=0, description="Window start, seconds of race time"),
+    end: Optional[float] = Query(None, alias="to", description="Window end (inclusive), default: race end"),
+    chunk: float = Query(FRAME_CHUNK_SECONDS, gt=0, description="Seconds of race time per streamed chunk"),
+    lod: int = LOD_QUERY,
+    tolerance: Optional[float] = TOLERANCE_QUERY
+):
+    """
+    Streams the replay's frames between `from` and `to` in fixed time windows,
+    so playback can start on the first chunk and seeking only fetches what's needed.
+    JSON lines by default; length-prefixed binary blocks with Accept: application/x-f1-replay.
+    With ?lod= every chunk is encoded on its own (deltas restart at each chunk's origin).
+    """
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    replay = await get_replay(year, circuit)
+    timeline = replay["timeline"]
+    lo = int(np.searchsorted(timeline, start, side='left'))
+    hi = len(timeline) if end is None else int(np.searchsorted(timeline, end, side='right'))
+    interval = float(timeline[1] - timeline[0]) if len(timeline) > 1 else 1.0
+    step = max(1, int(round(chunk / interval)))
+
+    plan = None
+    if lod_tolerance(lod, tolerance) > 0:
+        key = replay_key(year, circuit, FRAME_INTERVAL, REPLAY_PIPELINE_VERSION)
+        plan = LodPlan(**lod_replay(replay, key, lod, tolerance)["lod"])
+        k = plan.frame_stride
+        lo -= lo % k
+        # Whole held-telemetry periods per chunk, so every chunk samples on the same grid
+        step += -step % (k * plan.hold_stride)
+
+    binary = wants_binary(request.headers.get("accept", ""))
+    return StreamingResponse(
+        frame_chunks(replay, lo, hi, step, binary, plan),
+        media_type=REPLAY_STREAM_MEDIA_TYPE if binary else "application/x-ndjson",
+        headers={"X-Frame-Range": f"{lo}-{hi}", "X-Total-Frames": str(len(timeline)), "Vary": "Accept"}
+    )
+
+@app.get("/race/{year}/{circuit}/commentary")
+async def race_commentary(year: int, circuit: str):
+    """
+    Timestamped commentary track for the race's key moments (start, lead changes,
+    closing gaps, pit stops). 202 while the race loads or the track is being generated.
+    """
+    job = start_replay_job(year, circuit)
+    if not job.done.is_set():
+        return JSONResponse({"status": "loading", "job_id": job.id}, status_code=202)
+    job_replay(job)
+    track = commentary_track(job)
+    if track is None:
+        return JSONResponse({"status": "generating"}, status_code=202)
+    return {"status": "ready", "track": track}
+
+def race_state(req: CommentaryRequest) -> RaceState:
+    return quantize(req.leader_name, req.leader_team, req.leader_compound, req.chaser_name, req.gap)
 
 @app.post("/commentary")
 async def get_commentary(req: CommentaryRequest):
     """
     Stateless commentary generation. 
     The frontend calculates the state (who is leading) and sends it here.
+    Identical situations (same leader, chaser, compound and gap bucket) share one generation.
+    Race time and leader speed are deliberately no longer part of the prompt (they used to
+    be, and made every request unique); older clients still send time_val and leader_speed,
+    which are ignored, so the commentary no longer mentions them.
     """
-    gap_status = "close" if req.gap < 500 else "comfortable"
-    
-    prompt = f"""
-    Act as a professional F1 Commentator (Crofty style).
-    Context:
-    - Race Time: {int(req.time_val)}s
-    - Leader: {req.leader_name} ({req.leader_team}) on {req.leader_compound} tyres.
-    - P2: {req.chaser_name} is {gap_status} behind.
-    - Speed Leader: {req.leader_speed} km/h.
-    
-    Task: Write ONE dramatic sentence analyzing the situation.
-    """
-    
-    try:
-        # Using synchronous ollama call (blocking). 
-        # For high traffic, use `ollama.AsyncClient`
-        res = ollama.chat(model='llama3.2', messages=[{'role':'user','content':prompt}])
-        return {"commentary": res['message']['content']}
-    except Exception as e:
-        return {"commentary": "Commentary system offline..."}
+    return {"commentary": await commentary_engine.commentate(race_state(req))}
+
+@app.post("/commentary/batch")
+async def get_commentary_batch(reqs: List[CommentaryRequest]):
+    """Commentary for several race states in one round trip"""
+    return {"commentary": await commentary_engine.commentate_many(race_state(r) for r in reqs)}
 
 if __name__ == "__main__":
     import uvicorn
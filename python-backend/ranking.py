@@ -0,0 +1,65 @@
+"""
+Consensus Ranking Engine - combines any number of sub-model scores in one NumPy pass
+
+Each source contributes a score per driver (lower- or higher-is-better), an
+optional mask of drivers it actually has an opinion on, an optional win
+probability, and a weight. Ranks are computed per source with pandas'
+method='min' semantics, blended into a weighted consensus and sorted once.
+"""
+
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+class RankingSource(NamedTuple):
+    name: str
+    scores: np.ndarray
+    higher_is_better: bool = False
+    weight: float = 1.0
+    mask: Optional[np.ndarray] = None           # drivers this source covers (default: all)
+    probabilities: Optional[np.ndarray] = None  # win probability in [0, 1], if the source has one
+
+class Consensus(NamedTuple):
+    order: np.ndarray          # driver indices, predicted winner first
+    consensus: np.ndarray      # weighted consensus rank per driver (input order)
+    win_probability: np.ndarray  # percent, in predicted order
+
+def min_rank(values: np.ndarray, descending: bool = False) -> np.ndarray:
+    """1-based ranks where ties share the lowest rank (pandas rank(method='min'))"""
+    v = -np.asarray(values, dtype=float) if descending else np.asarray(values, dtype=float)
+    return np.searchsorted(np.sort(v), v, side='left') + 1
+
+def consensus_ranking(sources: List[RankingSource], fallback_step: float = 5.0) -> Consensus:
+    """
+    Blend sources into one ranking. A driver's consensus is the weighted mean of
+    the ranks from every source whose mask covers them. Win probability is the
+    weighted mean of the covering sources' probabilities; drivers no probability
+    source covers get max(0, 100 - fallback_step * predicted_index).
+    """
+    n = len(sources[0].scores)
+    ranks = np.empty((len(sources), n))
+    cover = np.empty((len(sources), n), dtype=bool)
+    weights = np.array([s.weight for s in sources], dtype=float)[:, None]
+    for k, s in enumerate(sources):
+        ranks[k] = min_rank(s.scores, descending=s.higher_is_better)
+        cover[k] = True if s.mask is None else s.mask
+
+    w = weights * cover
+    total = w.sum(axis=0)
+    # Drivers nobody covers fall back to the first source's rank
+    consensus = np.where(total > 0, (w * ranks).sum(axis=0) / np.where(total > 0, total, 1), ranks[0])
+    # quicksort, as DataFrame.sort_values uses: ties keep the order the hybrid has always shown
+    order = np.argsort(consensus, kind='quicksort')
+
+    has_prob = np.array([s.probabilities is not None for s in sources])
+    prob = np.full(n, np.nan)
+    if has_prob.any():
+        p = np.stack([s.probabilities for s in sources if s.probabilities is not None])
+        pw = w[has_prob]
+        p_total = pw.sum(axis=0)
+        prob = np.where(p_total > 0, (pw * p).sum(axis=0) / np.where(p_total > 0, p_total, 1), np.nan)
+
+    prob_ordered = prob[order] * 100
+    fallback = np.maximum(0, 100 - fallback_step * np.arange(n))
+    win_probability = np.where(np.isnan(prob_ordered), fallback, prob_ordered)
+    return Consensus(order=order, consensus=consensus, win_probability=win_probability)
@@ -0,0 +1,232 @@
+"""
+Race Replay Format - in-memory replay arrays and their wire encodings
+
+A processed replay keeps every per-driver channel as a NumPy array
+(float32 positions with NaN where the car isn't on track, int16 speeds).
+It is encoded either as the classic JSON document (NaN -> null) or as a
+compact columnar binary payload negotiated via the Accept header:
+
+    b"F1RP" | uint32 version | uint32 header length | JSON header | padding | arrays
+
+The JSON header describes every array as {"offset", "dtype", "length"}
+(offsets relative to the start of the array section, 8-byte aligned,
+little-endian), so clients can view the body without parsing numbers.
+The same encoding is used for full replays and for streamed frame windows.
+"""
+
+import json
+import struct
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+REPLAY_MEDIA_TYPE = "application/x-f1-replay"
+REPLAY_MAGIC = b"F1RP"
+REPLAY_VERSION = 1
+ALIGNMENT = 8
+# Pieces smaller than this are joined before they're sent (one write per ~64 KB)
+COALESCE_BYTES = 64 * 1024
+
+# Wire dtype per array name; other arrays keep their own dtype (little-endian)
+WIRE_DTYPES = {
+    "x": "<f4", "y": "<f4", "speed": "<i2", "timeline": "<f4",
+    "throttle": "|u1", "brake": "|u1", "gear": "|i1",
+    "position": "|u1", "distance": "<f4", "gap": "<f4", "interval": "<f4",
+}
+
+# Integer LOD deltas (see replay_lod); the dtype's minimum marks "off track"
+DELTA_CHANNELS = ("dx", "dy", "ddistance", "dgap", "dinterval", "dposition")
+
+def wants_binary(accept: str) -> bool:
+    """True if the client's Accept header asks for the binary replay format"""
+    return REPLAY_MEDIA_TYPE in (accept or "")
+
+# ==========================================
+# 📄 JSON
+# ==========================================
+def nullable_list(arr: np.ndarray, decimals: int = 3) -> list:
+    """Float array -> list with NaN as None (JSON has no NaN)"""
+    values = np.round(np.asarray(arr, dtype=np.float64), decimals).astype(object)
+    values[np.isnan(np.asarray(arr, dtype=np.float64))] = None
+    return values.tolist()
+
+def channel_list(name: str, arr: np.ndarray) -> list:
+    """One channel as a JSON list: floats rounded with NaN -> None, LOD deltas with their marker -> None"""
+    if arr.dtype.kind == 'f':
+        return nullable_list(arr)
+    if name in DELTA_CHANNELS:
+        values = arr.astype(object)
+        values[arr == np.iinfo(arr.dtype).min] = None
+        return values.tolist()
+    return arr.tolist()
+
+def replay_to_json(replay: dict) -> dict:
+    """RaceResponse-shaped dict for the JSON API"""
+    drivers = {}
+    for drv, d in replay["drivers"].items():
+        out = {k: v for k, v in d.items() if not isinstance(v, np.ndarray)}
+        for channel, arr in d.items():
+            if not isinstance(arr, np.ndarray):
+                continue
+            out[channel] = channel_list(channel, arr)
+        drivers[drv] = out
+    doc = {
+        "event_name": replay["event_name"],
+        "lap_length": replay.get("lap_length"),
+        "track_map": {k: nullable_list(v) for k, v in replay["track_map"].items()},
+        "timeline": np.asarray(replay["timeline"], dtype=np.float64).tolist(),
+        "drivers": drivers
+    }
+    if "lod" in replay:
+        doc["lod"] = replay["lod"]
+    return doc
+
+# ==========================================
+# 🎞️ FRAME WINDOWS
+# ==========================================
+def frame_window(replay: dict, lo: int, hi: int) -> dict:
+    """Frames [lo, hi) of a replay's time-varying channels, as zero-copy array views"""
+    return {
+        "start_index": int(lo),
+        "timeline": replay["timeline"][lo:hi],
+        "drivers": {
+            drv: {k: v[lo:hi] for k, v in d.items() if isinstance(v, np.ndarray)}
+            for drv, d in replay["drivers"].items()
+        }
+    }
+
+def frames_to_json(window: dict) -> dict:
+    doc = {
+        "start_index": window["start_index"],
+        "timeline": np.asarray(window["timeline"], dtype=np.float64).tolist(),
+        "drivers": {
+            drv: {k: channel_list(k, v) if isinstance(v, np.ndarray) else v for k, v in d.items()}
+            for drv, d in window["drivers"].items()
+        }
+    }
+    if "lod" in window:
+        doc["lod"] = window["lod"]
+    return doc
+
+def replay_metadata(replay: dict) -> dict:
+    """Everything but the per-frame arrays: event, track map, driver info, timeline shape"""
+    timeline = replay["timeline"]
+    return {
+        "event_name": replay["event_name"],
+        "lap_length": replay.get("lap_length"),
+        "track_map": {k: nullable_list(v) for k, v in replay["track_map"].items()},
+        "frames": int(len(timeline)),
+        "frame_interval": float(timeline[1] - timeline[0]) if len(timeline) > 1 else 0.0,
+        "duration": float(timeline[-1]) if len(timeline) else 0.0,
+        **({"lod": replay["lod"]} if "lod" in replay else {}),
+        "drivers": {
+            drv: {k: v for k, v in d.items() if not isinstance(v, np.ndarray)}
+            for drv, d in replay["drivers"].items()
+        }
+    }
+
+# ==========================================
+# 📦 BINARY
+# ==========================================
+def _is_array_entry(value) -> bool:
+    return isinstance(value, dict) and set(value) == {"offset", "dtype", "length"}
+
+def coalesce(chunks: Iterable, size: int = COALESCE_BYTES) -> Iterator:
+    """
+    Join runs of small chunks into buffers of about `size` bytes; larger chunks
+    pass through untouched (zero-copy). Every chunk of a StreamingResponse is a
+    separate send, so a payload of many small arrays is otherwise dominated by
+    per-send overhead.
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        if len(chunk) >= size:
+            if pending:
+                yield bytes(pending)
+                pending.clear()
+            yield chunk
+            continue
+        pending += chunk
+        if len(pending) >= size:
+            yield bytes(pending)
+            pending.clear()
+    if pending:
+        yield bytes(pending)
+
+def encode_columns(tree: dict) -> Tuple[int, Iterator[memoryview]]:
+    """
+    Binary encoding of any nested dict as (total length, chunks). Arrays become
+    {"offset", "dtype", "length"} entries in the header; chunks are memoryviews
+    over the arrays' own buffers wherever the dtype already matches the wire format,
+    with small arrays and padding coalesced.
+    """
+    arrays: List[np.ndarray] = []
+    offset = 0
+
+    def describe(name: str, arr: np.ndarray) -> dict:
+        nonlocal offset
+        dtype = WIRE_DTYPES.get(name, arr.dtype.newbyteorder('<').str)
+        wire = np.ascontiguousarray(arr, dtype=np.dtype(dtype))
+        entry = {"offset": offset, "dtype": wire.dtype.str, "length": int(wire.size)}
+        arrays.append(wire)
+        offset += wire.nbytes + (-wire.nbytes % ALIGNMENT)
+        return entry
+
+    def walk(node: dict) -> dict:
+        out = {}
+        for k, v in node.items():
+            if isinstance(v, np.ndarray):
+                out[k] = describe(k, v)
+            elif isinstance(v, dict):
+                out[k] = walk(v)
+            else:
+                out[k] = v
+        return out
+
+    header_bytes = json.dumps(walk(tree), separators=(",", ":")).encode()
+    prefix = REPLAY_MAGIC + struct.pack("<II", REPLAY_VERSION, len(header_bytes)) + header_bytes
+    prefix += b"\0" * (-len(prefix) % ALIGNMENT)
+    total = len(prefix) + offset
+
+    def chunks() -> Iterator[memoryview]:
+        yield memoryview(prefix)
+        for arr in arrays:
+            yield memoryview(arr).cast("B")
+            pad = -arr.nbytes % ALIGNMENT
+            if pad:
+                yield memoryview(b"\0" * pad)
+
+    return total, coalesce(chunks())
+
+def encode_replay(replay: dict) -> Tuple[int, Iterator[memoryview]]:
+    """Binary encoding of a full replay (see encode_columns)"""
+    tree = dict(replay)
+    tree["frames"] = int(len(replay["timeline"]))
+    return encode_columns(tree)
+
+def decode_columns(buf) -> dict:
+    """Inverse of encode_columns (arrays are zero-copy views into buf)"""
+    if bytes(buf[:4]) != REPLAY_MAGIC:
+        raise ValueError("Not an F1 replay payload")
+    version, header_len = struct.unpack_from("<II", buf, 4)
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+    header = json.loads(bytes(buf[12:12 + header_len]))
+    base = 12 + header_len
+    base += -base % ALIGNMENT
+
+    def walk(node: dict) -> dict:
+        out = {}
+        for k, v in node.items():
+            if _is_array_entry(v):
+                out[k] = np.frombuffer(buf, dtype=np.dtype(v["dtype"]), count=v["length"],
+                                       offset=base + v["offset"])
+            elif isinstance(v, dict):
+                out[k] = walk(v)
+            else:
+                out[k] = v
+        return out
+
+    return walk(header)
+
+decode_replay = decode_columns
@@ -0,0 +1,178 @@
+"""
+Replay Job Queue - race processing off the event loop
+
+FastF1 loading and interpolation run in a process pool instead of inside the
+request. Each (year, circuit) gets at most one live job; concurrent requests
+for the same race join it. Workers report progress through a queue that a
+background thread folds into the job table, so clients can poll or subscribe.
+"""
+
+import asyncio
+import multiprocessing as mp
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from instrumentation import observe_stages
+
+JOB_HISTORY = 256  # finished jobs kept around for polling
+
+# ==========================================
+# 👷 WORKER SIDE
+# ==========================================
+_progress_queue = None
+
+def _init_worker(queue):
+    global _progress_queue
+    _progress_queue = queue
+
+def report_progress(job_id: str, stage: str, fraction: float):
+    """Called from inside a worker process; no-op when running in-process"""
+    if _progress_queue is not None and job_id:
+        _progress_queue.put((job_id, stage, float(fraction)))
+
+# ==========================================
+# 📋 JOBS
+# ==========================================
+class ReplayJob:
+    def __init__(self, year: int, circuit: str, key: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.year = year
+        self.circuit = circuit
+        self.key = key
+        self.status = "queued"   # queued -> running -> done | failed
+        self.stage = "queued"
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.result = None       # set only when the worker couldn't persist the replay
+        self.timings: Dict[str, float] = {}  # worker-side stage durations (see instrumentation)
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "year": self.year,
+            "circuit": self.circuit,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "result_url": f"/jobs/{self.id}/result",
+        }
+
+class ReplayJobManager:
+    """
+    Deduplicated process-pool jobs with progress tracking. worker_fn(job_id, year, circuit)
+    returns (result, stage timings).
+    """
+
+    def __init__(self, worker_fn: Callable, max_workers: int = 2):
+        self.worker_fn = worker_fn
+        self.max_workers = max_workers
+        self.jobs: "OrderedDict[str, ReplayJob]" = OrderedDict()
+        self.active: Dict[str, ReplayJob] = {}  # replay key -> live job
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        # spawn: workers must not inherit the server's threads and sockets
+        ctx = mp.get_context("spawn")
+        self._queue = ctx.Queue()
+        self._pool = ProcessPoolExecutor(
+            self.max_workers, mp_context=ctx, initializer=_init_worker, initargs=(self._queue,)
+        )
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._drain_progress, daemon=True, name="replay-progress").start()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._queue is not None:
+            self._queue.put(None)
+
+    def _drain_progress(self):
+        queue = self._queue
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._apply_progress, *item)
+
+    def _apply_progress(self, job_id: str, stage: str, fraction: float):
+        job = self.jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.status = "running"
+            job.stage = stage
+            job.progress = max(job.progress, fraction)
+
+    def _remember(self, job: ReplayJob):
+        self.jobs[job.id] = job
+        while len(self.jobs) > JOB_HISTORY:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self.jobs[oldest_id]
+
+    def get(self, job_id: str) -> Optional[ReplayJob]:
+        return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {**counts, "active": len(self.active), "workers": self.max_workers}
+
+    def completed(self, year: int, circuit: str, key: str) -> ReplayJob:
+        """A job record for a race that's already processed"""
+        job = ReplayJob(year, circuit, key)
+        job.status, job.stage, job.progress, job.finished = "done", "cached", 1.0, time.time()
+        job.done.set()
+        self._remember(job)
+        return job
+
+    def submit(self, year: int, circuit: str, key: str) -> ReplayJob:
+        """Start processing a race, or return the job already processing it"""
+        job = self.active.get(key)
+        if job is not None:
+            return job
+        if self._pool is None:
+            self.start()
+        job = ReplayJob(year, circuit, key)
+        try:
+            submitted = self._pool.submit(self.worker_fn, job.id, year, circuit)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash) and took the pool down with it: replace the pool
+            print("⚠️ Replay worker pool broke - restarting it")
+            self.shutdown()
+            self.start()
+            submitted = self._pool.submit(self.worker_fn, job.id, year, circuit)
+        self.active[key] = job
+        self._remember(job)
+        future = asyncio.wrap_future(submitted)
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job: ReplayJob, future: asyncio.Future):
+        self.active.pop(job.key, None)
+        job.finished = time.time()
+        if future.cancelled():
+            job.status, job.error = "failed", "cancelled"
+        elif future.exception() is not None:
+            job.status, job.error = "failed", str(future.exception())
+        else:
+            job.result, job.timings = future.result()
+            observe_stages(job.timings)
+            job.status, job.stage, job.progress = "done", "done", 1.0
+        job.done.set()
+
+    async def wait(self, job: ReplayJob) -> ReplayJob:
+        await job.done.wait()
+        return job
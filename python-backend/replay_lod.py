@@ -0,0 +1,187 @@
+"""
+Replay Level of Detail - smaller replays with a bounded visual error
+
+A LOD level is a positional tolerance in metres. Within it:
+- the track map is simplified with Ramer-Douglas-Peucker,
+- frames are decimated by the largest stride whose linear interpolation
+  stays within half the tolerance for every driver,
+- positions are quantized to a grid of a quarter of the tolerance and
+  delta-encoded along the timeline as "dx"/"dy" integer arrays (in the
+  smallest integer dtype that fits) from per-driver origins "x0"/"y0",
+- distance (metres, same quarter-tolerance grid), gap and interval (seconds,
+  on the level's time step) and race position (exact) are delta-encoded the
+  same way ("distance0"/"ddistance", ...),
+- speed, throttle, brake and gear are sent every hold_stride-th frame and
+  held by the client in between.
+
+Decoding: x = (x0 + cumsum(dx)) * position_step, skipping the dtype's minimum
+value (JSON: null), which marks frames where the car isn't on track; other
+delta channels use the LodPlan step named in DELTA_CHANNELS.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# ?lod= level -> tolerance in metres (0 = full detail)
+LOD_TOLERANCES = {0: 0.0, 1: 0.5, 2: 2.0, 3: 8.0}
+# Per preset: gap/interval quantum in seconds, and the telemetry hold stride in frames
+LOD_TIME_STEPS = {0: 0.01, 1: 0.05, 2: 0.1, 3: 0.2}
+LOD_HOLD_STRIDES = {0: 1, 1: 2, 2: 4, 3: 8}
+STRIDES = (1, 2, 4, 8, 16)
+
+# Delta-encoded channel -> LodPlan field with its quantization step (None: integers, step 1)
+DELTA_CHANNELS = {"x": "position_step", "y": "position_step", "distance": "distance_step",
+                  "gap": "time_step", "interval": "time_step", "position": None}
+# Driver telemetry readouts, sampled every hold_stride-th frame
+HELD_CHANNELS = ("speed", "throttle", "brake", "gear")
+
+class LodPlan(NamedTuple):
+    level: int
+    tolerance: float        # metres
+    frame_stride: int
+    position_step: float    # track units per quantization step
+    distance_step: float    # metres
+    time_step: float        # seconds
+    hold_stride: int        # frames (after frame_stride) per telemetry sample
+
+    def describe(self) -> dict:
+        return self._asdict()
+
+# ==========================================
+# 🗺️ TRACK MAP
+# ==========================================
+def rdp_indices(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indices of the points Ramer-Douglas-Peucker keeps for a polyline (NaN points dropped)"""
+    points = np.column_stack([x, y]).astype(np.float64)
+    valid = np.flatnonzero(~np.isnan(points).any(axis=1))
+    points = points[valid]
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return valid
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        chord = points[b] - points[a]
+        rel = points[a + 1:b] - points[a]
+        length = np.hypot(*chord)
+        if length > 0:
+            dist = np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0]) / length
+        else:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        i = int(dist.argmax())
+        if dist[i] > tolerance:
+            mid = a + 1 + i
+            keep[mid] = True
+            stack.extend(((a, mid), (mid, b)))
+    return valid[keep]
+
+# ==========================================
+# 🏎️ TRAJECTORIES
+# ==========================================
+def decimation_error(x: np.ndarray, y: np.ndarray, stride: int) -> float:
+    """Worst position error (track units) of linearly interpolating (drivers, frames) arrays between every stride-th frame"""
+    m = x.shape[1]
+    if stride <= 1 or m < 2:
+        return 0.0
+    idx = np.arange(m)
+    lo = (idx // stride) * stride
+    hi = np.minimum(lo + stride, m - 1)
+    w = np.divide(idx - lo, hi - lo, out=np.zeros(m), where=hi > lo)
+    px = x[:, lo] + w * (x[:, hi] - x[:, lo])
+    py = y[:, lo] + w * (y[:, hi] - y[:, lo])
+    err = np.hypot(px - x, py - y)
+    return float(np.nanmax(err)) if np.isfinite(err).any() else 0.0
+
+def lod_tolerance(level: int, tolerance: Optional[float] = None) -> float:
+    """Tolerance in metres for a ?lod= level, unless an explicit tolerance overrides it"""
+    return LOD_TOLERANCES[level] if tolerance is None else float(tolerance)
+
+def lod_preset(tol_m: float) -> int:
+    """The preset level a tolerance falls into (an explicit ?tolerance= picks its time step and hold stride)"""
+    return max(level for level, t in LOD_TOLERANCES.items() if t <= tol_m)
+
+def plan_lod(replay: dict, level: int, tolerance: Optional[float] = None,
+             units_per_metre: float = 1.0) -> Optional[LodPlan]:
+    """Stride and quantization for a replay at a LOD level (None: full detail)"""
+    tol_m = lod_tolerance(level, tolerance)
+    if tol_m <= 0:
+        return None
+    preset = lod_preset(tol_m)
+    tol = tol_m * units_per_metre
+    drivers = list(replay["drivers"].values())
+    stride = 1
+    if drivers:
+        x = np.stack([np.asarray(d["x"], dtype=np.float64) for d in drivers])
+        y = np.stack([np.asarray(d["y"], dtype=np.float64) for d in drivers])
+        for candidate in STRIDES[1:]:
+            if decimation_error(x, y, candidate) > tol / 2:
+                break
+            stride = candidate
+    return LodPlan(level, tol_m, stride, tol / 4, tol_m / 4,
+                   LOD_TIME_STEPS[preset], LOD_HOLD_STRIDES[preset])
+
+def delta_encode(values: np.ndarray, step: float) -> Tuple[int, np.ndarray]:
+    """Quantize to `step` and delta-encode as (origin, deltas); NaN frames become the dtype's minimum"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    q = np.zeros(len(values), dtype=np.int64)
+    q[valid] = np.round(values[valid] / step).astype(np.int64)
+    # Carry the last position through gaps so deltas resume from it
+    origin = 0
+    if valid.any():
+        fill = np.maximum.accumulate(np.where(valid, np.arange(len(values)), 0))
+        q = q[fill]
+        origin = int(q[valid.argmax()])
+        q[:valid.argmax()] = origin
+    deltas = np.diff(q, prepend=origin)
+    deltas[~valid] = 0
+    span = int(np.abs(deltas).max()) if len(deltas) else 0
+    dtype = next(t for t in (np.int8, np.int16, np.int32, np.int64) if span < np.iinfo(t).max)
+    out = deltas.astype(dtype)
+    out[~valid] = np.iinfo(dtype).min
+    return origin, out
+
+def delta_decode(origin: int, deltas: np.ndarray, step: float) -> np.ndarray:
+    """Inverse of delta_encode (NaN where the car isn't on track)"""
+    missing = deltas == np.iinfo(deltas.dtype).min
+    values = (origin + np.cumsum(np.where(missing, 0, deltas).astype(np.int64))) * step
+    return np.where(missing, np.nan, values)
+
+def apply_lod(tree: dict, plan: Optional[LodPlan], track_tolerance: float = 0.0) -> dict:
+    """
+    LOD copy of a replay or frame window: strided timeline and channels, delta
+    channels as origin + deltas, telemetry every hold_stride-th frame,
+    simplified track map (track_tolerance in track units).
+    """
+    if plan is None:
+        return tree
+    k = plan.frame_stride
+    out = {key: v for key, v in tree.items() if key not in ("timeline", "drivers", "track_map")}
+    out["lod"] = plan.describe()
+    if "track_map" in tree:
+        tm = tree["track_map"]
+        keep = rdp_indices(tm["x"], tm["y"], track_tolerance)
+        out["track_map"] = {"x": np.asarray(tm["x"])[keep], "y": np.asarray(tm["y"])[keep]}
+    out["timeline"] = np.ascontiguousarray(np.asarray(tree["timeline"])[::k])
+    drivers: Dict[str, dict] = {}
+    for drv, d in tree["drivers"].items():
+        entry = {}
+        for name, v in d.items():
+            if not isinstance(v, np.ndarray):
+                entry[name] = v
+            elif name in DELTA_CHANNELS:
+                field = DELTA_CHANNELS[name]
+                step = getattr(plan, field) if field else 1
+                entry[name + "0"], entry["d" + name] = delta_encode(v[::k], step)
+            elif name in HELD_CHANNELS:
+                entry[name] = np.ascontiguousarray(v[::k * plan.hold_stride])
+            else:
+                entry[name] = np.ascontiguousarray(v[::k])
+        drivers[drv] = entry
+    out["drivers"] = drivers
+    return out
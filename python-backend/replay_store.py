@@ -0,0 +1,138 @@
+"""
+Processed Replay Store - on-disk, memory-mapped replays shared by every worker
+
+Each processed race is written once as a binary replay file (the same layout
+as the application/x-f1-replay payload) per (year, circuit, resolution,
+pipeline version). Workers open it with mmap, so the arrays live in the OS
+page cache once instead of once per process, and survive restarts. A small
+in-memory LRU with a byte budget sits in front of the files.
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from replay_format import decode_columns, encode_replay
+
+def replay_key(year: int, circuit: str, resolution: float, version: int) -> str:
+    """Stable file-system-safe key, e.g. 2024_saudi-arabia_0.5s_v1"""
+    slug = re.sub(r"[^a-z0-9]+", "-", str(circuit).casefold()).strip("-")
+    return f"{int(year)}_{slug}_{resolution:g}s_v{version}"
+
+def replay_nbytes(replay: dict) -> int:
+    """Bytes held by a replay's arrays"""
+    total = 0
+    stack = [replay]
+    while stack:
+        node = stack.pop()
+        for v in node.values():
+            if isinstance(v, np.ndarray):
+                total += v.nbytes
+            elif isinstance(v, dict):
+                stack.append(v)
+    return total
+
+# ==========================================
+# 💾 DISK
+# ==========================================
+class ReplayStore:
+    """Directory of memory-mapped replay files"""
+
+    SUFFIX = ".f1rp"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def load(self, key: str) -> Optional[dict]:
+        """Replay whose arrays are read-only views over the mapped file, or None"""
+        try:
+            with open(self.path(key), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            return decode_columns(memoryview(mm))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable replay {key}: {e}")
+            return None
+
+    def save(self, key: str, replay: dict) -> str:
+        """Write atomically so concurrent workers never map a half-written file"""
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        _, chunks = encode_replay(replay)
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+        return path
+
+    def sidecar_path(self, key: str, name: str) -> str:
+        return os.path.join(self.directory, f"{key}.{name}.json")
+
+    def load_json(self, key: str, name: str):
+        """Data stored alongside a replay (e.g. its commentary track), or None"""
+        try:
+            with open(self.sidecar_path(key, name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_json(self, key: str, name: str, data) -> str:
+        path = self.sidecar_path(key, name)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+# ==========================================
+# 🧠 MEMORY
+# ==========================================
+class ReplayCache:
+    """LRU of loaded replays bounded by the total size of their arrays"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, replay: dict):
+        size = replay_nbytes(replay)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (replay, size)
+            self._bytes += size
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
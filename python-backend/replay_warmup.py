@@ -0,0 +1,185 @@
+"""
+Replay Warm-up - pre-process races into the replay store before anyone asks
+
+The first /load_race for a race pays the whole FastF1 load + processing cost.
+This warms the shared replay store ahead of time for a list of races, every
+completed race of a season, or the top-K most requested races (from the
+access stats the API records), across a bounded worker pool.
+
+Run from the python-backend folder:
+python replay_warmup.py --season 2024                 # every completed 2024 race
+python replay_warmup.py --top 10 --workers 2          # most requested races
+python replay_warmup.py --race 2024:Bahrain --race "2023:Saudi Arabia"
+
+The API can also warm up in the background on startup (REPLAY_WARMUP, e.g.
+"season:2024" or "top:10"; see race_visualization_api.py).
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+ACCESS_STATS_FILE = "race_access.db"      # kept in the replay store directory
+ACCESS_STATS_FLUSH_SECONDS = 5.0          # how often the API writes counted requests out
+DEFAULT_STATS_PATH = os.path.join("replay_store", ACCESS_STATS_FILE)
+
+Race = Tuple[int, str]
+
+# ==========================================
+# 📊 ACCESS STATS
+# ==========================================
+class AccessStats:
+    """
+    Per-race request counts in a small SQLite file. record() only counts in
+    memory (it's called on the event loop); flush() writes the counts out in
+    one transaction, and top() flushes first.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS race_requests (
+            year INTEGER NOT NULL,
+            circuit TEXT NOT NULL,
+            requests INTEGER NOT NULL,
+            last_requested REAL NOT NULL,
+            PRIMARY KEY (year, circuit)
+        )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()      # guards _pending
+        self._db_lock = threading.Lock()
+        self._pending = {}                 # (year, circuit) -> [requests, last requested]
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self.SCHEMA)
+
+    def record(self, year: int, circuit: str):
+        with self._lock:
+            entry = self._pending.setdefault((int(year), circuit), [0, 0.0])
+            entry[0] += 1
+            entry[1] = time.time()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO race_requests VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (year, circuit) DO UPDATE SET requests = requests + excluded.requests, "
+                "last_requested = excluded.last_requested",
+                [(year, circuit, n, last) for (year, circuit), (n, last) in pending.items()]
+            )
+
+    def top(self, k: int) -> List[Race]:
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT year, circuit FROM race_requests ORDER BY requests DESC, last_requested DESC LIMIT ?",
+                (int(k),)
+            ).fetchall()
+        return [(int(y), c) for y, c in rows]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+# ==========================================
+# 📋 POLICIES
+# ==========================================
+def season_races(year: int) -> List[Race]:
+    """Every race of a season that has already been run (FastF1 event schedule)"""
+    import fastf1
+    schedule = fastf1.get_event_schedule(year, include_testing=False)
+    done = schedule[pd.to_datetime(schedule['EventDate']) < pd.Timestamp.now()]
+    return [(year, str(name)) for name in done['EventName']]
+
+def parse_policy(policy: str, stats: Optional[AccessStats] = None) -> List[Race]:
+    """'season:2024', 'top:10' or 'race:2024:Bahrain' (comma-separated) -> races, deduplicated"""
+    races: List[Race] = []
+    for part in filter(None, (p.strip() for p in policy.split(","))):
+        kind, _, arg = part.partition(":")
+        if kind == "season":
+            races += season_races(int(arg))
+        elif kind == "top":
+            races += stats.top(int(arg)) if stats is not None else []
+        elif kind == "race":
+            year, _, circuit = arg.partition(":")
+            races.append((int(year), circuit))
+        else:
+            raise ValueError(f"Unknown warm-up policy '{part}'")
+    return list(dict.fromkeys(races))
+
+# ==========================================
+# 👷 WORKER PROCESS
+# ==========================================
+def _warm_race(year: int, circuit: str) -> bool:
+    """Process one race into the shared store; False if it was already there"""
+    import race_visualization_api as api
+    if api.lookup_replay(year, circuit) is not None:
+        return False
+    api.process_race_job("", year, circuit)
+    return True
+
+def warm(races: List[Race], workers: int, initializer: Optional[Callable] = None, initargs: tuple = ()) -> dict:
+    """Process races into the store; initializer runs once in each worker (as for ProcessPoolExecutor)"""
+    summary = {"processed": 0, "cached": 0, "failed": 0}
+    if not races:
+        return summary
+    # spawn, not fork: the API process may already have threads running
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max(1, workers), mp_context=ctx, initializer=initializer, initargs=initargs) as pool:
+        futures = {pool.submit(_warm_race, y, c): (y, c) for y, c in races}
+        for future in as_completed(futures):
+            year, circuit = futures[future]
+            try:
+                processed = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"❌ {year} {circuit}: {e}")
+                continue
+            summary["processed" if processed else "cached"] += 1
+            print(f"{'✅' if processed else '💾'} {year} {circuit}")
+    return summary
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--season", type=int, nargs="*", default=[], help="Every completed race of these seasons")
+    parser.add_argument("--top", type=int, default=0, help="The K most requested races")
+    parser.add_argument("--race", action="append", default=[], metavar="YEAR:CIRCUIT")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--cache-dir", help="FastF1 cache directory (default: the API's)")
+    parser.add_argument("--stats", default=DEFAULT_STATS_PATH, help="Access stats the API records")
+    args = parser.parse_args()
+
+    if args.cache_dir:
+        # Read by race_visualization_api in every worker
+        os.environ["FASTF1_CACHE_DIR"] = args.cache_dir
+
+    policy = [f"season:{y}" for y in args.season] + [f"race:{r}" for r in args.race]
+    if args.top:
+        policy.append(f"top:{args.top}")
+    stats = AccessStats(args.stats) if args.top and os.path.exists(args.stats) else None
+    races = parse_policy(",".join(policy), stats)
+    print(f"🔥 Warming {len(races)} races on {args.workers} workers")
+
+    started = time.perf_counter()
+    summary = warm(races, args.workers)
+    print(f"🏁 {summary['processed']} processed, {summary['cached']} already cached, "
+          f"{summary['failed']} failed in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,108 @@
+"""
+Telemetry History Index - O(1) race lookup over processed_history
+
+Built once when the Telemetry model loads: maps (year, normalized circuit) to the
+first matching session_key, and keeps each session's rows together with its
+already-scaled 8-feature matrix so requests never rescan or rescale the history.
+Sessions are contiguous row ranges, so both are views into one table (the
+memory-mapped HistoryStore when it's available, see history_store).
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TELEMETRY_FEATURES = [
+    'grid_position', 'avg_race_pace', 'pace_consistency', 'top_speed',
+    'team_encoded', 'track_temperature', 'rain_probability', 'driver_encoded'
+]
+# Substring matches remembered per index; misses aren't cached, so request input can't grow it past this
+ALIAS_CACHE_SIZE = 1024
+
+def normalize_circuit(name) -> str:
+    return str(name).strip().casefold()
+
+def per_value(column: pd.Series, fn) -> np.ndarray:
+    """fn(values) per row, computed once per distinct value when the column is categorical"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        distinct = np.append(np.asarray(fn(pd.Series(column.cat.categories)), dtype=object), np.nan)
+        return distinct[column.cat.codes.to_numpy()]  # code -1 (missing) picks the trailing NaN
+    return np.asarray(fn(column), dtype=object)
+
+def session_order(history: pd.DataFrame) -> np.ndarray:
+    """Row order with each session's rows together, sessions in order of first appearance"""
+    first = pd.factorize(history['session_key'])[0]
+    return np.argsort(first, kind='stable')
+
+class TelemetryIndex:
+    """(year, circuit) -> session_key -> row range of (history, scaled features)"""
+
+    def __init__(self, history: pd.DataFrame, scaler, scaled: Optional[np.ndarray] = None):
+        """
+        `history` is processed_history; with `scaled` (its already-scaled features)
+        it must be grouped by session already, as HistoryStore keeps it
+        """
+        if scaled is None:
+            history = history.take(session_order(history)).reset_index(drop=True)
+            try:
+                scaled = scaler.transform(history[TELEMETRY_FEATURES])
+            except Exception as e:
+                print(f"⚠️ Could not pre-scale telemetry history: {e}")
+
+        years = per_value(history['date'], lambda v: pd.to_numeric(
+            v.astype(str).str.extract(r'((?:19|20)\d{2})')[0], errors='coerce'
+        ))
+        circuits = per_value(history['circuit_name'], lambda v: v.map(normalize_circuit, na_action='ignore'))
+
+        # First session per (year, circuit) in history order, matching the old scan's .iloc[0]
+        self.sessions_by_race: Dict[Tuple[int, str], object] = {}
+        self.circuits_by_year: Dict[int, List[str]] = {}
+        for year, circuit, sid in zip(years, circuits, history['session_key']):
+            if pd.isna(year) or not isinstance(circuit, str):
+                continue
+            key = (int(year), circuit)
+            if key not in self.sessions_by_race:
+                self.sessions_by_race[key] = sid
+                self.circuits_by_year.setdefault(int(year), []).append(circuit)
+
+        # Row range per session; slices are taken per lookup (~40 us) rather than kept,
+        # since thousands of small DataFrames would outweigh the compact table itself
+        self.history = history
+        self.scaled = scaled
+        self.sessions: Dict[object, slice] = {}
+        keys = history['session_key'].to_numpy()
+        bounds = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True]) if len(keys) else []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if not pd.isna(keys[start]):
+                self.sessions[keys[start]] = slice(int(start), int(stop))
+
+        # Substring fallbacks resolved once, e.g. "Monaco" -> "circuit de monaco"
+        self._aliases: Dict[Tuple[int, str], object] = {}
+
+    def find_session(self, year: int, circuit: str):
+        """session_key for a race, or None; same matching rules as the old substring scan"""
+        needle = normalize_circuit(circuit)
+        key = (int(year), needle)
+        sid = self.sessions_by_race.get(key)
+        if sid is not None:
+            return sid
+        sid = self._aliases.get(key)
+        if sid is not None:
+            return sid
+        match = next((c for c in self.circuits_by_year.get(int(year), []) if needle in c), None)
+        sid = self.sessions_by_race.get((int(year), match)) if match is not None else None
+        if sid is not None and len(self._aliases) < ALIAS_CACHE_SIZE:
+            self._aliases[key] = sid
+        return sid
+
+    def lookup(self, year: int, circuit: str):
+        """(session rows, scaled feature matrix) for a race, or None if it isn't in the history"""
+        sid = self.find_session(year, circuit)
+        if sid is None:
+            return None
+        rows = self.sessions[sid]
+        # Column-major like a per-session scaler.transform, so predict_proba's
+        # BLAS reductions (and the probabilities) come out bit-for-bit the same
+        scaled = np.asfortranarray(self.scaled[rows]) if self.scaled is not None else None
+        return self.history.iloc[rows], scaled
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the backend modules the way the servers do (from the python-backend folder)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
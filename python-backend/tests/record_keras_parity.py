@@ -0,0 +1,62 @@
+"""
+Record the Keras parity fixture for tests/test_numpy_model.py (needs TensorFlow)
+
+Builds a Keras model shaped like the Historical LSTM (stacked LSTMs over the
+history window, a dense context branch, batch/layer norm and dropout), gives
+every weight and batch-norm statistic a random value, exports it with
+numpy_model.export_keras_model and stores Keras' own predictions alongside the
+export in tests/fixtures/keras_parity.npz.
+
+Run from the python-backend folder:
+python tests/record_keras_parity.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from numpy_model import export_keras_model, load_keras_model  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "keras_parity.npz")
+SEQ_LENGTH, HIST_FEATURES, CURR_FEATURES = 5, 4, 3
+SAMPLES = 256
+
+def build_model(rng):
+    from tensorflow import keras
+    history = keras.Input((SEQ_LENGTH, HIST_FEATURES), name="history")
+    current = keras.Input((CURR_FEATURES,), name="current")
+    x = keras.layers.LSTM(32, return_sequences=True, name="lstm_1")(history)
+    x = keras.layers.LSTM(16, name="lstm_2")(x)
+    c = keras.layers.Dense(8, activation="relu", name="context")(current)
+    x = keras.layers.Concatenate(name="merge")([x, c])
+    x = keras.layers.BatchNormalization(name="norm")(x)
+    x = keras.layers.Dropout(0.3, name="dropout")(x)
+    x = keras.layers.Dense(16, activation="relu", name="head")(x)
+    x = keras.layers.LayerNormalization(name="head_norm")(x)
+    out = keras.layers.Dense(1, name="score")(x)
+    model = keras.Model([history, current], out)
+    for layer in model.layers:
+        weights = [rng.normal(size=w.shape).astype(np.float32) * 0.5 for w in layer.get_weights()]
+        if layer.name == "norm":
+            weights[3] = np.abs(weights[3]) + 0.5  # moving variance
+        layer.set_weights(weights)
+    return model
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(22)
+    model = build_model(rng)
+    inputs = [rng.standard_normal((SAMPLES, SEQ_LENGTH, HIST_FEATURES)).astype(np.float32),
+              rng.standard_normal((SAMPLES, CURR_FEATURES)).astype(np.float32)]
+    with tempfile.TemporaryDirectory() as tmp:
+        model_file, weights_file = os.path.join(tmp, "model.keras"), os.path.join(tmp, "model.npz")
+        model.save(model_file)
+        # Predictions from the saved file, exactly what an export starts from
+        expected = np.asarray(load_keras_model(model_file).predict(inputs, verbose=0))
+        graph = export_keras_model(model_file, weights_file)
+        with np.load(weights_file) as data:
+            export = {k: data[k] for k in data.files}
+    np.savez_compressed(FIXTURE, **export, __history__=inputs[0], __current__=inputs[1], __expected__=expected)
+    print(f"✅ Recorded {FIXTURE} ({len(graph['layers'])} layers, export error vs Keras {graph['parity_error']:.2e})")
@@ -0,0 +1,41 @@
+import asyncio
+import sqlite3
+
+from catalog import RaceCatalog, etag_matches
+from database import Database
+
+def test_if_none_match_compares_whole_entity_tags():
+    etag = '"0123456789abcdef0123"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    # Tags are compared whole, not searched for in the header
+    assert not etag_matches('"0123456789abcdef01234"', etag)
+    assert not etag_matches(f'"v2-{etag}"', etag)
+    assert not etag_matches("", etag)
+
+def test_refresh_checks_the_database_at_most_once_per_interval(tmp_path):
+    path = str(tmp_path / "f1_data.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE race_data (year INTEGER, round INTEGER, circuit_name TEXT)")
+    conn.execute("INSERT INTO race_data VALUES (2024, 1, 'Bahrain')")
+    conn.commit()
+    db = Database(path)
+    catalog = RaceCatalog(path, check_interval=3600)
+
+    async def scenario():
+        assert await catalog.refresh(db)
+        conn.execute("INSERT INTO race_data VALUES (2025, 1, 'Australia')")
+        conn.commit()
+        assert not await catalog.refresh(db)     # within the interval: not even checked
+        assert catalog.years == [2024]
+        catalog.check_interval = 0
+        assert await catalog.refresh(db)
+        assert catalog.years == [2025, 2024]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        catalog.close()
+        db.close()
+        conn.close()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+import types
+
+import httpx
+import ollama
+import pytest
+
+import stub_llm
+from commentary import OFFLINE_MESSAGE, CommentaryEngine, quantize
+
+@pytest.fixture
+def stub():
+    """benchmarks/stub_llm.py served in-process; tests set its delay/fail and read its request stats"""
+    stub_llm.stats.update(requests=0, in_flight=0, max_in_flight=0)
+    stub_llm.app.state.delay = 0.0
+    stub_llm.app.state.fail = False
+    yield stub_llm
+    stub_llm.app.state.delay = 0.0
+    stub_llm.app.state.fail = False
+
+def engine(**kwargs) -> CommentaryEngine:
+    client = ollama.AsyncClient(host="http://stub-llm", transport=httpx.ASGITransport(app=stub_llm.app))
+    return CommentaryEngine(model="stub", client=client, **kwargs)
+
+def state(leader="VER", gap=250.0):
+    return quantize(leader, "Red Bull Racing", "soft", "NOR", gap)
+
+def test_states_in_the_same_gap_bucket_share_one_generation(stub):
+    e = engine()
+
+    async def run():
+        return [await e.commentate(state(gap=gap)) for gap in (150.0, 260.0, 499.0)]
+
+    texts = asyncio.run(run())
+    assert texts == ["VER is absolutely flying out front!"] * 3
+    assert stub.stats["requests"] == 1
+    assert e.cache.stats()["hits"] == 2
+
+def test_concurrent_identical_requests_join_one_generation(stub):
+    stub.app.state.delay = 0.2
+    e = engine()
+
+    async def run():
+        return await asyncio.gather(*(e.commentate(state()) for _ in range(8)))
+
+    assert len(set(asyncio.run(run()))) == 1
+    assert stub.stats["requests"] == 1
+
+def test_generations_never_exceed_the_concurrency_limit(stub):
+    stub.app.state.delay = 0.1
+    e = engine(concurrency=2)
+    leaders = ["VER", "NOR", "LEC", "PIA", "HAM", "RUS"]
+
+    async def run():
+        return await e.commentate_many(state(leader) for leader in leaders)
+
+    texts = asyncio.run(run())
+    assert texts == [f"{leader} is absolutely flying out front!" for leader in leaders]
+    assert stub.stats["requests"] == len(leaders)
+    assert stub.stats["max_in_flight"] == 2
+
+def test_slow_generation_times_out_to_the_offline_message(stub):
+    stub.app.state.delay = 1.0
+    e = engine(timeout=0.1)
+    started = time.perf_counter()
+    assert asyncio.run(e.commentate(state())) == OFFLINE_MESSAGE
+    assert time.perf_counter() - started < 0.8
+    assert e.timeouts == 1
+
+def test_requests_waiting_too_long_for_a_slot_give_up(stub):
+    stub.app.state.delay = 0.5
+    e = engine(concurrency=1, queue_timeout=0.1)
+
+    async def run():
+        return await asyncio.gather(e.commentate(state("VER")), e.commentate(state("NOR")))
+
+    first, second = asyncio.run(run())
+    assert first == "VER is absolutely flying out front!"
+    assert second == OFFLINE_MESSAGE
+    assert e.queue_timeouts == 1
+    assert stub.stats["requests"] == 1
+
+def test_failures_are_not_cached(stub):
+    stub.app.state.fail = True
+    e = engine()
+
+    async def run():
+        failed = await e.commentate(state())
+        stub.app.state.fail = False
+        return failed, await e.commentate(state())
+
+    failed, recovered = asyncio.run(run())
+    assert failed == OFFLINE_MESSAGE
+    assert recovered == "VER is absolutely flying out front!"
+    assert e.errors == 1
+    assert stub.stats["requests"] == 2
+
+MOMENTS = [{"time": 60.0 * i, "frame": 120 * i, "type": "pit_stop", "driver": f"D{i:02d}",
+            "other": None, "gap": None} for i in range(5)]
+
+def test_moment_batches_never_take_a_live_slot(stub):
+    stub.app.state.delay = 0.1
+    e = engine(concurrency=1, queue_timeout=0.15)
+
+    async def run():
+        batch = asyncio.ensure_future(e.commentate_moments(MOMENTS))
+        await asyncio.sleep(0.05)
+        live = await e.commentate(state())
+        return live, await batch
+
+    live, track = asyncio.run(run())
+    assert live == "VER is absolutely flying out front!"
+    # The whole batch takes longer than the live queue timeout, and still isn't cut short
+    assert all(entry["generated"] for entry in track)
+    assert e.queue_timeouts == 0
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, stub):
+    """race_visualization_api with the stub engine, made-up moments and no replay store writes"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FASTF1_CACHE_DIR", str(tmp_path / "cache"))
+    import race_visualization_api as api
+    saved = {}
+    monkeypatch.setattr(api, "commentary_engine", engine())
+    monkeypatch.setattr(api, "detect_moments", lambda replay: [dict(m) for m in MOMENTS])
+    monkeypatch.setattr(api, "job_replay", lambda job: {})
+    monkeypatch.setattr(api.replay_store, "load_json", lambda key, name: None)
+    monkeypatch.setattr(api.replay_store, "save_json", lambda key, name, data: saved.setdefault(key, data))
+    monkeypatch.setattr(api, "COMMENTARY_RETRY_SECONDS", 0.0)
+    for d in (api.commentary_tracks, api.commentary_partial, api.commentary_tasks):
+        d.clear()
+    yield api, saved
+    for d in (api.commentary_tracks, api.commentary_partial, api.commentary_tasks):
+        d.clear()
+
+def test_tracks_with_fallback_lines_are_served_and_retried(api, stub):
+    api, saved = api
+    job = types.SimpleNamespace(key="2024_test")
+    stub.app.state.fail = True
+
+    async def settle():
+        while api.commentary_tasks:
+            await asyncio.sleep(0.01)
+
+    async def run():
+        assert api.commentary_track(job) is None          # building
+        await settle()
+        partial = api.commentary_track(job)               # fallback lines, and a rebuild starts
+        stub.app.state.fail = False
+        await settle()
+        return partial, api.commentary_track(job)
+
+    partial, complete = asyncio.run(run())
+    assert [entry["generated"] for entry in partial] == [False] * len(MOMENTS)
+    assert partial[0]["text"] == "D00 dives into the pit lane."
+    assert all(entry["generated"] for entry in complete)
+    assert api.commentary_tracks[job.key] is complete and job.key not in api.commentary_partial
+    assert saved == {job.key: complete}                   # only the complete track is persisted
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import fake_fastf1
+from replay_store import ReplayStore
+
+RACE_SECONDS = 300
+
+@pytest.fixture(scope="module")
+def replay(tmp_path_factory):
+    """A fake race processed end to end, as the replay benchmark does"""
+    tmp_path = tmp_path_factory.mktemp("fake_replay")
+    patch = pytest.MonkeyPatch()
+    patch.chdir(tmp_path)
+    patch.setenv("FASTF1_CACHE_DIR", str(tmp_path / "cache"))
+    import race_visualization_api as api
+    patch.setattr(api, "replay_store", ReplayStore(str(tmp_path / "replay_store")))
+    patch.setattr(api.fastf1, "get_session", api.fastf1.get_session)
+    fake_fastf1.install(api.fastf1, duration=RACE_SECONDS)
+    try:
+        yield api.process_race_data(2024, "Fake Replay Test")
+    finally:
+        patch.undo()
+
+def channel(replay, name):
+    return np.array([replay["drivers"][drv][name] for drv in replay["drivers"]], dtype=np.float64)
+
+def test_track_map_is_one_lap(replay):
+    # The ellipse's perimeter is ~2.59 km
+    assert replay["lap_length"] == pytest.approx(2590, rel=0.02)
+    assert len(replay["track_map"]["x"]) < RACE_SECONDS * 4 / 10
+
+def test_classification_is_monotone(replay):
+    distance = channel(replay, "distance")
+    assert (distance > -1).all()      # the grid sits just behind the track map's first point
+    assert (np.diff(distance, axis=1) >= -1e-3).all()
+    position = channel(replay, "position")
+    assert (np.sort(position, axis=0) == np.arange(1, len(position) + 1)[:, None]).all()
+
+def test_gaps_are_non_negative_and_below_the_elapsed_time(replay):
+    gap = channel(replay, "gap")
+    timeline = np.asarray(replay["timeline"], dtype=np.float64)
+    assert (gap >= 0).all()
+    assert (gap <= timeline + 1e-3).all()
+    # Cars a few tenths of a percent apart in pace: seconds behind, not the whole race
+    assert gap[:, -1].max() < 60
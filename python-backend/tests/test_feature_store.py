@@ -0,0 +1,54 @@
+import sqlite3
+
+import joblib
+import numpy as np
+import pytest
+
+import main
+from database import load_grid_history
+from feature_store import FeatureStore, build_feature_store, prepare_historical_artifacts
+from fixtures import make_historical_artifacts, make_race_db
+
+SEASONS = (2022, 2023)
+ROUNDS = 6
+
+@pytest.fixture(scope="module")
+def fixture_db(tmp_path_factory):
+    """Two short seasons plus a rookie (unknown to the label encoder) joining mid-season"""
+    path = tmp_path_factory.mktemp("feature_store")
+    rng = np.random.default_rng(0)
+    races = make_race_db(str(path / "f1_data.db"), rng, SEASONS, ROUNDS)
+    make_historical_artifacts(str(path), rng)
+
+    rookie = races[(races["driver_code"] == "SAR") & ((races["year"] > 2022) | (races["round"] >= 4))].copy()
+    rookie["driver_code"] = "NEW"
+    conn = sqlite3.connect(path / "f1_data.db")
+    rookie.to_sql("race_data", conn, index=False, if_exists="append")
+    conn.close()
+    return path
+
+# Season opener (no history at all), round 6 (full history except the rookie's),
+# next season's opener (only the rookie short) and a race where everyone has a full window
+@pytest.mark.parametrize("year,circuit", [(2022, "Bahrain"), (2022, "Miami"), (2023, "Bahrain"), (2023, "China")])
+def test_lookup_matches_live_feature_engineering(fixture_db, year, circuit):
+    db, scaler = str(fixture_db / "f1_data.db"), str(fixture_db / "advanced_scalers.pkl")
+    store_dir = str(fixture_db / "feature_store")
+    build_feature_store(db, scaler, store_dir)
+    store = FeatureStore.open(store_dir, scaler)
+    m = prepare_historical_artifacts(joblib.load(scaler))
+
+    conn = sqlite3.connect(db)
+    round_num, drivers = main.load_race_grid(conn, year, circuit)
+    codes = drivers["driver_code"].tolist()
+    history, slices = load_grid_history(conn, codes, year, round_num, main.SEQ_LENGTH)
+    conn.close()
+
+    live_h, live_c, live_idx = main.build_historical_batch(m, drivers, history, slices)
+    store_h, store_c, store_idx = store.lookup(codes, year, round_num, main.SEQ_LENGTH)
+
+    # Drivers without SEQ_LENGTH prior races keep the grid-position fallback on both paths
+    assert store_idx == live_idx
+    if (year, circuit) == (2022, "Miami"):
+        assert codes.index("NEW") not in live_idx and len(live_idx) == len(codes) - 1
+    np.testing.assert_allclose(store_h, live_h, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(store_c, live_c, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+def legacy_hybrid(drivers: pd.DataFrame, telemetry=None) -> list:
+    """The row-wise combiner the hybrid used before ranking.consensus_ranking, as (driver, win probability)"""
+    df = pd.DataFrame({
+        'driver': drivers['driver_code'],
+        'score_a': drivers['grid_position'],
+        'prob_b': 0.0,
+    })
+    if telemetry is not None:
+        race_b_sess, raw_probs = telemetry
+        exp_probs = np.exp(raw_probs / 0.5)
+        probs = exp_probs / np.sum(exp_probs)
+        prob_map = dict(zip(race_b_sess['name_acronym'], probs))
+        df['prob_b'] = df['driver'].map(prob_map).fillna(0.0)
+
+    df['rank_a'] = df['score_a'].rank(method='min')
+    df['rank_b'] = df['prob_b'].rank(ascending=False, method='min')
+    df['consensus'] = df.apply(
+        lambda row: (row['rank_a'] + row['rank_b']) / 2 if row['prob_b'] > 0 else row['rank_a'], axis=1
+    )
+    df = df.sort_values('consensus').reset_index(drop=True)
+    return [
+        (row['driver'], float(row['prob_b'] * 100) if row['prob_b'] > 0 else max(0, 100 - (i * 5)))
+        for i, row in df.iterrows()
+    ]
+
+def make_race(n: int, seed: int, covered: float = 0.7):
+    """A grid with shared grid positions, and a telemetry session missing some of its drivers"""
+    rng = np.random.default_rng(seed)
+    codes = [f"D{i:02d}" for i in range(n)]
+    drivers = pd.DataFrame({
+        'driver_code': codes,
+        'team_name': [f"Team {i // 2}" for i in range(n)],
+        'grid_position': rng.integers(1, n // 2 + 1, n),     # plenty of ties
+        'final_position': rng.permutation(n) + 1,
+    })
+    in_session = [c for c in codes if rng.random() < covered]
+    # Equal raw probabilities give equal ranks (and consensus ties) between covered drivers
+    raw = rng.choice([0.05, 0.1, 0.3], len(in_session))
+    session = pd.DataFrame({'name_acronym': in_session})
+    return drivers, (session, raw)
+
+def hybrid_rows(drivers: pd.DataFrame, telemetry) -> list:
+    score_a = drivers['grid_position'].to_numpy(dtype=float)
+    response = main.hybrid_response(2024, "Test", drivers, score_a, telemetry)
+    assert [r.predicted_position for r in response.predictions] == list(range(1, len(drivers) + 1))
+    return [(r.driver, r.win_probability) for r in response.predictions]
+
+@pytest.mark.parametrize("n", [8, 20])
+@pytest.mark.parametrize("seed", range(25))
+def test_consensus_matches_the_row_wise_combiner(n, seed):
+    drivers, telemetry = make_race(n, seed)
+    assert hybrid_rows(drivers, telemetry) == legacy_hybrid(drivers, telemetry)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_without_telemetry_every_driver_falls_back(seed):
+    drivers, _ = make_race(20, seed)
+    assert hybrid_rows(drivers, None) == legacy_hybrid(drivers, None)
+
+def test_no_driver_covered_by_telemetry():
+    drivers, _ = make_race(20, 0)
+    telemetry = (pd.DataFrame({'name_acronym': ["XXX", "YYY"]}), np.array([0.2, 0.4]))
+    assert hybrid_rows(drivers, telemetry) == legacy_hybrid(drivers, telemetry)
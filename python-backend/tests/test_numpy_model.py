@@ -0,0 +1,35 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from numpy_model import GRAPH_KEY, PARITY_TOLERANCE, NumpyModel
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "keras_parity.npz")
+
+def test_matches_recorded_keras_outputs():
+    """The fixture's export reproduces Keras' predictions (re-record: tests/record_keras_parity.py)"""
+    model = NumpyModel.load(FIXTURE)
+    with np.load(FIXTURE) as data:
+        inputs, expected = [data["__history__"], data["__current__"]], data["__expected__"]
+    actual = model.predict(inputs)
+    assert actual.shape == expected.shape
+    assert np.abs(actual - expected).max() <= PARITY_TOLERANCE
+
+def test_fixture_covers_every_layer_kind_the_model_uses():
+    with np.load(FIXTURE) as data:
+        kinds = {layer["type"] for layer in json.loads(str(data[GRAPH_KEY]))["layers"]}
+    assert {"LSTM", "Dense", "Concatenate", "BatchNormalization", "LayerNormalization", "Dropout"} <= kinds
+
+def test_export_rejects_normalization_over_a_non_last_axis(tmp_path):
+    keras = pytest.importorskip("tensorflow").keras
+    from numpy_model import export_keras_model
+    history = keras.Input((5, 4))
+    x = keras.layers.BatchNormalization(axis=1)(history)
+    out = keras.layers.Dense(1)(keras.layers.LSTM(8)(x))
+    model_file = str(tmp_path / "model.keras")
+    keras.Model(history, out).save(model_file)
+    with pytest.raises(ValueError, match="axis"):
+        export_keras_model(model_file, str(tmp_path / "model.npz"))
+    assert not os.path.exists(tmp_path / "model.npz")
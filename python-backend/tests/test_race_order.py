@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from race_order import race_order
+
+RADIUS = 500.0          # metres: a ~3.14 km circular lap
+UNITS = 10.0            # track units per metre, like FastF1's 1/10 m
+SPEEDS = (60.0, 55.0, 30.0)
+OFFSETS = (0.0, -5.0, -10.0)   # metres from the line at the start; behind it = still on the grid
+TIMELINE = np.arange(0, 300, 0.5)
+
+def on_track(distance: np.ndarray):
+    angle = distance / RADIUS
+    return RADIUS * UNITS * np.cos(angle), RADIUS * UNITS * np.sin(angle)
+
+@pytest.fixture(scope="module")
+def classified():
+    truth = np.array([off + v * TIMELINE for v, off in zip(SPEEDS, OFFSETS)])
+    x, y = on_track(truth)
+    # The second car stops reporting for 5 s (pit lane, lost telemetry)
+    pit = slice(200, 210)
+    x[1, pit] = np.nan
+    y[1, pit] = np.nan
+    track_x, track_y = on_track(np.linspace(0, 2 * np.pi * RADIUS, 400, endpoint=False))
+    return truth, pit, race_order(x, y, TIMELINE, track_x, track_y, units_per_metre=UNITS)
+
+def test_distance_follows_every_car_across_laps(classified):
+    truth, pit, result = classified
+    assert result["lap_length"] == pytest.approx(2 * np.pi * RADIUS, rel=1e-3)
+    distance = result["distance"].astype(np.float64)
+    on = np.ones(len(TIMELINE), dtype=bool)
+    on[pit] = False
+    np.testing.assert_allclose(distance[0], truth[0], atol=1.0)
+    np.testing.assert_allclose(distance[1][on], truth[1][on], atol=1.0)
+    # Held at the last known distance while the car isn't reporting
+    assert (distance[1][pit] == distance[1][pit.start - 1]).all()
+    assert (np.diff(distance, axis=1) >= -1e-3).all()
+
+def test_positions_order_the_field_by_race_distance(classified):
+    truth, _, result = classified
+    position = result["position"]
+    assert (np.sort(position, axis=0) == np.arange(1, 4)[:, None]).all()
+    # Fastest car leads, the slow car is last even where the leader laps it on track
+    assert (position[:, 1:] == np.array([[1], [2], [3]])).all()
+    lapping = np.flatnonzero((truth[0] - truth[2] > 2 * np.pi * RADIUS) & (TIMELINE > 0))
+    assert len(lapping)
+
+def test_gaps_are_time_behind_the_leader(classified):
+    truth, pit, result = classified
+    gap = result["gap"].astype(np.float64)
+    assert (gap >= 0).all()
+    assert (gap[0] == 0).all()
+    # The leader covers distance d at d / speed, so a car at d is t - d / speed behind
+    expected = TIMELINE - (truth[2] - OFFSETS[0]) / SPEEDS[0]
+    moving = TIMELINE >= 1
+    np.testing.assert_allclose(gap[2][moving], np.maximum(expected[moving], 0), atol=0.05)
+
+def test_interval_is_the_gap_to_the_car_ahead(classified):
+    _, _, result = classified
+    gap, interval, position = result["gap"], result["interval"], result["position"]
+    for f in range(len(TIMELINE)):
+        by_position = np.argsort(position[:, f])
+        assert interval[by_position[0], f] == 0
+        np.testing.assert_allclose(interval[by_position[1:], f], np.diff(gap[by_position, f]), atol=1e-5)
@@ -0,0 +1,42 @@
+import asyncio
+import os
+
+from replay_jobs import ReplayJobManager
+
+def worker(job_id: str, year: int, circuit: str):
+    """Stand-in for process_race_job; "Crash" kills its worker process outright"""
+    if circuit == "Crash":
+        os._exit(1)
+    return {"year": year, "circuit": circuit}, {"interpolate": 0.01}
+
+def test_jobs_run_in_workers_and_concurrent_submits_join():
+    async def run():
+        jobs = ReplayJobManager(worker, max_workers=1)
+        try:
+            first = jobs.submit(2024, "Bahrain", "bahrain")
+            assert jobs.submit(2024, "Bahrain", "bahrain") is first
+            await jobs.wait(first)
+            return first
+        finally:
+            jobs.shutdown()
+
+    job = asyncio.run(run())
+    assert job.status == "done"
+    assert job.result == {"year": 2024, "circuit": "Bahrain"}
+    assert job.timings == {"interpolate": 0.01}
+
+def test_pool_recovers_after_a_worker_crash():
+    async def run():
+        jobs = ReplayJobManager(worker, max_workers=1)
+        try:
+            crashed = await jobs.wait(jobs.submit(2024, "Crash", "crash"))
+            # The pool is broken now; the next race gets a fresh one instead of failing too
+            after = await jobs.wait(jobs.submit(2024, "Monaco", "monaco"))
+            return crashed, after
+        finally:
+            jobs.shutdown()
+
+    crashed, after = asyncio.run(run())
+    assert crashed.status == "failed"
+    assert after.status == "done"
+    assert after.result == {"year": 2024, "circuit": "Monaco"}
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from replay_format import replay_to_json
+from replay_lod import DELTA_CHANNELS, HELD_CHANNELS, apply_lod, delta_decode, plan_lod
+
+FRAMES = 1200  # 10 minutes at 0.5 s
+
+def make_replay(n_drivers: int = 4, seed: int = 0) -> dict:
+    """Cars lapping an ellipse (track units = 1/10 m), with pit-lane gaps in their positions"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(FRAMES) * 0.5
+    drivers = {}
+    for k in range(n_drivers):
+        angle = 2 * np.pi * t * (1 - 0.01 * k) / 90
+        x = (5000 * np.cos(angle)).astype(np.float32)
+        y = (3000 * np.sin(angle)).astype(np.float32)
+        x[300 + 10 * k:340 + 10 * k] = np.nan
+        y[300 + 10 * k:340 + 10 * k] = np.nan
+        speed = (240 + 40 * np.sin(angle * 3)).astype(np.int16)
+        drivers[str(k + 1)] = {
+            "x": x, "y": y, "speed": speed,
+            "throttle": np.clip(speed // 3, 0, 100).astype(np.uint8),
+            "brake": (speed < 220).astype(np.uint8),
+            "gear": np.clip(speed // 40, 1, 8).astype(np.int8),
+            "position": np.full(FRAMES, k + 1, dtype=np.uint8),
+            "distance": (t * 60 * (1 - 0.01 * k)).astype(np.float32),
+            "gap": np.where(np.isnan(x), np.nan, t * 0.01 * k + rng.normal(0, 0.01, FRAMES)).astype(np.float32),
+            "interval": np.full(FRAMES, 0.3 * (k > 0), dtype=np.float32),
+            "name": f"D{k + 1:02d}", "color": "#3671C6", "team": "Team", "compound": "SOFT",
+        }
+    return {"event_name": "Test Grand Prix", "lap_length": 2500.0,
+            "track_map": {"x": drivers["1"]["x"][:180], "y": drivers["1"]["y"][:180]},
+            "timeline": t.astype(np.float32), "drivers": drivers}
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_lod_channels_decode_within_their_steps(level):
+    replay = make_replay()
+    plan = plan_lod(replay, level, units_per_metre=10.0)
+    lod = apply_lod(replay, plan)
+    k, held = plan.frame_stride, plan.frame_stride * plan.hold_stride
+
+    for drv, full in replay["drivers"].items():
+        entry = lod["drivers"][drv]
+        for name, field in DELTA_CHANNELS.items():
+            step = getattr(plan, field) if field else 1
+            decoded = delta_decode(entry[name + "0"], entry["d" + name], step)
+            expected = full[name][::k].astype(np.float64)
+            np.testing.assert_array_equal(np.isnan(decoded), np.isnan(expected))
+            assert np.nanmax(np.abs(decoded - expected)) <= step / 2 + 1e-3
+        for name in HELD_CHANNELS:
+            np.testing.assert_array_equal(entry[name], full[name][::held])
+
+def test_lod1_payload_shrinks_every_channel():
+    replay = make_replay()
+    full = replay_to_json(replay)
+    lod = replay_to_json(apply_lod(replay, plan_lod(replay, 1, units_per_metre=10.0)))
+
+    size = lambda doc, name: sum(len(json.dumps(d[name])) for d in doc["drivers"].values())
+    for name in DELTA_CHANNELS:
+        assert size(lod, "d" + name) <= size(full, name)  # single-digit race positions can't shrink
+    for name in HELD_CHANNELS:
+        assert size(lod, name) < size(full, name)
+    assert len(json.dumps(lod)) < 0.6 * len(json.dumps(full))
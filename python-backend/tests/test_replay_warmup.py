@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import fake_fastf1
+from replay_store import ReplayStore
+from replay_warmup import AccessStats, parse_policy, warm
+
+RACE_SECONDS = 120  # short fake races: a few seconds of processing each
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty python-backend working directory (FastF1 cache, replay store) for the workers"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FASTF1_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path
+
+def test_warm_processes_races_into_the_store_once(workdir):
+    races = [(2024, "Bahrain"), (2024, "Monaco")]
+    fake = {"initializer": fake_fastf1.install_worker, "initargs": (RACE_SECONDS,)}
+
+    assert warm(races, workers=2, **fake) == {"processed": 2, "cached": 0, "failed": 0}
+    replays = [name for name in os.listdir(workdir / "replay_store") if name.endswith(".f1rp")]
+    assert len(replays) == 2
+    assert all(ReplayStore(str(workdir / "replay_store")).load(name[:-len(".f1rp")]) for name in replays)
+
+    # A second pass finds every race in the shared store
+    assert warm(races, workers=2, **fake) == {"processed": 0, "cached": 2, "failed": 0}
+
+def test_top_policy_follows_recorded_requests(tmp_path):
+    stats = AccessStats(str(tmp_path / "race_access.db"))
+    for race, n in (((2024, "Monaco"), 3), ((2023, "Bahrain"), 5), ((2024, "Bahrain"), 1)):
+        for _ in range(n):
+            stats.record(*race)
+    assert stats.top(2) == [(2023, "Bahrain"), (2024, "Monaco")]
+    assert parse_policy("top:2,race:2024:Monaco,race:2024:Japan", stats) == [
+        (2023, "Bahrain"), (2024, "Monaco"), (2024, "Japan")
+    ]
+    stats.close()
+
+def test_recorded_requests_are_written_on_flush(tmp_path):
+    path = str(tmp_path / "race_access.db")
+    stats = AccessStats(path)
+    stats.record(2024, "Monaco")
+    reader = AccessStats(path)
+    assert reader.top(5) == []      # counted in memory only
+    stats.flush()
+    stats.record(2024, "Japan")
+    stats.record(2024, "Japan")
+    stats.close()                   # close flushes what's left
+    assert reader.top(5) == [(2024, "Japan"), (2024, "Monaco")]
+    reader.close()
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from telemetry_index import ALIAS_CACHE_SIZE, TelemetryIndex
+
+def make_index() -> TelemetryIndex:
+    history = pd.DataFrame({
+        "session_key": [1, 1, 2, 2],
+        "date": ["2024-03-02T15:00:00"] * 2 + ["2024-05-26T13:00:00"] * 2,
+        "circuit_name": ["Sakhir", "Sakhir", "Circuit de Monaco", "Circuit de Monaco"],
+    })
+    return TelemetryIndex(history, scaler=None, scaled=np.zeros((len(history), 8)))
+
+def test_substring_matches_resolve_and_are_remembered():
+    index = make_index()
+    assert index.find_session(2024, "Sakhir") == 1
+    assert index.find_session(2024, " monaco ") == 2
+    assert index.find_session(2024, "Monaco") == 2
+    assert index.find_session(2023, "Monaco") is None
+    assert index._aliases == {(2024, "monaco"): 2}
+
+def test_unknown_circuits_do_not_grow_the_alias_cache():
+    index = make_index()
+    for i in range(ALIAS_CACHE_SIZE + 10):
+        assert index.find_session(2024, f"nowhere {i}") is None
+    assert index._aliases == {}
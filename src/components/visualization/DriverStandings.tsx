@@ -10,6 +10,7 @@ interface Driver {
   color: string;
   compound: string;
   speed: number;
+  gap?: number;
 }
 
 interface DriverStandingsProps {
@@ -79,6 +80,13 @@ export default function DriverStandings({ drivers }: DriverStandingsProps) {
                   </span>
                 </div>
 
+                {/* Gap to leader */}
+                {index > 0 && driver.gap !== undefined && (
+                  <span className="font-mono text-xs text-muted-foreground">
+                    +{driver.gap.toFixed(1)}s
+                  </span>
+                )}
+
                 {/* Speed */}
                 <div className="flex items-center gap-1 text-xs text-muted-foreground">
                   <Gauge className="w-3.5 h-3.5" />
@@ -7,7 +7,7 @@ import { Slider } from "@/components/ui/slider";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Badge } from "@/components/ui/badge";
 import { ScrollArea } from "@/components/ui/scroll-area";
-import { raceVisualizationService, RaceData, DriverData } from "@/services/raceVisualizationService";
+import { raceVisualizationService, RaceData, DriverData, CommentaryMoment } from "@/services/raceVisualizationService";
 import TrackMap from "@/components/visualization/TrackMap";
 import DriverStandings from "@/components/visualization/DriverStandings";
 import CommentaryPanel from "@/components/visualization/CommentaryPanel";
@@ -36,35 +36,59 @@ export default function RaceVisualization() {
   // Playback state
   const [isPlaying, setIsPlaying] = useState(false);
   const [currentTimeIndex, setCurrentTimeIndex] = useState(0);
+  // Frames streamed in so far; playback and seeking stay within them
+  const [loadedFrames, setLoadedFrames] = useState(0);
+  const loadedFramesRef = useRef(0);
+  const streamRef = useRef<AbortController | null>(null);
   const [playbackSpeed, setPlaybackSpeed] = useState(1);
   const animationRef = useRef<number | null>(null);
   const lastTimeRef = useRef<number>(0);
 
   // Commentary
   const [commentary, setCommentary] = useState<string[]>([]);
+  const [commentaryTrack, setCommentaryTrack] = useState<CommentaryMoment[] | null>(null);
   const lastCommentaryTime = useRef<number>(-10);
 
   const handleLoadRace = async () => {
     if (!selectedRace) return;
     
     const [year, circuit] = selectedRace.split("-");
+    streamRef.current?.abort();
+    const stream = new AbortController();
+    streamRef.current = stream;
     setLoading(true);
     setError(null);
     setRaceData(null);
     setCurrentTimeIndex(0);
+    setLoadedFrames(0);
+    loadedFramesRef.current = 0;
     setIsPlaying(false);
     setCommentary([]);
+    setCommentaryTrack(null);
+
+    raceVisualizationService.getCommentaryTrack(parseInt(year), circuit).then(track => {
+      if (!stream.signal.aborted) setCommentaryTrack(track);
+    });
 
     try {
-      const data = await raceVisualizationService.loadRace(parseInt(year), circuit);
-      setRaceData(data);
+      // Playback starts on the first streamed chunk; the rest keeps arriving while it plays
+      await raceVisualizationService.streamRace(parseInt(year), circuit, (data, frames) => {
+        loadedFramesRef.current = frames;
+        setLoadedFrames(frames);
+        setRaceData(data);
+        setLoading(false);
+      }, { signal: stream.signal });
     } catch (err) {
+      if (stream.signal.aborted) return;
       setError(err instanceof Error ? err.message : "Failed to load race data");
     } finally {
-      setLoading(false);
+      if (streamRef.current === stream) setLoading(false);
     }
   };
 
+  // Stop streaming when the page goes away
+  useEffect(() => () => streamRef.current?.abort(), []);
+
   // Get current driver positions and data
   const currentState = useMemo(() => {
     if (!raceData) return null;
@@ -83,14 +107,16 @@ export default function RaceVisualization() {
         x: x !== null ? x : undefined,
         y: y !== null ? y : undefined,
         speed,
+        position: driver.position?.[currentTimeIndex] ?? 0,
+        distance: driver.distance?.[currentTimeIndex] ?? undefined,
+        gap: driver.gap?.[currentTimeIndex] ?? undefined,
         isActive: x !== null && y !== null
       };
     }).filter(d => d.isActive);
 
-    // Sort by track position (approximate using distance from start)
+    // Race order is computed server-side; unclassified cars (position 0) go last
     const sorted = [...drivers].sort((a, b) => {
-      // Use x position as simple approximation
-      return (b.x || 0) - (a.x || 0);
+      return (a.position || 99) - (b.position || 99);
     });
 
     return {
@@ -99,7 +125,7 @@ export default function RaceVisualization() {
       leader: sorted[0],
       chaser: sorted[1]
     };
-  }, [raceData, currentTimeIndex]);
+  }, [raceData, currentTimeIndex, loadedFrames]);
 
   // Animation loop
   useEffect(() => {
@@ -120,7 +146,8 @@ export default function RaceVisualization() {
             setIsPlaying(false);
             return prev;
           }
-          return next;
+          // Hold on the last streamed frame until the next chunk arrives
+          return next < loadedFramesRef.current ? next : prev;
         });
       }
       
@@ -136,9 +163,17 @@ export default function RaceVisualization() {
     };
   }, [isPlaying, raceData, playbackSpeed]);
 
-  // Request commentary periodically
+  // Precomputed commentary: the latest key moments up to the current race time
+  useEffect(() => {
+    if (!commentaryTrack || !currentState) return;
+
+    const spoken = commentaryTrack.filter(moment => moment.time <= currentState.time);
+    setCommentary(spoken.slice(-5).map(moment => moment.text));
+  }, [commentaryTrack, currentState]);
+
+  // Request live commentary periodically until the precomputed track is available
   useEffect(() => {
-    if (!currentState || !raceData) return;
+    if (!currentState || !raceData || commentaryTrack) return;
     
     const currentTime = currentState.time;
     
@@ -146,21 +181,20 @@ export default function RaceVisualization() {
     if (currentTime - lastCommentaryTime.current >= 30 && currentState.leader && currentState.chaser) {
       lastCommentaryTime.current = currentTime;
       
-      const gap = Math.abs((currentState.leader.x || 0) - (currentState.chaser.x || 0));
+      // Distance gap along the track, in metres
+      const gap = Math.max(0, (currentState.leader.distance ?? 0) - (currentState.chaser.distance ?? 0));
       
       raceVisualizationService.getCommentary({
-        time_val: currentTime,
         leader_name: currentState.leader.name,
         leader_team: currentState.leader.team,
         leader_compound: currentState.leader.compound,
-        leader_speed: currentState.leader.speed,
         chaser_name: currentState.chaser.name,
         gap
       }).then(text => {
         setCommentary(prev => [...prev.slice(-4), text]);
       });
     }
-  }, [currentState, raceData]);
+  }, [currentState, raceData, commentaryTrack]);
 
   const handlePlayPause = () => setIsPlaying(!isPlaying);
   
@@ -173,7 +207,7 @@ export default function RaceVisualization() {
   };
 
   const handleSliderChange = (value: number[]) => {
-    setCurrentTimeIndex(value[0]);
+    setCurrentTimeIndex(Math.min(value[0], Math.max(0, loadedFrames - 1)));
     lastTimeRef.current = 0;
   };
 
@@ -339,6 +373,11 @@ export default function RaceVisualization() {
 
                     <div className="text-sm text-muted-foreground">
                       {currentTimeIndex + 1} / {raceData.timeline.length}
+                      {loadedFrames < raceData.timeline.length && (
+                        <span className="ml-2 text-xs">
+                          (streaming {Math.floor((loadedFrames / raceData.timeline.length) * 100)}%)
+                        </span>
+                      )}
                     </div>
                   </div>
                 </div>
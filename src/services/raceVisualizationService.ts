@@ -9,6 +9,13 @@ export interface DriverData {
   x: (number | null)[];
   y: (number | null)[];
   speed: number[];
+  throttle?: number[];
+  brake?: number[];
+  gear?: number[];
+  position?: number[];
+  distance?: (number | null)[];
+  gap?: (number | null)[];
+  interval?: (number | null)[];
   color: string;
   name: string;
   team: string;
@@ -17,6 +24,8 @@ export interface DriverData {
 
 export interface RaceData {
   event_name: string;
+  lap_length?: number | null;
+  lod?: LodInfo;
   track_map: {
     x: (number | null)[];
     y: (number | null)[];
@@ -25,12 +34,114 @@ export interface RaceData {
   drivers: Record<string, DriverData>;
 }
 
+export interface LodInfo {
+  level: number;
+  tolerance: number;
+  frame_stride: number;
+  position_step: number;
+  distance_step: number;
+  time_step: number;
+  hold_stride: number;
+}
+
+// Channels a LOD payload sends as "<name>0" + "d<name>" deltas, and the LodInfo field with their step
+const DELTA_CHANNELS = {
+  x: "position_step",
+  y: "position_step",
+  distance: "distance_step",
+  gap: "time_step",
+  interval: "time_step",
+  position: null,
+} as const;
+
+// Telemetry a LOD payload sends every hold_stride-th frame
+const HELD_CHANNELS = ["speed", "throttle", "brake", "gear"] as const;
+
+type LodDriver = Partial<DriverData> & Record<string, unknown>;
+
+/** Rebuild absolute positions from a LOD payload's x0/dx deltas (null = off track) */
+function decodeDeltas(origin: number, deltas: (number | null)[], step: number): (number | null)[] {
+  let acc = origin;
+  return deltas.map((d) => {
+    if (d === null) return null;
+    acc += d;
+    return acc * step;
+  });
+}
+
+/** Repeat every held sample `stride` times, back to one value per frame */
+function expandHeld(values: number[], stride: number, frames: number): number[] {
+  return Array.from({ length: frames }, (_, i) => values[Math.floor(i / stride)]);
+}
+
+/**
+ * A LOD driver entry back at one value per frame: delta channels decoded from
+ * their origins, held telemetry repeated (other entries pass through)
+ */
+function expandLod(driver: LodDriver, lod: LodInfo | undefined, frames: number): Partial<DriverData> {
+  if (!lod) return driver;
+  const out: Record<string, unknown> = { ...driver };
+  for (const [name, field] of Object.entries(DELTA_CHANNELS)) {
+    const deltas = driver[`d${name}`] as (number | null)[] | undefined;
+    if (deltas === undefined) continue;
+    out[name] = decodeDeltas((driver[`${name}0`] as number) ?? 0, deltas, field ? lod[field] : 1);
+    delete out[`${name}0`];
+    delete out[`d${name}`];
+  }
+  for (const name of HELD_CHANNELS) {
+    const values = driver[name];
+    if (Array.isArray(values)) out[name] = expandHeld(values, lod.hold_stride, frames);
+  }
+  return out as Partial<DriverData>;
+}
+
+export interface RaceMeta {
+  event_name: string;
+  lap_length?: number | null;
+  track_map: {
+    x: (number | null)[];
+    y: (number | null)[];
+  };
+  frames: number;
+  frame_interval: number;
+  duration: number;
+  lod?: LodInfo;
+  drivers: Record<string, Omit<DriverData, "x" | "y" | "speed" | "throttle" | "brake" | "gear">>;
+}
+
+export interface FrameChunk {
+  start_index: number;
+  lod?: LodInfo;
+  timeline: number[];
+  drivers: Record<string, LodDriver>;
+}
+
+export interface RaceJob {
+  job_id: string;
+  year: number;
+  circuit: string;
+  status: "queued" | "running" | "done" | "failed";
+  stage: string;
+  progress: number;
+  error: string | null;
+  result_url: string;
+}
+
+export interface CommentaryMoment {
+  time: number;
+  frame: number;
+  type: "start" | "lead_change" | "closing" | "pit_stop";
+  driver: string;
+  other: string | null;
+  gap: number | null;
+  text: string;
+  generated: boolean;
+}
+
 export interface CommentaryRequest {
-  time_val: number;
   leader_name: string;
   leader_team: string;
   leader_compound: string;
-  leader_speed: number;
   chaser_name: string;
   gap: number;
 }
@@ -46,7 +157,84 @@ class RaceVisualizationService {
     this.baseUrl = url;
   }
 
-  async loadRace(year: number, circuit: string): Promise<RaceData> {
+  /**
+   * Waits for a race to be processed by the background job queue: starts (or
+   * joins) the job and polls until it finishes.
+   */
+  async waitForRace(
+    year: number,
+    circuit: string,
+    onProgress?: (job: RaceJob) => void,
+    pollMs = 1000
+  ): Promise<RaceJob> {
+    let job = await this.startRaceJob(year, circuit);
+    onProgress?.(job);
+    while (job.status === "queued" || job.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, pollMs));
+      job = await this.getRaceJob(job.job_id);
+      onProgress?.(job);
+    }
+
+    if (job.status === "failed") {
+      throw new Error(`Failed to load race: ${job.error ?? "unknown error"}`);
+    }
+    return job;
+  }
+
+  /**
+   * Loads a race for playback without downloading it whole: builds the replay
+   * from /meta with empty frame arrays, then fills them from /frames as the
+   * chunks stream in. `onFrames` gets the replay and the number of frames
+   * loaded so far after every chunk, so playback can start on the first one.
+   */
+  async streamRace(
+    year: number,
+    circuit: string,
+    onFrames: (data: RaceData, loadedFrames: number) => void,
+    options: { onProgress?: (job: RaceJob) => void; signal?: AbortSignal; lod?: number } = {}
+  ): Promise<RaceData> {
+    const { onProgress, signal, lod = 0 } = options;
+    await this.waitForRace(year, circuit, onProgress);
+    const meta = await this.getRaceMeta(year, circuit, lod);
+
+    const frames = meta.frames;
+    const data: RaceData = {
+      event_name: meta.event_name,
+      lap_length: meta.lap_length,
+      lod: meta.lod,
+      track_map: meta.track_map,
+      timeline: Array.from({ length: frames }, (_, i) => i * meta.frame_interval),
+      drivers: {},
+    };
+    for (const [id, info] of Object.entries(meta.drivers)) {
+      data.drivers[id] = {
+        ...info,
+        x: new Array(frames).fill(null),
+        y: new Array(frames).fill(null),
+        speed: new Array(frames).fill(0),
+      };
+    }
+
+    // LOD chunks are strided: a chunk starting at frame i of the full replay lands at i / stride
+    const stride = meta.lod?.frame_stride ?? 1;
+    for await (const chunk of this.streamFrames(year, circuit, 0, undefined, signal, lod)) {
+      const offset = Math.floor(chunk.start_index / stride);
+      data.timeline.splice(offset, chunk.timeline.length, ...chunk.timeline);
+      for (const [id, channels] of Object.entries(chunk.drivers)) {
+        const driver = data.drivers[id] as unknown as Record<string, unknown[]>;
+        if (!driver) continue;
+        for (const [name, values] of Object.entries(expandLod(channels, chunk.lod, chunk.timeline.length))) {
+          if (!Array.isArray(values)) continue;
+          if (!driver[name]) driver[name] = new Array(frames).fill(null);
+          driver[name].splice(offset, values.length, ...values);
+        }
+      }
+      onFrames(data, offset + chunk.timeline.length);
+    }
+    return data;
+  }
+
+  async startRaceJob(year: number, circuit: string): Promise<RaceJob> {
     const response = await fetch(`${this.baseUrl}/load_race`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -60,6 +248,93 @@ class RaceVisualizationService {
     return response.json();
   }
 
+  async getRaceJob(jobId: string): Promise<RaceJob> {
+    const response = await fetch(`${this.baseUrl}/jobs/${jobId}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to load race: ${response.status}`);
+    }
+
+    return response.json();
+  }
+
+  async getRaceMeta(year: number, circuit: string, lod = 0): Promise<RaceMeta> {
+    const response = await fetch(
+      `${this.baseUrl}/race/${year}/${encodeURIComponent(circuit)}/meta?lod=${lod}`
+    );
+
+    if (!response.ok) {
+      throw new Error(`Failed to load race: ${response.status}`);
+    }
+
+    return response.json();
+  }
+
+  /**
+   * Streams frames between `from` and `to` (seconds of race time) chunk by chunk,
+   * so playback can start as soon as the first window arrives.
+   */
+  async *streamFrames(
+    year: number,
+    circuit: string,
+    from = 0,
+    to?: number,
+    signal?: AbortSignal,
+    lod = 0
+  ): AsyncGenerator<FrameChunk> {
+    const params = new URLSearchParams({ from: String(from), lod: String(lod) });
+    if (to !== undefined) params.set("to", String(to));
+
+    const response = await fetch(
+      `${this.baseUrl}/race/${year}/${encodeURIComponent(circuit)}/frames?${params}`,
+      { signal }
+    );
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to stream race: ${response.status}`);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffered = "";
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffered += value;
+      let newline = buffered.indexOf("\n");
+      while (newline >= 0) {
+        const line = buffered.slice(0, newline);
+        buffered = buffered.slice(newline + 1);
+        if (line) yield JSON.parse(line) as FrameChunk;
+        newline = buffered.indexOf("\n");
+      }
+    }
+    if (buffered.trim()) yield JSON.parse(buffered) as FrameChunk;
+  }
+
+  /**
+   * Precomputed commentary for the race's key moments. Resolves to null if the
+   * track isn't ready after `attempts` polls (callers fall back to live commentary).
+   */
+  async getCommentaryTrack(
+    year: number,
+    circuit: string,
+    attempts = 30,
+    pollMs = 2000
+  ): Promise<CommentaryMoment[] | null> {
+    for (let attempt = 0; attempt < attempts; attempt++) {
+      const response = await fetch(
+        `${this.baseUrl}/race/${year}/${encodeURIComponent(circuit)}/commentary`
+      );
+      if (response.status === 200) {
+        const data = await response.json();
+        return data.track;
+      }
+      if (response.status !== 202) return null;
+      await new Promise((resolve) => setTimeout(resolve, pollMs));
+    }
+    return null;
+  }
+
   async getCommentary(request: CommentaryRequest): Promise<string> {
     try {
       const response = await fetch(`${this.baseUrl}/commentary`, {